@@ -0,0 +1,77 @@
+import argparse
+import json
+import re
+import time
+from io import BytesIO
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_text_pdf
+import lambda_function
+
+LINE_PATTERN = re.compile(r"Week (\d+) item (\d+): Reading due (\d+)/(\d+)")
+
+
+class FakeBedrock:
+    """Answers invoke_model like Haiku would for make_text_pdf documents.
+
+    Every "Reading due" line becomes an event. Output is cut at max_tokens
+    (about 4 characters a token) and generation takes `seconds_per_token`.
+    """
+
+    def __init__(self, seconds_per_token):
+        self.seconds_per_token = seconds_per_token
+        self.calls = 0
+
+    def invoke_model(self, modelId, body):
+        self.calls += 1
+        request = json.loads(body)
+        prompt = request['messages'][0]['content']
+        events = [{
+            "startDate": f"2025-{int(month):02d}-{int(day):02d}T23:59:00-0500",
+            "endDate": f"2025-{int(month):02d}-{int(day):02d}T23:59:00-0500",
+            "eventTitle": f"Week {week} item {item} reading",
+            "eventDescription": "Reading due",
+            "tags": ["productivity"],
+        } for week, item, month, day in LINE_PATTERN.findall(prompt)]
+        text = json.dumps(events, indent=1)
+        max_chars = request['max_tokens'] * 4
+        stop_reason = 'end_turn'
+        if len(text) > max_chars:
+            text, stop_reason = text[:max_chars], 'max_tokens'
+        time.sleep(len(text) / 4 * self.seconds_per_token)
+        result = {'content': [{'type': 'text', 'text': text}], 'stop_reason': stop_reason}
+        return {'body': BytesIO(json.dumps(result).encode())}
+
+
+def single_prompt(bedrock, page_texts):
+    # What lambda_handler used to do: the whole document in one call, salvage whatever fits
+    prompt = "".join(text + "\n" for text in page_texts)
+    result = lambda_function.invoke_bedrock(bedrock, "", prompt)
+    return lambda_function.parse_events(result['content'][0]['text'])
+
+
+def chunked(bedrock, page_texts, parallelism):
+    chunks = lambda_function.chunk_segments([text + "\n" for text in page_texts])
+    return lambda_function.extract_events(bedrock, "", "", chunks, parallelism=parallelism)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Events recovered and latency for long documents")
+    parser.add_argument('--pages', type=int, nargs='*', default=[1, 5, 20])
+    parser.add_argument('--lines-per-page', type=int, default=12)
+    parser.add_argument('--parallelism', type=int, default=lambda_function.BEDROCK_PARALLELISM)
+    parser.add_argument('--seconds-per-token', type=float, default=0.0005,
+                        help="simulated generation speed (Haiku is roughly 0.007)")
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        page_texts = lambda_function.extract_pdf_pages(make_text_pdf(pages, args.lines_per_page), workers=1)
+        expected = pages * args.lines_per_page
+        print(f"{pages} pages, {expected} events")
+        for name, run in [('single prompt', lambda bedrock: single_prompt(bedrock, page_texts)),
+                          ('chunked', lambda bedrock: chunked(bedrock, page_texts, args.parallelism))]:
+            bedrock = FakeBedrock(args.seconds_per_token)
+            start = time.perf_counter()
+            events = run(bedrock)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:13s} {len(events):5d} events  {bedrock.calls:3d} calls  {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,71 @@
+import argparse
+import gc
+import glob
+import time
+from io import BytesIO
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_cid_pdf, make_objstm_pdf
+from bench_content_stream import SYSTEM_PDFS
+import PyPDF2
+from PyPDF2 import _cmap
+
+
+class UncachedReader(PyPDF2.PdfReader):
+    """What PdfReader did before: build_char_map runs for every font on every page."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._char_maps = None
+
+
+def extract_all(reader_class, pdf_data):
+    reader = reader_class(BytesIO(pdf_data))
+    return [page.extract_text() for page in reader.pages]
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        # Collector pauses land on whichever run crosses the threshold, so keep them out
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="extract_text per page with and without the font caches")
+    parser.add_argument('paths', nargs='*', help="PDFs to extract; defaults to synthetic ones and any under "
+                                                 "/usr/share/doc")
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    samples = {'Type0 + ToUnicode (synthetic)': make_cid_pdf(args.pages),
+               'Word-style (synthetic)': make_objstm_pdf(args.pages)}
+    for path in args.paths or sorted(glob.glob(SYSTEM_PDFS, recursive=True)):
+        with open(path, 'rb') as f:
+            samples[path] = f.read()
+
+    for name, pdf_data in samples.items():
+        _cmap.TO_UNICODE_CACHE_SIZE = 0
+        uncached, expected = best_time(lambda: extract_all(UncachedReader, pdf_data), args.repeat)
+        reader, result = best_time(lambda: extract_all(PyPDF2.PdfReader, pdf_data), args.repeat)
+        assert result == expected
+        # A warm container: an earlier request already parsed these CMaps
+        _cmap.TO_UNICODE_CACHE_SIZE = 256
+        _cmap._to_unicode_cache.clear()
+        extract_all(UncachedReader, pdf_data)
+        process, result = best_time(lambda: extract_all(UncachedReader, pdf_data), args.repeat)
+        assert result == expected
+        both, result = best_time(lambda: extract_all(PyPDF2.PdfReader, pdf_data), args.repeat)
+        assert result == expected
+        pages = len(expected)
+        print(f"{name[-40:]:40s} {pages:4d} pages, ms/page: uncached {uncached / pages:6.2f}  "
+              f"reader cache {reader / pages:6.2f}  warm CMap cache {process / pages:6.2f}  "
+              f"both {both / pages:6.2f}")
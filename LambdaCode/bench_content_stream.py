@@ -0,0 +1,99 @@
+import argparse
+import gc
+import glob
+import time
+from io import BytesIO
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_objstm_pdf, make_text_pdf
+import PyPDF2
+from PyPDF2._utils import read_non_whitespace, read_until_regex
+from PyPDF2.generic import ContentStream, DecodedStreamObject, NameObject, read_object
+
+# PDFs that ship with common system packages, used when no paths are given
+SYSTEM_PDFS = '/usr/share/doc/**/*.pdf'
+
+
+class LegacyContentStream(ContentStream):
+    """What ContentStream did before: one read(1) and seek(-1, 1) per byte, every operand through read_object."""
+
+    def _ContentStream__parse_content_stream(self, stream):
+        stream.seek(0, 0)
+        operands = []
+        while True:
+            peek = read_non_whitespace(stream)
+            if peek == b"" or peek == 0:
+                break
+            stream.seek(-1, 1)
+            if peek.isalpha() or peek in (b"'", b'"'):
+                operator = read_until_regex(stream, NameObject.delimiter_pattern, True)
+                if operator == b"BI":
+                    assert operands == []
+                    ii = self._read_inline_image(stream)
+                    self.operations.append((ii, b"INLINE IMAGE"))
+                else:
+                    self.operations.append((operands, operator))
+                    operands = []
+            elif peek == b"%":
+                while peek not in (b"\r", b"\n"):
+                    peek = stream.read(1)
+            else:
+                operands.append(read_object(stream, None, self.forced_encoding))
+
+
+def stream_object(data):
+    obj = DecodedStreamObject()
+    obj._data = data
+    return obj
+
+
+def page_contents(pdf_data):
+    """The decoded content stream bytes of every page."""
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    contents = []
+    for page in reader.pages:
+        content = page.get_contents()
+        if content is not None:
+            contents.append(content.get_data())
+    return contents
+
+
+def sample_contents(paths):
+    samples = {'syllabus (synthetic)': page_contents(make_text_pdf(50)),
+               'Word-style (synthetic)': page_contents(make_objstm_pdf(50))}
+    for path in paths:
+        with open(path, 'rb') as f:
+            samples[path] = page_contents(f.read())
+    return samples
+
+
+def parse_all(stream_class, contents, forced_encoding):
+    return [stream_class(stream_object(data), None, forced_encoding).operations for data in contents]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ContentStream parsing time, bulk lexer vs byte-by-byte")
+    parser.add_argument('paths', nargs='*', help="PDFs to parse; defaults to any under /usr/share/doc")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for name, contents in sample_contents(args.paths or sorted(glob.glob(SYSTEM_PDFS, recursive=True))).items():
+        size = sum(len(data) for data in contents)
+        timings = {}
+        for label, stream_class in (('legacy', LegacyContentStream), ('lexer', ContentStream)):
+            best = None
+            for _ in range(args.repeat):
+                # Collector pauses land on whichever run crosses the threshold, so keep them out
+                gc.collect()
+                gc.disable()
+                start = time.perf_counter()
+                # "bytes" is what PageObject._extract_text passes
+                operations = parse_all(stream_class, contents, "bytes")
+                elapsed = time.perf_counter() - start
+                gc.enable()
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = (best, operations)
+        assert timings['legacy'][1] == timings['lexer'][1]
+        before, after = timings['legacy'][0] * 1000, timings['lexer'][0] * 1000
+        print(f"{name[-40:]:40s} {len(contents):4d} pages {size / 1024:8.0f} KB  "
+              f"legacy {before:8.1f} ms  lexer {after:7.1f} ms ({before / after:4.1f}x)")
@@ -0,0 +1,83 @@
+import argparse
+import gc
+import glob
+import time
+import tracemalloc
+from io import BytesIO
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_chart_pdf, make_text_pdf
+from bench_content_stream import SYSTEM_PDFS
+import PyPDF2
+from PyPDF2.generic import ContentStream, NameObject
+
+
+def extract_materialized(pdf_data):
+    """What extract_text did before: parse every operation of a page into a list, then walk it."""
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    texts = []
+    for page in reader.pages:
+        contents = page.get("/Contents")
+        if contents is None:
+            texts.append(page.extract_text())
+            continue
+        # _extract_text walks an existing ContentStream's operations as they are; the list
+        # only lives as long as its page's extraction, as it did then
+        page[NameObject("/Contents")] = ContentStream(contents, reader, "bytes")
+        texts.append(page.extract_text())
+        page[NameObject("/Contents")] = contents
+    return texts
+
+
+def extract_streamed(pdf_data):
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    return [page.extract_text() for page in reader.pages]
+
+
+def best_time(func, pdf_data, repeat):
+    best = None
+    for _ in range(repeat):
+        # Collector pauses land on whichever run crosses the threshold, so keep them out
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        result = func(pdf_data)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def peak_memory(func, pdf_data):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(pdf_data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="extract_text time and peak memory, materialized vs streamed "
+                                                 "content stream operations")
+    parser.add_argument('paths', nargs='*', help="PDFs to extract; defaults to synthetic ones and any under "
+                                                 "/usr/share/doc")
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    samples = {'charts (synthetic)': make_chart_pdf(args.pages), 'syllabus (synthetic)': make_text_pdf(args.pages)}
+    for path in args.paths or sorted(glob.glob(SYSTEM_PDFS, recursive=True)):
+        with open(path, 'rb') as f:
+            samples[path] = f.read()
+
+    for name, pdf_data in samples.items():
+        before, expected = best_time(extract_materialized, pdf_data, args.repeat)
+        after, result = best_time(extract_streamed, pdf_data, args.repeat)
+        assert result == expected
+        before_peak = peak_memory(extract_materialized, pdf_data) / 1024 / 1024
+        after_peak = peak_memory(extract_streamed, pdf_data) / 1024 / 1024
+        print(f"{name[-40:]:40s} {len(expected):4d} pages  "
+              f"materialized {before:8.1f} ms {before_peak:6.1f} MB peak  "
+              f"streamed {after:8.1f} ms {after_peak:6.1f} MB peak")
@@ -0,0 +1,153 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import random
+import time
+from io import StringIO
+
+import boto3
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+import bench_pdf_extract  # noqa: F401
+import lambda_function
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'SampleImages')
+# Textract responses are saved here so reruns do not pay for analyze_document again
+RESPONSE_DIR = os.path.join(SAMPLE_DIR, 'textract')
+
+
+def convert_to_csv(blocks):
+    # What lambda_handler used to send: every LINE and WORD with full-precision floats
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Type', 'Text', 'Confidence', 'Left', 'Top', 'Width', 'Height'])
+    for block in blocks:
+        if block['BlockType'] in ['LINE', 'WORD']:
+            bbox = block.get('Geometry', {}).get('BoundingBox', {})
+            writer.writerow([
+                block['BlockType'],
+                block.get('Text', ''),
+                block.get('Confidence', 0),
+                bbox.get('Left', 0),
+                bbox.get('Top', 0),
+                bbox.get('Width', 0),
+                bbox.get('Height', 0)
+            ])
+    return output.getvalue()
+
+
+def textract_blocks(image_path):
+    """Return analyze_document LAYOUT blocks for an image, from RESPONSE_DIR when saved."""
+    saved = os.path.join(RESPONSE_DIR, os.path.splitext(os.path.basename(image_path))[0] + '.json')
+    if os.path.exists(saved):
+        with open(saved) as f:
+            return json.load(f)['Blocks']
+    with open(image_path, 'rb') as f:
+        response = boto3.client('textract', region_name='us-east-1').analyze_document(
+            Document={'Bytes': f.read()}, FeatureTypes=['LAYOUT'])
+    os.makedirs(RESPONSE_DIR, exist_ok=True)
+    with open(saved, 'w') as f:
+        json.dump(response, f)
+    return response['Blocks']
+
+
+def synthetic_blocks(rows=30, seed=0):
+    """Build a Textract-shaped response for a photographed syllabus schedule."""
+    rng = random.Random(seed)
+    blocks = []
+
+    def add(block_type, text=None, left=0.0, top=0.0, width=0.0, children=None):
+        block = {
+            'BlockType': block_type,
+            'Id': f"{len(blocks):08d}-{rng.getrandbits(64):016x}",
+            'Confidence': rng.uniform(90, 99.99),
+            'Geometry': {'BoundingBox': {'Left': left, 'Top': top, 'Width': width,
+                                         'Height': rng.uniform(0.012, 0.018)}},
+        }
+        if text is not None:
+            block['Text'] = text
+        if children:
+            block['Relationships'] = [{'Type': 'CHILD', 'Ids': [child['Id'] for child in children]}]
+        blocks.append(block)
+        return block
+
+    def line(text, left, top):
+        words, x = [], left
+        for word in text.split():
+            width = len(word) * 0.011
+            words.append(add('WORD', word, x + rng.uniform(0, 0.002), top + rng.uniform(0, 0.002), width))
+            x += width + 0.008
+        return add('LINE', text, left, top, x - left, words)
+
+    def layout(block_type, lines):
+        add(block_type, left=lines[0]['Geometry']['BoundingBox']['Left'],
+            top=lines[0]['Geometry']['BoundingBox']['Top'], children=lines)
+
+    layout('LAYOUT_HEADER', [line("CS 2110 Spring 2025", 0.06, 0.02)])
+    layout('LAYOUT_TITLE', [line("Course Schedule and Deadlines", 0.25, 0.06)])
+    layout('LAYOUT_TEXT', [line("All assignments are due at 11:59 PM on the date listed.", 0.08, 0.1),
+                           line("Exams are held in the lecture hall during class time.", 0.08, 0.12)])
+    table = []
+    for row in range(rows):
+        top = 0.16 + row * 0.026
+        month, day = 1 + row // 8, 1 + (row * 3) % 28
+        table.append(line(f"Week {row // 2 + 1}  {month}/{day}  Lecture {row + 1}: Topic {row + 1}", 0.08, top))
+        if row % 3 == 0:
+            table.append(line(f"Homework {row // 3 + 1} due {month}/{day + 1}", 0.62, top))
+    layout('LAYOUT_TABLE', table)
+    layout('LAYOUT_PAGE_NUMBER', [line("1", 0.5, 0.97)])
+    return blocks
+
+
+def layout_prompt(blocks, include_words):
+    header, segments = lambda_function.encode_layout(blocks, include_words=include_words)
+    return header + "".join(segments)
+
+
+def time_bedrock(prompt):
+    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+    start = time.perf_counter()
+    result = lambda_function.invoke_bedrock(bedrock, "", prompt)
+    return time.perf_counter() - start, result['usage']['input_tokens']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Textract CSV prompt with encode_layout")
+    parser.add_argument('images', nargs='*', help="images to analyze; defaults to SampleImages/*.jpg")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="use a generated syllabus page instead of calling Textract")
+    parser.add_argument('--bedrock', action='store_true',
+                        help="also send each prompt to Bedrock and report latency and real input tokens")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        documents = [('synthetic', synthetic_blocks())]
+    else:
+        images = args.images or sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+        documents = [(os.path.basename(path), textract_blocks(path)) for path in images]
+
+    encoders = [
+        ('csv', convert_to_csv),
+        ('layout', lambda blocks: layout_prompt(blocks, include_words=False)),
+        ('layout+words', lambda blocks: layout_prompt(blocks, include_words=True)),
+    ]
+    totals = {name: 0 for name, _ in encoders}
+    for name, blocks in documents:
+        print(name)
+        for encoder_name, encode in encoders:
+            start = time.perf_counter()
+            prompt = encode(blocks)
+            encode_ms = (time.perf_counter() - start) * 1000
+            tokens = lambda_function.estimate_tokens(prompt)
+            totals[encoder_name] += tokens
+            detail = ""
+            if args.bedrock:
+                elapsed, input_tokens = time_bedrock(prompt)
+                detail = f", Bedrock {elapsed * 1000:7.0f} ms for {input_tokens} input tokens"
+            print(f"  {encoder_name:13s} {len(prompt):7d} chars  ~{tokens:6d} tokens  "
+                  f"encode {encode_ms:6.2f} ms{detail}")
+    print("Totals")
+    for encoder_name, tokens in totals.items():
+        print(f"  {encoder_name:13s} ~{tokens:6d} tokens ({tokens / totals['csv']:.0%} of csv)")
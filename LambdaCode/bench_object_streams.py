@@ -0,0 +1,74 @@
+import argparse
+import re
+import time
+from io import BytesIO
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_objstm_pdf
+import PyPDF2
+from PyPDF2._utils import b_, read_non_whitespace
+from PyPDF2.generic import IndirectObject, NullObject, NumberObject, read_object
+
+
+class UncachedReader(PyPDF2.PdfReader):
+    """What PdfReader did before: decode-or-fetch the object stream and rescan its header on every lookup."""
+
+    def _get_object_from_stream(self, indirect_reference):
+        stmnum, idx = self.xref_objStm[indirect_reference.idnum]
+        obj_stm = IndirectObject(stmnum, 0, self).get_object()
+        stream_data = BytesIO(b_(obj_stm.get_data()))
+        for i in range(obj_stm["/N"]):
+            read_non_whitespace(stream_data)
+            stream_data.seek(-1, 1)
+            objnum = NumberObject.read_from_stream(stream_data)
+            read_non_whitespace(stream_data)
+            stream_data.seek(-1, 1)
+            offset = NumberObject.read_from_stream(stream_data)
+            read_non_whitespace(stream_data)
+            stream_data.seek(-1, 1)
+            if objnum != indirect_reference.idnum:
+                continue
+            stream_data.seek(int(obj_stm["/First"] + offset), 0)
+            read_non_whitespace(stream_data)
+            stream_data.seek(-1, 1)
+            return read_object(stream_data, self)
+        return NullObject()
+
+
+def extract_all(reader_class, pdf_data):
+    reader = reader_class(BytesIO(pdf_data))
+    return [page.extract_text() for page in reader.pages]
+
+
+def resolve_all(reader_class, pdf_data):
+    # Every packed object once, the way a merge or a full metadata walk reads them
+    reader = reader_class(BytesIO(pdf_data))
+    objects = [reader.get_object(IndirectObject(number, 0, reader)) for number in sorted(reader.xref_objStm)]
+    # IndirectObject reprs carry the reader's id, so compare without it
+    return [re.sub(r"IndirectObject\((\d+), (\d+), \d+\)", r"\1 \2 R", str(obj)) for obj in objects]
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Object stream lookups with and without PdfReader's cache")
+    parser.add_argument('--pages', type=int, nargs='*', default=[10, 50, 200])
+    parser.add_argument('--objects-per-stream', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        pdf_data = make_objstm_pdf(pages, objects_per_stream=args.objects_per_stream)
+        for label, work in (('open + extract_text', extract_all), ('resolve every object', resolve_all)):
+            before, expected = best_of(lambda: work(UncachedReader, pdf_data), args.repeat)
+            after, result = best_of(lambda: work(PyPDF2.PdfReader, pdf_data), args.repeat)
+            assert result == expected
+            print(f"{pages:4d} pages {label:20s} uncached {before:8.1f} ms  cached {after:8.1f} ms "
+                  f"({before / after:4.2f}x)")
@@ -0,0 +1,262 @@
+import argparse
+import os
+import sys
+import time
+import zlib
+
+try:
+    import PyPDF2
+except ImportError:
+    # Fall back to the copy bundled for the Lambda deployment package
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'SnapPlannerUI', 'lambda_package'))
+    import PyPDF2
+
+import lambda_function
+
+
+def make_text_pdf(pages, lines_per_page=40):
+    """Build a simple PDF with `pages` pages of Helvetica text, syllabus style."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        lines = [f"Week {page + 1} item {line}: Reading due {page % 12 + 1}/{line % 28 + 1} at 11:59 PM"
+                 for line in range(lines_per_page)]
+        stream = b"BT /F1 10 Tf 12 TL 50 780 Td " + b" ".join(
+            b"(" + line.encode() + b") Tj T*" for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        page_refs.append(len(objects))
+    return write_pdf(objects, page_refs)
+
+
+def make_chart_pdf(pages, points_per_page=4000, image_side=96):
+    """Build a PDF of plotted charts: thousands of path operators, an inline image and a few text labels a page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    # Pixel values above 0x80 never spell "EI", like most real image data
+    pixels = bytes(0x80 + (x * 7 + y * 13) % 0x80 for y in range(image_side) for x in range(image_side * 3))
+    page_refs = []
+    for page in range(pages):
+        parts = [b"q 0.8 g"]
+        # Grid of filled cells, then the plotted series as one long polyline
+        parts += [b"%d %d 24 12 re" % (50 + column * 25, 100 + row * 13) for row in range(40) for column in range(20)]
+        parts.append(b"f 0 0 1 RG 0.5 w 50 300 m")
+        parts += [b"%.2f %.2f l" % (50 + index * 500 / points_per_page, 300 + (index * 37 + page) % 400 / 2)
+                  for index in range(points_per_page)]
+        parts.append(b"S Q")
+        parts.append(b"q %d 0 0 %d 450 650 cm BI /W %d /H %d /BPC 8 /CS /RGB ID "
+                     % (image_side, image_side, image_side, image_side) + pixels + b" EI Q")
+        parts.append(b"BT /F1 10 Tf 12 TL 50 780 Td (Week %d attendance) Tj T*" % (page + 1))
+        parts += [b"(Section %d: %d students) Tj T*" % (label, 20 + (label * 7 + page) % 15) for label in range(10)]
+        parts.append(b"ET")
+        stream = b"\n".join(parts)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        page_refs.append(len(objects))
+    return write_pdf(objects, page_refs)
+
+
+def make_cid_pdf(pages, lines_per_page=40, fonts=4):
+    """Build a PDF like Word and Google Docs exports: every page shares a few Type0 fonts with /ToUnicode CMaps.
+
+    Each font is an Identity-H subset with a /W widths array and a
+    ToUnicode CMap of a few hundred glyphs, and each page writes its
+    lines in all of them.
+    """
+    # Printable ASCII, Latin-1 and Greek: the glyphs of a typical embedded subset
+    chars = [chr(code) for code in list(range(32, 127)) + list(range(0xA0, 0x100)) + list(range(0x391, 0x3CA))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+    ]
+    font_refs, glyph_ids = [], []
+    for font in range(fonts):
+        # Subsets number their glyphs in order of first use, so every font numbers them differently
+        order = chars[font:] + chars[:font]
+        gids = {char: gid for gid, char in enumerate(order, start=1)}
+        blocks = []
+        for start in range(0, len(order), 100):
+            block = order[start:start + 100]
+            blocks.append(b"%d beginbfchar\n" % len(block) + b"".join(
+                b"<%04X> <%04X>\n" % (gids[char], ord(char)) for char in block) + b"endbfchar\n")
+        cmap = (b"/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+                b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+                b"/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+                b"1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n" + b"".join(blocks)
+                + b"endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend")
+        data = zlib.compress(cmap)
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data) + data + b"\nendstream")
+        to_unicode = len(objects)
+        widths = b" ".join(b"%d" % (400 + gid * 37 % 300) for gid in range(1, len(order) + 1))
+        objects.append(b"<< /Type /FontDescriptor /FontName /AAAAAA+Calibri /Flags 32 /ItalicAngle 0 "
+                       b"/Ascent 750 /Descent -250 /CapHeight 632 /StemV 80 /FontBBox [-503 -250 1240 750] >>")
+        objects.append(b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /AAAAAA+Calibri "
+                       b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+                       b"/FontDescriptor %d 0 R /DW 1000 /W [1 [%s]] >>" % (len(objects), widths))
+        objects.append(b"<< /Type /Font /Subtype /Type0 /BaseFont /AAAAAA+Calibri /Encoding /Identity-H "
+                       b"/DescendantFonts [%d 0 R] /ToUnicode %d 0 R >>" % (len(objects), to_unicode))
+        font_refs.append(len(objects))
+        glyph_ids.append(gids)
+    resources = b"<< /Font << " + b" ".join(
+        b"/F%d %d 0 R" % (font + 1, ref) for font, ref in enumerate(font_refs)) + b" >> >>"
+    page_refs = []
+    for page in range(pages):
+        parts = [b"BT 12 TL 50 780 Td"]
+        for line in range(lines_per_page):
+            font = line % fonts
+            text = f"Week {page + 1} item {line}: Reading due {page % 12 + 1}/{line % 28 + 1} - caf\u00e9 \u03a3"
+            glyphs = "".join("%04X" % glyph_ids[font][char] for char in text)
+            parts.append(b"/F%d 10 Tf <%s> Tj T*" % (font + 1, glyphs.encode()))
+        parts.append(b"ET")
+        stream = b"\n".join(parts)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources " + resources + b" /Contents %d 0 R >>" % content_ref)
+        page_refs.append(len(objects))
+    return write_pdf(objects, page_refs)
+
+
+def write_pdf(objects, page_refs):
+    """Serialize numbered objects (the second one becomes the page tree) with a classic xref table."""
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_objstm_pdf(pages, lines_per_page=40, objects_per_stream=100, xref_predictor=False):
+    """Build a PDF 1.5 file like Word exports: dictionaries packed into object streams, a compressed xref stream.
+
+    Each page gets its own resources, font, font descriptor and widths
+    objects, so opening it and extracting every page reads hundreds of
+    objects out of the object streams. With xref_predictor the xref stream
+    is PNG Up-predicted (/Predictor 12), as Word and most other writers do.
+    """
+    packed = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+    ]
+    contents = []
+    page_refs = []
+    widths = b"[" + b" ".join(b"%d" % (500 + code % 7 * 40) for code in range(32, 127)) + b"]"
+    for page in range(pages):
+        lines = [f"Week {page + 1} item {line}: Reading due {page % 12 + 1}/{line % 28 + 1} at 11:59 PM"
+                 for line in range(lines_per_page)]
+        contents.append(b"BT /F1 10 Tf 12 TL 50 780 Td " + b" ".join(
+            b"(" + line.encode() + b") Tj T*" for line in lines) + b" ET")
+        first = len(packed) + 1
+        # page, resources, font, font descriptor, widths; contents are numbered after all packed objects
+        packed.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources %d 0 R "
+                      b"/Contents {content%d} >>" % (first + 1, page))
+        packed.append(b"<< /Font << /F1 %d 0 R >> /ProcSet [/PDF /Text] >>" % (first + 2))
+        packed.append(b"<< /Type /Font /Subtype /TrueType /BaseFont /Calibri /FirstChar 32 /LastChar 126 "
+                      b"/Widths %d 0 R /FontDescriptor %d 0 R /Encoding /WinAnsiEncoding >>" % (first + 4, first + 3))
+        packed.append(b"<< /Type /FontDescriptor /FontName /Calibri /Flags 32 /ItalicAngle 0 /Ascent 750 "
+                      b"/Descent -250 /CapHeight 632 /StemV 80 /FontBBox [-503 -250 1240 750] >>")
+        packed.append(widths)
+        page_refs.append(first)
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    packed[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    content_start = len(packed) + 1
+    for page, ref in enumerate(page_refs):
+        packed[ref - 1] = packed[ref - 1].replace(b"{content%d}" % page, b"%d 0 R" % (content_start + page))
+
+    out = bytearray(b"%PDF-1.5\n")
+    # xref entries by object number: (type, field 2, field 3)
+    entries = {0: (0, 0, 65535)}
+
+    def write(number, body):
+        entries[number] = (1, len(out), 0)
+        out.extend(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def stream(dictionary, data):
+        return b"<< " + dictionary + b" /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+
+    for page, data in enumerate(contents):
+        write(content_start + page, stream(b"", data))
+    number = content_start + len(contents)
+    for start in range(0, len(packed), objects_per_stream):
+        chunk = packed[start:start + objects_per_stream]
+        header, body = [], bytearray()
+        for index, obj in enumerate(chunk):
+            header.append(b"%d %d" % (start + index + 1, len(body)))
+            entries[start + index + 1] = (2, number, index)
+            body.extend(obj + b"\n")
+        header = b" ".join(header) + b"\n"
+        data = zlib.compress(header + bytes(body))
+        write(number, stream(b"/Type /ObjStm /N %d /First %d /Filter /FlateDecode" % (len(chunk), len(header)),
+                             data))
+        number += 1
+
+    xref_number = number
+    entries[xref_number] = (1, len(out), 0)
+    rows = b"".join(bytes([kind]) + field.to_bytes(4, 'big') + extra.to_bytes(2, 'big')
+                    for kind, field, extra in (entries[n] for n in range(xref_number + 1)))
+    parms = b""
+    if xref_predictor:
+        # Each 7-byte entry becomes a row: filter type 2 (Up), then its difference from the entry above
+        parms = b" /DecodeParms << /Columns 7 /Predictor 12 >>"
+        prev = bytes(7)
+        predicted = bytearray()
+        for start in range(0, len(rows), 7):
+            row = rows[start:start + 7]
+            predicted += b"\x02" + bytes((byte - up) % 256 for byte, up in zip(row, prev))
+            prev = row
+        rows = bytes(predicted)
+    xref = len(out)
+    out.extend(b"%d 0 obj\n" % xref_number + stream(
+        b"/Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Filter /FlateDecode" % (xref_number + 1) + parms,
+        zlib.compress(rows)) + b"\nendobj\n")
+    out.extend(b"startxref\n%d\n%%%%EOF\n" % xref)
+    return bytes(out)
+
+
+def sequential(pdf_data):
+    # What lambda_handler used to do
+    pdf_reader = PyPDF2.PdfReader(lambda_function.BytesIO(pdf_data))
+    text_content = ""
+    for page in pdf_reader.pages:
+        text_content += page.extract_text() + "\n"
+    return text_content
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time PDF text extraction for lambda_handler")
+    parser.add_argument('--pages', type=int, nargs='*', default=[1, 10, 100])
+    parser.add_argument('--workers', type=int, default=lambda_function.PDF_WORKERS)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.workers} workers")
+    for pages in args.pages:
+        pdf_data = make_text_pdf(pages)
+        start = time.perf_counter()
+        expected = sequential(pdf_data)
+        before = time.perf_counter() - start
+        start = time.perf_counter()
+        text = lambda_function.extract_pdf_text(pdf_data, max_pages=pages, workers=args.workers)
+        after = time.perf_counter() - start
+        assert text == expected
+        print(f"{pages:4d} pages: sequential += {before * 1000:8.1f} ms, extract_pdf_text {after * 1000:8.1f} ms "
+              f"({before / after:4.2f}x)")
@@ -0,0 +1,129 @@
+import argparse
+import math
+import random
+import re
+import time
+import zlib
+from io import BytesIO
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_objstm_pdf
+from PyPDF2._utils import ord_, paeth_predictor
+from PyPDF2.errors import PdfReadError
+from PyPDF2.filters import FlateDecode, _numpy
+
+
+def legacy_decode_png_prediction(data, columns, rowlength):
+    """What FlateDecode._decode_png_prediction did before: a Python loop per byte, % 256 and a tuple per row."""
+    output = BytesIO()
+    # PNG prediction can vary from row to row
+    if len(data) % rowlength != 0:
+        raise PdfReadError("Image data is not rectangular")
+    prev_rowdata = (0,) * rowlength
+    for row in range(len(data) // rowlength):
+        rowdata = [
+            ord_(x) for x in data[(row * rowlength) : ((row + 1) * rowlength)]
+        ]
+        filter_byte = rowdata[0]
+
+        if filter_byte == 0:
+            pass
+        elif filter_byte == 1:
+            for i in range(2, rowlength):
+                rowdata[i] = (rowdata[i] + rowdata[i - 1]) % 256
+        elif filter_byte == 2:
+            for i in range(1, rowlength):
+                rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
+        elif filter_byte == 3:
+            for i in range(1, rowlength):
+                left = rowdata[i - 1] if i > 1 else 0
+                floor = math.floor(left + prev_rowdata[i]) / 2
+                rowdata[i] = (rowdata[i] + int(floor)) % 256
+        elif filter_byte == 4:
+            for i in range(1, rowlength):
+                left = rowdata[i - 1] if i > 1 else 0
+                up = prev_rowdata[i]
+                up_left = prev_rowdata[i - 1] if i > 1 else 0
+                paeth = paeth_predictor(left, up, up_left)
+                rowdata[i] = (rowdata[i] + paeth) % 256
+        else:
+            # unsupported PNG filter
+            raise PdfReadError(f"Unsupported PNG filter {filter_byte!r}")
+        prev_rowdata = tuple(rowdata)
+        output.write(bytearray(rowdata[1:]))
+    return output.getvalue()
+
+
+def png_predict(raw, width, filters):
+    """PNG-predict `raw` rows of `width` bytes, row n with filters[n % len(filters)], the way PyPDF2 undoes it."""
+    out = bytearray()
+    prev = bytes(width)
+    for number, start in enumerate(range(0, len(raw), width)):
+        row = raw[start:start + width]
+        filter_byte = filters[number % len(filters)]
+        predicted = bytearray([filter_byte])
+        for i, byte in enumerate(row):
+            left = row[i - 1] if i else 0
+            up_left = prev[i - 1] if i else 0
+            guess = (0, left, prev[i], (left + prev[i]) // 2, paeth_predictor(left, prev[i], up_left))[filter_byte]
+            predicted.append((byte - guess) % 256)
+        out += predicted
+        prev = row
+    return bytes(out)
+
+
+def photo(width, height, seed=0):
+    """Smooth gradients with some noise, like a scanned page or a photo: what predictors are used on."""
+    rng = random.Random(seed)
+    return bytes((x // 3 + y // 2 + (x % 3) * 40 + rng.randrange(8)) % 256
+                 for y in range(height) for x in range(width))
+
+
+def xref_stream_data(pdf_data):
+    """The inflated, still predicted, data of the xref stream of a make_objstm_pdf file."""
+    match = re.search(rb"/Type /XRef .*?/Length \d+ >>\nstream\n(.*)\nendstream", pdf_data, re.S)
+    return zlib.decompress(match.group(1))
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PNG predictor decoding: per-byte loop vs bytes vs NumPy")
+    parser.add_argument('--xref-pages', type=int, default=2000)
+    parser.add_argument('--image-size', type=int, nargs=2, default=[1200, 900], metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    np = _numpy()
+    print("NumPy", np.__version__ if np is not None else "not installed")
+    width, height = args.image_size
+    rgb = photo(width * 3, height)
+    gray = photo(width, height, seed=1)
+    cases = [
+        (f"xref stream, {args.xref_pages} pages (Up)", xref_stream_data(make_objstm_pdf(
+            args.xref_pages, lines_per_page=1, xref_predictor=True)), 7),
+        (f"{width}x{height} RGB image, Up", png_predict(rgb, width * 3, [2]), width * 3),
+        (f"{width}x{height} RGB image, Sub/Up", png_predict(rgb, width * 3, [1, 2, 2]), width * 3),
+        (f"{width}x{height} gray image, Paeth", png_predict(gray, width, [4]), width),
+        (f"{width}x{height} gray image, Average", png_predict(gray, width, [3]), width),
+    ]
+    for label, data, columns in cases:
+        rowlength = columns + 1
+        before, expected = best_of(lambda: legacy_decode_png_prediction(data, columns, rowlength), args.repeat)
+        line = f"{label:34s} {len(data) / 1024:7.0f} KB  loop {before:8.1f} ms"
+        after, result = best_of(lambda: FlateDecode._decode_png_prediction_bytes(data, rowlength), args.repeat)
+        assert result == expected
+        line += f"  bytes {after:7.1f} ms ({before / after:5.1f}x)"
+        if np is not None:
+            after, result = best_of(lambda: FlateDecode._decode_png_prediction_numpy(np, data, rowlength),
+                                    args.repeat)
+            assert result == expected
+            line += f"  numpy {after:7.1f} ms ({before / after:6.1f}x)"
+        print(line)
@@ -29,7 +29,8 @@ def deploy_lambda():
                 "logs:CreateLogStream", 
                 "logs:PutLogEvents",
                 "textract:AnalyzeDocument",
-                "bedrock:InvokeModel"
+                "bedrock:InvokeModel",
+                "s3:GetObject"
             ],
             "Resource": "*"
         }]
@@ -1,44 +1,55 @@
 import boto3
 import zipfile
 import os
-import subprocess
-import shutil
 from dotenv import load_dotenv
 
+PACKAGE_EXCLUDE_DIRS = {'__pycache__', 'tests'}
+# Settings the Lambda must share with the web server, copied from the same .env
+SHARED_SETTINGS = {'EXTRACTION_UTC_OFFSET_HOURS': '-5'}
+
+def sync_shared_settings(lambda_client):
+    """Set SHARED_SETTINGS on the function, keeping the rest of its environment."""
+    # A configuration update is refused while the code update is still in progress
+    lambda_client.get_waiter('function_updated').wait(FunctionName='SnapPlannerFunction')
+    configuration = lambda_client.get_function_configuration(FunctionName='SnapPlannerFunction')
+    variables = configuration.get('Environment', {}).get('Variables', {})
+    variables.update({name: os.getenv(name, default) for name, default in SHARED_SETTINGS.items()})
+    lambda_client.update_function_configuration(FunctionName='SnapPlannerFunction',
+                                                Environment={'Variables': variables})
+
 def deploy_lambda_with_deps():
     load_dotenv()
     lambda_client = boto3.client('lambda', region_name='us-east-1')
     
-    # Install dependencies to a temp directory
-    if os.path.exists('lambda_package'):
-        shutil.rmtree('lambda_package')
-    os.makedirs('lambda_package')
+    # Ship the vendored copy in SnapPlannerUI/lambda_package (it carries our PyPDF2 patches)
+    # rather than a fresh pip install; metadata and bytecode only add to the unzip at cold start
+    package_dir = 'SnapPlannerUI/lambda_package'
 
-    subprocess.run(['pip', 'install', 'PyPDF2==3.0.1', '--no-deps', '-t', 'lambda_package'])
-    subprocess.run(['pip', 'install', 'typing_extensions', '-t', 'lambda_package'])
-
-    
     # Create deployment package
-    with zipfile.ZipFile('lambda_deployment.zip', 'w') as zip_file:
+    with zipfile.ZipFile('lambda_deployment.zip', 'w', zipfile.ZIP_DEFLATED) as zip_file:
         # Add the lambda function
         zip_file.write('LambdaCode/lambda_function.py', 'lambda_function.py')
-        
+
         # Add dependencies
-        for root, dirs, files in os.walk('lambda_package'):
+        for root, dirs, files in os.walk(package_dir):
+            dirs[:] = [d for d in dirs if d not in PACKAGE_EXCLUDE_DIRS and not d.endswith('.dist-info')]
             for file in files:
+                if file.endswith(('.pyc', '.typed')):
+                    continue
                 file_path = os.path.join(root, file)
-                arc_name = os.path.relpath(file_path, 'lambda_package')
+                arc_name = os.path.relpath(file_path, package_dir)
                 zip_file.write(file_path, arc_name)
-    
+    print(f"Deployment package: {os.path.getsize('lambda_deployment.zip') / 1024:.0f} KB")
+
     # Update Lambda function
     with open('lambda_deployment.zip', 'rb') as zip_file:
         lambda_client.update_function_code(
             FunctionName='SnapPlannerFunction',
             ZipFile=zip_file.read()
         )
+    sync_shared_settings(lambda_client)
     
     # Clean up
-    shutil.rmtree('lambda_package')
     os.remove('lambda_deployment.zip')
     print("Lambda function updated with PyPDF2 dependency")
 
@@ -1,47 +1,116 @@
 import json
 import boto3
 import base64
-from io import StringIO, BytesIO
-import csv
+from io import BytesIO
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-import PyPDF2
+
+# Pages of a PDF that are read at most; anything past this is ignored
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', '100'))
+# Processes used to extract PDF text (Lambda gives one vCPU per 1,769 MB of memory)
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', str(os.cpu_count() or 1)))
+# Below this many pages forking costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 8
+
+BEDROCK_MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+BEDROCK_MAX_TOKENS = 2500
+# Characters of document text sent per Bedrock call; longer documents are split
+BEDROCK_CHUNK_CHARS = int(os.environ.get('BEDROCK_CHUNK_CHARS', '3000'))
+# A chunk whose answer hits max_tokens is halved and retried down to this size
+BEDROCK_MIN_CHUNK_CHARS = 500
+# Bedrock calls in flight at once for one document
+BEDROCK_PARALLELISM = int(os.environ.get('BEDROCK_PARALLELISM', '4'))
+
+# Textract layout block types and the short tags they get in the prompt
+LAYOUT_TAGS = {
+    'LAYOUT_TITLE': 'TITLE',
+    'LAYOUT_SECTION_HEADER': 'SECTION',
+    'LAYOUT_HEADER': 'HEADER',
+    'LAYOUT_FOOTER': 'FOOTER',
+    'LAYOUT_PAGE_NUMBER': 'PAGE_NUMBER',
+    'LAYOUT_TEXT': 'TEXT',
+    'LAYOUT_LIST': 'LIST',
+    'LAYOUT_TABLE': 'TABLE',
+    'LAYOUT_FIGURE': 'FIGURE',
+    'LAYOUT_KEY_VALUE': 'KEY_VALUE',
+}
+# Groups dropped first when a layout does not fit the token budget
+LAYOUT_LOW_PRIORITY = {'HEADER', 'FOOTER', 'PAGE_NUMBER'}
+# Coordinates are written as whole percentages of the page
+LAYOUT_COORD_SCALE = 100
+# Also list each line's words with their own coordinates
+LAYOUT_INCLUDE_WORDS = os.environ.get('LAYOUT_INCLUDE_WORDS', 'false').lower() == 'true'
+# Estimated prompt tokens an image's layout may use in total
+LAYOUT_TOKEN_BUDGET = int(os.environ.get('LAYOUT_TOKEN_BUDGET', '8000'))
+# Import PyPDF2 during init rather than on the first PDF request; worth it with
+# provisioned concurrency, where init runs before any traffic arrives
+PRELOAD_PDF = os.environ.get('PRELOAD_PDF', 'false').lower() == 'true'
+# Parsed font /ToUnicode CMaps a warm container keeps across requests; uploads
+# exported from the same tools share fonts. 0 turns the cache off
+TO_UNICODE_CACHE_SIZE = int(os.environ.get('TO_UNICODE_CACHE_SIZE', '256'))
+# UTC offset of the "current date" the prompt gives (EST). The web server's extraction
+# cache keys on the day in this zone from the same setting; deploy_lambda_with_deps.py sets it
+EXTRACTION_UTC_OFFSET_HOURS = float(os.environ.get('EXTRACTION_UTC_OFFSET_HOURS', '-5'))
+
+# Clients are created once per container and reused by every invocation it serves
+textract = boto3.client('textract', region_name='us-east-1')
+bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+s3 = boto3.client('s3', region_name='us-east-1')
+
+if PRELOAD_PDF:
+    import PyPDF2  # noqa: F401
 
 def lambda_handler(event, context):
-    # Initialize AWS clients
-    textract = boto3.client('textract', region_name='us-east-1')
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-    
+    # Scheduled warm-up pings ({"warmup": true}) only keep the container alive
+    if event.get('warmup'):
+        return {'statusCode': 200, 'body': json.dumps({'warm': True, 'pdf_loaded': 'PyPDF2' in sys.modules})}
 
     body = event['body']
+    # Prompts from an earlier prompts_only call, sent back by a caller that could not
+    # reach Bedrock itself; the document is not read or OCR'd a second time
+    prompts = body.get('prompts')
+    if prompts:
+        chunks = [[chunk] for chunk in prompts['chunks']]
+        print(f"Sending {len(chunks)} chunk(s) to Bedrock")
+        return {
+            'statusCode': 200,
+            'body': json.dumps(extract_events(bedrock, prompts['system'], prompts['header'], chunks))
+        }
+
+    # Uploads staged in S3 arrive as {"s3": {"bucket", "key"}, "type"}, others base64 in body[type]
+    staged = body.get('s3')
+    if staged:
+        type = body['type']
     if 'image' in body:
         type = 'image'
     if 'pdf' in body:
         type = 'pdf'
-        
-    # Get image from API request
-    req_data = base64.b64decode(body[type])
     
-    # Extract text based on file type
+    # Extract text based on file type, split on page or layout line boundaries
     if type == 'pdf':
         # For PDFs, extract raw text using PyPDF2
-        pdf_reader = PyPDF2.PdfReader(BytesIO(req_data))
-        text_content = ""
-        for page in pdf_reader.pages:
-            text_content += page.extract_text() + "\n"
-        csv_data = text_content
+        if staged:
+            req_data = s3.get_object(Bucket=staged['bucket'], Key=staged['key'])['Body'].read()
+        else:
+            req_data = base64.b64decode(body[type])
+        header = ""
+        segments = [text + "\n" for text in extract_pdf_pages(req_data)]
     else:
-        # For images, use analyze_document with layout
+        # For images, use analyze_document with layout; Textract reads staged images itself
+        if staged:
+            document = {'S3Object': {'Bucket': staged['bucket'], 'Name': staged['key']}}
+        else:
+            document = {'Bytes': base64.b64decode(body[type])}
         response = textract.analyze_document(
-            Document={'Bytes': req_data},
+            Document=document,
             FeatureTypes=['LAYOUT']
         )
-        # Convert to CSV
-        csv_data = convert_to_csv(response['Blocks'])
+        header, segments = encode_layout(response['Blocks'])
     
-    # Send to Claude Haiku
-    prompt = f"{csv_data}"
-    
-    est = timezone(timedelta(hours=-5))
+    est = timezone(timedelta(hours=EXTRACTION_UTC_OFFSET_HOURS))
     current_date = datetime.now(est).strftime('%Y-%m-%dT%H:%M:%S%z')
     debugLog = current_date
     system_prompt = f'''You are a acting as a text processor that extracts the relavant dates from emails and other sources and returns them in a consistent format. No response should be provided other than the formatted data.
@@ -61,11 +130,37 @@ The current date is {current_date}
 Make sure to find ALL events and important deadlines.
 '''
     
+    chunks = chunk_segments(segments)
+    
+    # Lambda's Python runtime cannot stream a response, so a caller that wants
+    # events as they are generated gets the prompts and streams Bedrock itself
+    if body.get('prompts_only'):
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'system': system_prompt,
+                'header': header,
+                'chunks': ["".join(chunk) for chunk in chunks]
+            }),
+            'debug': debugLog
+        }
+    
+    # Send each chunk to Claude Haiku, several at a time
+    print(f"Sending {len(chunks)} chunk(s) to Bedrock")
+    events = extract_events(bedrock, system_prompt, header, chunks)
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps(events),
+        'debug': debugLog
+    }
+
+def invoke_bedrock(bedrock, system_prompt, prompt):
     bedrock_response = bedrock.invoke_model(
-        modelId='anthropic.claude-3-haiku-20240307-v1:0',
+        modelId=BEDROCK_MODEL_ID,
         body=json.dumps({
             'anthropic_version': 'bedrock-2023-05-31',
-            'max_tokens': 2500,
+            'max_tokens': BEDROCK_MAX_TOKENS,
             'temperature': 0.5,
             'system': system_prompt,
             # 'tools': [{
@@ -96,31 +191,281 @@ Make sure to find ALL events and important deadlines.
             'messages': [{'role': 'user', 'content': prompt}]
         })
     )
-    
-    result = json.loads(bedrock_response['body'].read())
-    
-    return {
-        'statusCode': 200,
-        'body': result['content'][0]['text'],
-        'debug': debugLog
-    }
+    return json.loads(bedrock_response['body'].read())
 
-def convert_to_csv(blocks):
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Type', 'Text', 'Confidence', 'Left', 'Top', 'Width', 'Height'])
-    
+def _extract_page_range(pdf_data, start, stop, conn):
+    """Child process body: extract pages [start, stop) and send their texts back."""
+    import PyPDF2
+    try:
+        pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+        conn.send((True, [pdf_reader.pages[i].extract_text() for i in range(start, stop)]))
+    except Exception as e:
+        conn.send((False, repr(e)))
+    finally:
+        conn.close()
+
+def extract_pdf_pages(pdf_data, max_pages=PDF_MAX_PAGES, workers=PDF_WORKERS):
+    """Return the text of each page, in order, up to max_pages."""
+    # Imported here so image requests never pay for loading PyPDF2
+    import PyPDF2
+    from PyPDF2 import _cmap
+    _cmap.TO_UNICODE_CACHE_SIZE = TO_UNICODE_CACHE_SIZE
+    pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    page_count = min(len(pdf_reader.pages), max_pages)
+    if page_count < len(pdf_reader.pages):
+        print(f"PDF has {len(pdf_reader.pages)} pages, only reading the first {page_count}")
+
+    workers = min(workers, page_count // PDF_PARALLEL_MIN_PAGES)
+    if workers <= 1:
+        page_texts = [pdf_reader.pages[i].extract_text() for i in range(page_count)]
+    else:
+        # Shard contiguous page ranges across processes. Lambda has no /dev/shm,
+        # so multiprocessing.Pool and Queue fail there; Process + Pipe work.
+        shard_size = -(-page_count // workers)
+        shards = []
+        try:
+            for start in range(0, page_count, shard_size):
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_extract_page_range,
+                    args=(pdf_data, start, min(start + shard_size, page_count), sender)
+                )
+                shards.append((process, receiver))
+                try:
+                    process.start()
+                finally:
+                    sender.close()
+
+            page_texts = []
+            for process, receiver in shards:
+                try:
+                    ok, result = receiver.recv()
+                except EOFError:
+                    # The child died before sending anything back
+                    process.join()
+                    ok, result = False, f"worker exited with code {process.exitcode}"
+                if not ok:
+                    raise RuntimeError(f"PDF text extraction failed: {result}")
+                page_texts.extend(result)
+        finally:
+            # A warm container keeps running after a failed request, so leave no
+            # children behind blocked on pipes nobody reads any more
+            for process, receiver in shards:
+                receiver.close()
+                if process.pid is not None:
+                    if process.is_alive():
+                        process.terminate()
+                    process.join()
+
+    return page_texts
+
+def extract_pdf_text(pdf_data, max_pages=PDF_MAX_PAGES, workers=PDF_WORKERS):
+    # Join once, in page order, instead of growing a string page by page
+    return "".join(text + "\n" for text in extract_pdf_pages(pdf_data, max_pages, workers))
+
+def estimate_tokens(text):
+    # Claude averages about 4 characters a token on English text
+    return len(text) // 4
+
+def _children(block):
+    return [child_id for relationship in block.get('Relationships', [])
+            if relationship['Type'] == 'CHILD' for child_id in relationship['Ids']]
+
+def _position(block):
+    bbox = block.get('Geometry', {}).get('BoundingBox', {})
+    return round(bbox.get('Left', 0) * LAYOUT_COORD_SCALE), round(bbox.get('Top', 0) * LAYOUT_COORD_SCALE)
+
+def layout_groups(blocks):
+    """Group LINE blocks under their Textract layout block, in reading order.
+
+    Returns a list of (tag, lines) pairs and a dict mapping each line's Id
+    to its WORD blocks. Layout blocks already come in reading order; lines
+    outside any layout block are sorted top to bottom, left to right and
+    appended as one TEXT group.
+    """
+    by_id = {block['Id']: block for block in blocks}
+    layout_ids = {block['Id'] for block in blocks if block['BlockType'] in LAYOUT_TAGS}
+    nested = {child_id for block in blocks if block['Id'] in layout_ids
+              for child_id in _children(block) if child_id in layout_ids}
+
+    def lines_under(block):
+        lines = []
+        for child_id in _children(block):
+            child = by_id.get(child_id)
+            if child is None:
+                continue
+            if child['BlockType'] == 'LINE':
+                lines.append(child)
+            elif child_id in layout_ids:
+                # LAYOUT_LIST items are LAYOUT_TEXT blocks of their own
+                lines.extend(lines_under(child))
+        return lines
+
+    groups, grouped = [], set()
     for block in blocks:
-        if block['BlockType'] in ['LINE', 'WORD']:
-            bbox = block.get('Geometry', {}).get('BoundingBox', {})
-            writer.writerow([
-                block['BlockType'],
-                block.get('Text', ''),
-                block.get('Confidence', 0),
-                bbox.get('Left', 0),
-                bbox.get('Top', 0),
-                bbox.get('Width', 0),
-                bbox.get('Height', 0)
-            ])
-    
-    return output.getvalue()
\ No newline at end of file
+        if block['Id'] in layout_ids and block['Id'] not in nested:
+            lines = [line for line in lines_under(block) if line['Id'] not in grouped]
+            grouped.update(line['Id'] for line in lines)
+            if lines:
+                groups.append((LAYOUT_TAGS[block['BlockType']], lines))
+    loose = [block for block in blocks if block['BlockType'] == 'LINE' and block['Id'] not in grouped]
+    if loose:
+        groups.append(('TEXT', sorted(loose, key=lambda line: _position(line)[::-1])))
+
+    words = {line['Id']: [by_id[child_id] for child_id in _children(line)
+                          if child_id in by_id and by_id[child_id]['BlockType'] == 'WORD']
+             for _, lines in groups for line in lines}
+    return groups, words
+
+def _encode_groups(groups, words, include_words, coordinates):
+    segments = []
+    for tag, lines in groups:
+        rows = [f"[{tag}]\n"]
+        for line in lines:
+            if coordinates:
+                left, top = _position(line)
+                rows.append(f"{left} {top}|{line.get('Text', '')}\n")
+            else:
+                rows.append(f"{line.get('Text', '')}\n")
+            if include_words:
+                for word in words[line['Id']]:
+                    left, top = _position(word)
+                    rows.append(f" {left} {top}|{word.get('Text', '')}\n")
+        segments.append("".join(rows))
+    return segments
+
+def encode_layout(blocks, include_words=LAYOUT_INCLUDE_WORDS, token_budget=LAYOUT_TOKEN_BUDGET):
+    """Return a compact prompt header and one text segment per layout group.
+
+    Each group is a [TAG] line followed by its lines as "x y|text", with the
+    line's top-left corner in whole percent of the page. Confidence and box
+    sizes are left out. If the estimate exceeds token_budget, words, then
+    coordinates, then headers/footers/page numbers are dropped, and finally
+    the trailing groups are cut.
+    """
+    groups, line_words = layout_groups(blocks)
+    attempts = [(include_words, True, groups)]
+    if include_words:
+        attempts.append((False, True, groups))
+    attempts.append((False, False, groups))
+    attempts.append((False, False, [group for group in groups if group[0] not in LAYOUT_LOW_PRIORITY]))
+
+    for words, coordinates, kept in attempts:
+        if coordinates:
+            header = ("Document layout from OCR. Each [TYPE] starts a layout group; each line is "
+                      "\"x y|text\" with x, y the line's top-left corner in percent of the page.\n")
+            if words:
+                header += "Indented rows after a line are its words in the same format.\n"
+        else:
+            header = "Document text from OCR, grouped by layout. Each [TYPE] starts a layout group.\n"
+        segments = _encode_groups(kept, line_words, words, coordinates)
+        tokens = estimate_tokens(header) + sum(estimate_tokens(segment) for segment in segments)
+        if tokens <= token_budget:
+            return header, segments
+
+    kept_segments, tokens = [], estimate_tokens(header)
+    for segment in segments:
+        if tokens + estimate_tokens(segment) > token_budget:
+            break
+        kept_segments.append(segment)
+        tokens += estimate_tokens(segment)
+    print(f"Layout exceeds {token_budget} tokens, keeping {len(kept_segments)} of {len(segments)} groups")
+    return header, kept_segments
+
+def _split_lines(text, max_chars):
+    """Split text on line breaks into pieces of at most max_chars (a longer line is cut)."""
+    pieces, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_segments(segments, max_chars=BEDROCK_CHUNK_CHARS):
+    """Pack whole segments (pages, layout lines) into chunks of at most max_chars.
+
+    Each chunk is a list of segments; a segment longer than max_chars is
+    split on line breaks first.
+    """
+    chunks, current, size = [], [], 0
+    for segment in segments:
+        for piece in ([segment] if len(segment) <= max_chars else _split_lines(segment, max_chars)):
+            if current and size + len(piece) > max_chars:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+def _halve(chunk):
+    """Split a chunk into two smaller ones, or return None if it is a single line."""
+    if len(chunk) == 1:
+        chunk = _split_lines(chunk[0], max(len(chunk[0]) // 2, 1))
+        if len(chunk) == 1:
+            return None
+    middle = len(chunk) // 2
+    return [chunk[:middle], chunk[middle:]]
+
+def parse_events(text):
+    """Parse the model's JSON array, keeping the complete events if it was cut off."""
+    start = text.find('[')
+    if start == -1:
+        return []
+    try:
+        events = json.loads(text[start:text.rfind(']') + 1])
+    except json.JSONDecodeError:
+        # Handle unterminated string/object from token limit
+        last_brace = text.rfind('}')
+        try:
+            events = json.loads(text[start:last_brace + 1] + ']')
+        except json.JSONDecodeError:
+            print(f"Could not parse Bedrock output: {text[:200]!r}")
+            return []
+    return events if isinstance(events, list) else []
+
+def extract_chunk_events(bedrock, system_prompt, header, chunk):
+    """Extract one chunk's events, halving the chunk whenever the answer runs out of tokens."""
+    prompt = header + "".join(chunk)
+    result = invoke_bedrock(bedrock, system_prompt, prompt)
+    text = result['content'][0]['text']
+    if result.get('stop_reason') == 'max_tokens':
+        halves = _halve(chunk) if len(prompt) - len(header) > BEDROCK_MIN_CHUNK_CHARS else None
+        if halves:
+            print(f"Bedrock output truncated for a {len(prompt)} character chunk, splitting it")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                event_lists = list(executor.map(
+                    lambda half: extract_chunk_events(bedrock, system_prompt, header, half), halves))
+            return event_lists[0] + event_lists[1]
+        print(f"Bedrock output truncated for a {len(prompt)} character chunk, keeping complete events")
+    return parse_events(text)
+
+def merge_events(event_lists):
+    """Merge events from several chunks, dropping repeats of the same title and start."""
+    merged = {}
+    for events in event_lists:
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            key = (str(event.get('eventTitle', '')).strip().lower(), event.get('startDate'))
+            if key not in merged:
+                merged[key] = dict(event)
+            elif isinstance(event.get('tags'), list) and isinstance(merged[key].get('tags'), list):
+                merged[key]['tags'] = merged[key]['tags'] + [tag for tag in event['tags'] if tag not in merged[key]['tags']]
+    return list(merged.values())
+
+def extract_events(bedrock, system_prompt, header, chunks, parallelism=BEDROCK_PARALLELISM):
+    """Run the chunks through Bedrock concurrently and merge their events in document order."""
+    if len(chunks) == 1:
+        return merge_events([extract_chunk_events(bedrock, system_prompt, header, chunks[0])])
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(chunks)))) as executor:
+        event_lists = list(executor.map(
+            lambda chunk: extract_chunk_events(bedrock, system_prompt, header, chunk), chunks))
+    return merge_events(event_lists)
@@ -0,0 +1,129 @@
+import glob
+import logging
+import random
+
+# bench_content_stream puts the bundled PyPDF2 on the path and keeps the old byte-by-byte parser
+from bench_content_stream import LegacyContentStream, SYSTEM_PDFS, sample_contents, stream_object
+from PyPDF2.generic import ContentStream, NullObject
+from PyPDF2.generic._data_structures import _PATH_OPERATORS
+
+# Pieces the random streams are assembled from: every token kind, plus the malformed
+# and borderline spellings where a bulk lexer could disagree with the old parser
+TOKENS = [
+    b"BT", b"ET", b"Tf", b"Td", b"TJ", b"Tj", b"'", b'"', b"T*", b"cm", b"re", b"f", b"RG", b"q", b"Q",
+    b"true", b"false", b"null", b"BDC", b"EMC", b"Do",
+    b"m", b"l", b"c", b"h", b"S", b"f*", b"B*", b"W", b"n", b"reX", b"1 2 m", b"0 0 10 10 re", b"1 2-3 l",
+    b"/F1", b"/Span", b"/A#20B", b"/caf\xc3\xa9", b"/\xe9", b"/", b"/a\x00b",
+    b"0", b"12", b"-3", b"+4", b"1.5", b"-.25", b"5.", b".", b"-", b"+-1", b"1,5", b"1.2.3", b"007", b"1e5",
+    b"1 0 R", b"12 0 R ", b"3 0 RG",
+    b"(Week 1)", b"()", b"(a\\)b)", b"(nested (parens))", b"(\\101\\1012\\7)", b"(\\n\\r\\t\\b\\f\\c)",
+    b"(\\q)", b"(line\\\nbreak)", b"(line\\\r\nbreak)", b"(\\\\)", b"(\\(\\))", b"(\\777)", b"(\xfe\xff\x00A)",
+    b"<41424>", b"<>", b"< 41 42 >", b"<4G>", b"<<>>", b"<< /MCID 0 >>", b"<< /A [1 2] /B (x) >>",
+    b"[]", b"[(A) -250 (B)]", b"[ 1 [2 3] /N ]", b"[(a\\)b) 5]", b"[<4142> 3]", b"[true]", b"[1 0 R]",
+    b"[(x)", b"[\x00]", b"[\x0c1]",
+    b"% comment\n", b"%\r", b"BI /W 1 /H 1 /BPC 8 /CS /G ID \x80 EI Q",
+    b"{", b"}", b"]", b">", b")", b"\x0c", b"\x0b", b"\xff",
+]
+SEPARATORS = [b" ", b"\n", b"\r\n", b"\t", b"\x00", b"", b"  "]
+
+
+def random_stream(rng, length):
+    parts = []
+    for _ in range(length):
+        parts.append(rng.choice(TOKENS))
+        parts.append(rng.choice(SEPARATORS))
+    data = b"".join(parts)
+    # The old parser never returns from a comment that runs into the end of the stream
+    if b"%" in data[data.rfind(b"\n") + 1:] or b"%" in data[data.rfind(b"\r") + 1:]:
+        data += b"\n"
+    return data
+
+
+def same(a, b):
+    """Equal values of the same types all the way down (Decimal 1.0 == int 1, so == alone is not enough)."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, NullObject):
+        # NullObject has no __eq__, so two of them are only ever "is"-equal
+        return True
+    if str(a) != str(b):
+        # FloatObject("1.50") == FloatObject("1.5"), but they write out differently
+        return False
+    return a == b and vars(a) == vars(b) if hasattr(a, '__dict__') else a == b
+
+
+class Warnings(logging.Handler):
+    """Collects PyPDF2's warnings, so a parser that warns twice (or not at all) is caught too."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def capture(read):
+    warnings = Warnings()
+    logger = logging.getLogger('PyPDF2')
+    logger.addHandler(warnings)
+    logger.propagate = False
+    try:
+        return 'ok', read(), warnings.messages
+    except Exception as e:
+        return 'error', (type(e), str(e)), warnings.messages
+    finally:
+        logger.removeHandler(warnings)
+        logger.propagate = True
+
+
+def parse(stream_class, data, forced_encoding):
+    return capture(lambda: stream_class(stream_object(data), None, forced_encoding).operations)
+
+
+def check(data, forced_encoding="bytes"):
+    expected = parse(LegacyContentStream, data, forced_encoding)
+    result = parse(ContentStream, data, forced_encoding)
+    assert result[0] == expected[0] and same(result[1], expected[1]) and result[2] == expected[2], \
+        (data, expected, result)
+
+
+def check_skip_graphics(data):
+    """iter_operations(skip_graphics=True) is the full parse without paths and inline images."""
+    expected = parse(ContentStream, data, "bytes")
+    if expected[0] == 'ok':
+        expected = ('ok', [(operands, operator) for operands, operator in expected[1]
+                           if operator not in _PATH_OPERATORS and operator != b"INLINE IMAGE"], expected[2])
+    result = capture(lambda: list(ContentStream.iter_operations(stream_object(data), None, "bytes",
+                                                                skip_graphics=True)))
+    assert result[0] == expected[0] and same(result[1], expected[1]) and result[2] == expected[2], \
+        (data, expected, result)
+
+
+def test_random_streams(count=20000, seed=0):
+    rng = random.Random(seed)
+    for number in range(count):
+        # Alternate the encodings PyPDF2 passes: _extract_text's "bytes", none, and a font's char map
+        forced_encoding = ("bytes", None, {65: "x"})[number % 3]
+        data = random_stream(rng, rng.randint(1, 40))
+        check(data, forced_encoding)
+        check_skip_graphics(data)
+
+
+def test_page_contents():
+    paths = sorted(glob.glob(SYSTEM_PDFS, recursive=True))
+    for name, contents in sample_contents(paths).items():
+        for data in contents:
+            check(data)
+            check(data, None)
+            check_skip_graphics(data)
+
+
+if __name__ == "__main__":
+    test_random_streams()
+    test_page_contents()
+    print("ContentStream matches the byte-by-byte parser, with and without skip_graphics")
@@ -1,11 +1,30 @@
+import argparse
 import boto3
 import json
 import base64
 import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
 from dotenv import load_dotenv
 from PIL import Image
 from io import BytesIO
 
+# The deployment package root, as deploy_lambda_with_deps.py lays it out
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SnapPlannerUI', 'lambda_package')
+
+
+def report_metrics(log_result):
+    """Pull Init Duration, Duration and Max Memory Used out of the REPORT line of a tailed log."""
+    log = base64.b64decode(log_result).decode('utf-8', 'replace')
+    metrics = {}
+    for name, value in re.findall(r'(Init Duration|Billed Duration|Duration|Max Memory Used): ([\d.]+)', log):
+        metrics.setdefault(name, float(value))
+    return metrics
+
 def test_lambda():
     load_dotenv()
     lambda_client = boto3.client('lambda', region_name='us-east-1')
@@ -43,8 +62,11 @@ def test_lambda():
     # Invoke Lambda
     response = lambda_client.invoke(
         FunctionName='SnapPlannerFunction',
-        Payload=json.dumps(test_event)
+        Payload=json.dumps(test_event),
+        LogType='Tail'
     )
+    # Init Duration only shows up when this invocation started a new container
+    print(report_metrics(response['LogResult']))
     
     result = json.loads(response['Payload'].read())
     # print(result)
@@ -54,5 +76,100 @@ def test_lambda():
     
     return events
 
+class StubTextract:
+    """Stands in for the Textract client so local runs time our code, not AWS."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def analyze_document(self, **kwargs):
+        return {'Blocks': self.blocks}
+
+
+def local_container(invocations, pdf_path, blocks_path):
+    """Body of the child process: one fresh container, timed like Lambda would bill it."""
+    sys.path.insert(0, PACKAGE_DIR)
+    start = time.perf_counter()
+    import lambda_function
+    init_ms = (time.perf_counter() - start) * 1000
+
+    with open(blocks_path) as f:
+        lambda_function.textract = StubTextract(json.load(f))
+    with open(pdf_path, 'rb') as f:
+        pdf = base64.b64encode(f.read()).decode('utf-8')
+    image = base64.b64encode(b'not decoded by the stub').decode('utf-8')
+
+    timings = {'image': [], 'pdf': []}
+    status_codes = {'image': set(), 'pdf': set()}
+    # Which kinds of request had loaded PyPDF2 by the time they returned
+    pdf_loaded = {'image': False, 'pdf': False}
+    for _ in range(invocations):
+        for kind, data in (('image', image), ('pdf', pdf)):
+            start = time.perf_counter()
+            response = lambda_function.lambda_handler({'body': {kind: data, 'prompts_only': True}}, None)
+            timings[kind].append((time.perf_counter() - start) * 1000)
+            status_codes[kind].add(response['statusCode'])
+            pdf_loaded[kind] = pdf_loaded[kind] or 'PyPDF2' in sys.modules
+    print(json.dumps({'init_ms': init_ms, **timings, 'pdf_loaded': pdf_loaded,
+                      'status_codes': {kind: sorted(codes) for kind, codes in status_codes.items()}}))
+
+
+def run_containers(directory, preload, invocations, cold_starts, pdf_pages=5):
+    """Run `cold_starts` fresh local_container processes on a synthetic PDF; returns what each printed."""
+    # Imported here: both pull in PyPDF2, which the child processes must load themselves
+    from bench_layout_prompt import synthetic_blocks
+    from bench_pdf_extract import make_text_pdf
+
+    pdf_path = os.path.join(directory, 'syllabus.pdf')
+    blocks_path = os.path.join(directory, 'blocks.json')
+    with open(pdf_path, 'wb') as f:
+        f.write(make_text_pdf(pdf_pages))
+    with open(blocks_path, 'w') as f:
+        json.dump(synthetic_blocks(), f)
+
+    env = dict(os.environ, PRELOAD_PDF=preload, AWS_DEFAULT_REGION='us-east-1')
+    runs = []
+    for _ in range(cold_starts):
+        output = subprocess.run(
+            [sys.executable, __file__, '--container', str(invocations), pdf_path, blocks_path],
+            env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return runs
+
+
+def test_lambda_local_image_requests_skip_pypdf2(tmp_path):
+    """A fresh container answers both kinds of request and only loads PyPDF2 for the PDF."""
+    run, = run_containers(str(tmp_path), 'false', invocations=1, cold_starts=1)
+    assert run['status_codes'] == {'image': [200], 'pdf': [200]}
+    # Images go first, so PyPDF2 was not loaded yet when they returned
+    assert run['pdf_loaded'] == {'image': False, 'pdf': True}
+
+
+def bench_lambda_local(invocations=20, cold_starts=5, pdf_pages=5):
+    """Time init and per-invoke latency of lambda_function in fresh processes, with and without PRELOAD_PDF."""
+    with tempfile.TemporaryDirectory() as directory:
+        for preload in ('false', 'true'):
+            runs = run_containers(directory, preload, invocations, cold_starts, pdf_pages)
+            init = statistics.median(run['init_ms'] for run in runs)
+            first_image = statistics.median(run['image'][0] for run in runs)
+            first_pdf = statistics.median(run['pdf'][0] for run in runs)
+            warm_image = statistics.median(ms for run in runs for ms in run['image'][1:])
+            warm_pdf = statistics.median(ms for run in runs for ms in run['pdf'][1:])
+            print(f"PRELOAD_PDF={preload:5s} init {init:6.1f} ms  first image {first_image:6.1f} ms  "
+                  f"first pdf {first_pdf:6.1f} ms  warm image {warm_image:5.1f} ms  warm pdf {warm_pdf:5.1f} ms")
+
+
 if __name__ == "__main__":
-    test_lambda()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Invoke SnapPlannerFunction, or time lambda_function locally")
+    parser.add_argument('--local', action='store_true', help="time init and invokes locally instead of calling AWS")
+    parser.add_argument('--invocations', type=int, default=20)
+    parser.add_argument('--cold-starts', type=int, default=5)
+    parser.add_argument('--container', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.container:
+        local_container(int(args.container[0]), *args.container[1:])
+    elif args.local:
+        bench_lambda_local(args.invocations, args.cold_starts)
+    else:
+        test_lambda()
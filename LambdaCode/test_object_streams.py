@@ -0,0 +1,50 @@
+from io import BytesIO
+
+# bench_object_streams keeps the old uncached lookup (and puts the bundled PyPDF2 on the path)
+from bench_object_streams import UncachedReader, extract_all, resolve_all
+from bench_pdf_extract import make_objstm_pdf
+import PyPDF2
+from PyPDF2.generic import IndirectObject
+
+
+class SmallCacheReader(PyPDF2.PdfReader):
+    """A reader whose object stream cache holds about one stream, so lookups keep evicting."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.object_stream_cache_bytes = 100
+        self.peak_streams = 0
+
+    def _object_stream(self, stmnum):
+        entry = super()._object_stream(stmnum)
+        self.peak_streams = max(self.peak_streams, len(self._object_streams))
+        return entry
+
+
+def test_eviction_keeps_lookups_correct():
+    # 20 pages of 4 objects each, 10 objects per stream: more streams than the cache keeps
+    pdf_data = make_objstm_pdf(20, lines_per_page=3, objects_per_stream=10)
+    for work in (extract_all, resolve_all):
+        assert work(SmallCacheReader, pdf_data) == work(UncachedReader, pdf_data)
+
+    reader = SmallCacheReader(BytesIO(pdf_data))
+    assert len({stmnum for stmnum, _ in reader.xref_objStm.values()}) > 2
+    for page in reader.pages:
+        page.extract_text()
+    # Never more than the stream just read: each one alone is over the budget
+    assert reader.peak_streams == 1
+    assert reader._object_streams_size == sum(len(entry[0]) for entry in reader._object_streams.values())
+
+
+def test_default_cache_keeps_every_stream():
+    pdf_data = make_objstm_pdf(20, lines_per_page=3, objects_per_stream=10)
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    for number in reader.xref_objStm:
+        reader.get_object(IndirectObject(number, 0, reader))
+    assert len(reader._object_streams) == len({stmnum for stmnum, _ in reader.xref_objStm.values()})
+
+
+if __name__ == "__main__":
+    test_eviction_keeps_lookups_correct()
+    test_default_cache_keeps_every_stream()
+    print("Object stream lookups match the uncached reader with and without eviction")
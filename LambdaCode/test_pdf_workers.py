@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+# bench_pdf_extract puts the bundled PyPDF2 on the path if it is not installed
+from bench_pdf_extract import make_text_pdf
+import lambda_function
+
+# Enough pages for four shards
+PAGES = 4 * lambda_function.PDF_PARALLEL_MIN_PAGES
+
+
+def failing_shard(pdf_data, start, stop, conn):
+    """The first shard fails; the others never answer, like children stuck on a huge page."""
+    if start == 0:
+        conn.send((False, "ValueError('bad xref')"))
+        conn.close()
+    else:
+        time.sleep(60)
+
+
+def dying_shard(pdf_data, start, stop, conn):
+    if start == 0:
+        os._exit(3)
+    time.sleep(60)
+
+
+def test_shards_match_a_single_process():
+    pdf_data = make_text_pdf(PAGES, lines_per_page=3)
+    texts = lambda_function.extract_pdf_pages(pdf_data, workers=1)
+    assert len(texts) == PAGES
+    assert lambda_function.extract_pdf_pages(pdf_data, workers=4) == texts
+    assert multiprocessing.active_children() == []
+
+
+@pytest.mark.parametrize('target, error', [
+    (failing_shard, "bad xref"),
+    (dying_shard, "worker exited with code 3"),
+])
+def test_failed_shard_leaves_no_children(monkeypatch, target, error):
+    monkeypatch.setattr(lambda_function, '_extract_page_range', target)
+    with pytest.raises(RuntimeError, match=error):
+        lambda_function.extract_pdf_pages(make_text_pdf(PAGES, lines_per_page=3), workers=4)
+    assert multiprocessing.active_children() == []
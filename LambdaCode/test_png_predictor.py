@@ -0,0 +1,72 @@
+import random
+
+# bench_png_predictor keeps the old per-byte decoder (and puts the bundled PyPDF2 on the path)
+from bench_png_predictor import legacy_decode_png_prediction, photo, png_predict
+from PyPDF2.filters import FlateDecode, _numpy
+
+
+def decoders():
+    """Every way FlateDecode can undo PNG prediction here; the NumPy one only if NumPy is installed."""
+    found = {'bytes': FlateDecode._decode_png_prediction_bytes}
+    np = _numpy()
+    if np is not None:
+        found['numpy'] = lambda data, rowlength: FlateDecode._decode_png_prediction_numpy(np, data, rowlength)
+    return found
+
+
+def outcome(decode, *args):
+    try:
+        return 'ok', decode(*args)
+    except Exception as e:
+        return 'error', (type(e), str(e))
+
+
+def check(data, rowlength):
+    expected = outcome(legacy_decode_png_prediction, data, rowlength - 1, rowlength)
+    # What FlateDecode.decode calls, whichever path it takes
+    assert outcome(FlateDecode._decode_png_prediction, data, rowlength - 1, rowlength) == expected, \
+        (data, rowlength)
+    if len(data) % rowlength:
+        return
+    for name, decode in decoders().items():
+        assert outcome(decode, data, rowlength) == expected, (name, data, rowlength, expected)
+
+
+def random_rows(rng, rowlength, rows):
+    data = bytearray()
+    # Runs of one filter, as encoders write them, and single rows that switch
+    filter_byte = rng.randrange(5)
+    for _ in range(rows):
+        if rng.random() < 0.3:
+            filter_byte = rng.randrange(5) if rng.random() < 0.98 else rng.randrange(5, 256)
+        data.append(filter_byte)
+        data += bytes(rng.randrange(256) for _ in range(rowlength - 1))
+    return bytes(data)
+
+
+def test_random_rows(count=3000, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        # Narrow rows like xref streams' and wide ones like images', on both sides of the
+        # run-at-a-time and diagonal-at-a-time thresholds
+        rowlength = rng.choice([1, 2, 3, 6, 8, 17, 40, 129, 200])
+        rows = rng.choice([0, 1, 2, 5, 16, 17, 40])
+        data = random_rows(rng, rowlength, rows)
+        check(data, rowlength)
+        # Not a whole number of rows
+        check(data + b"\x00", rowlength)
+
+
+def test_images():
+    raw = photo(150, 60)
+    for filters in ([0], [1], [2], [3], [4], [1, 2, 2], [4, 3, 2, 1, 0], [2] * 20 + [4] * 20 + [3] * 20):
+        data = png_predict(raw, 150, filters)
+        check(data, 151)
+        for name, decode in decoders().items():
+            assert decode(data, 151) == raw, (name, filters)
+
+
+if __name__ == "__main__":
+    test_random_rows()
+    test_images()
+    print("PNG predictor decoding matches the per-byte decoder:", ", ".join(decoders()))
@@ -1,24 +1,28 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
+from fastapi import File, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 import uvicorn
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 from typing import List, Optional
 import json
-from pydantic import BaseModel
-import boto3
-from botocore.config import Config
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from dotenv import load_dotenv
 import logging
 import image_processor
 import pdf_processor
+import bedrock_stream
 import hashlib
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from jobs import JobQueue, QueueFullError
+from extraction_cache import cache_from_env
+from upload_limit import UploadSizeLimitMiddleware
+from lambda_payload import invoke_prompts
+from storage import storage_from_env
+from api import create_app, SECRET_KEY, ALGORITHM, STATIC_DIR
+import aiofiles
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,314 +31,258 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# AWS Configuration
-AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY_ID')
-AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-AWS_REGION = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-
-# Security configurations
-SECRET_KEY = os.getenv('JWT_SECRET_KEY')
-if not SECRET_KEY:
-    raise ValueError("JWT_SECRET_KEY environment variable is required")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-# Password hashing - using SHA256 for simplicity
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
-# AWS DynamoDB setup
-# try:
-#     dynamodb = boto3.resource('dynamodb',
-#         aws_access_key_id=AWS_ACCESS_KEY,
-#         aws_secret_access_key=AWS_SECRET_KEY,
-#         aws_session_token=os.getenv('AWS_SESSION_TOKEN'),
-#         region_name=AWS_REGION,
-#         config=Config(retries=dict(max_attempts=2))
-#     )
-# except Exception as e:
-#     logger.error(f"Failed to initialize DynamoDB: {e}")
-#     raise
-
-# AWS DynamoDB setup
+# Users and events go to the backend STORAGE_BACKEND selects, DynamoDB unless told otherwise
+# (credentials, region and DYNAMODB_ENDPOINT_URL come from the environment via aws_clients)
 try:
-    dynamodb = boto3.resource('dynamodb',
-        aws_access_key_id=AWS_ACCESS_KEY,
-        aws_secret_access_key=AWS_SECRET_KEY,
-        aws_session_token=os.getenv('AWS_SESSION_TOKEN'),
-        region_name=AWS_REGION,
-        config=Config(retries=dict(max_attempts=2))
-    )
+    storage = storage_from_env('dynamodb')
 except Exception as e:
-    logger.error(f"Failed to initialize DynamoDB: {e}")
+    logger.error(f"Failed to initialize storage: {e}")
     raise
 
-
-# Models
-class Token(BaseModel):
-    access_token: str
-    token_type: str
-
-class TokenData(BaseModel):
-    username: Optional[str] = None
-
-class User(BaseModel):
-    username: str
-    email: Optional[str] = None
-    full_name: Optional[str] = None
-
-class UserInDB(User):
-    hashed_password: str
-
-class Event(BaseModel):
-    id: str
-    title: str
-    start: str
-    end: Optional[str] = None
-    description: Optional[str] = None
-    tags: Optional[str] = None
-
-class UserCreate(BaseModel):
-    username: str
-    password: str
-    email: Optional[str] = None
-
 # Create directories
-STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 
 for directory in [STATIC_DIR, UPLOAD_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-app = FastAPI(title="SnapPlanner API", version="1.0.0")
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for public access
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["*"],
-)
-
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Authentication functions
-def verify_password(plain_password, hashed_password):
-    return get_password_hash(plain_password) == hashed_password
-
-def get_password_hash(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    
-    try:
-        table = dynamodb.Table('Users')
-        response = table.get_item(Key={'username': token_data.username})
-        user = response.get('Item')
-        
-        if user is None:
-            raise credentials_exception
-        return user
-    except ClientError as e:
-        logger.error(f"DynamoDB error: {e}")
-        raise HTTPException(status_code=500, detail="Database error")
-
-# Routes
-@app.get("/")
-async def read_root():
-    return RedirectResponse(url="/static/login.html")
-
-# Authentication routes
-@app.post("/auth/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    try:
-        table = dynamodb.Table('Users')
-        response = table.get_item(Key={'username': form_data.username})
-        user = response.get('Item')
-        
-        if not user or not verify_password(form_data.password, user['password']):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user['username']}, expires_delta=access_token_expires
-        )
-        return {"access_token": access_token, "token_type": "bearer"}
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceNotFoundException':
-            raise HTTPException(status_code=500, detail="Database tables not set up. Run setup_db.py first.")
-        logger.error(f"Login error: {e}")
-        raise HTTPException(status_code=500, detail=f"Authentication service error: {e.response['Error']['Code']}")
+# Auth, event and summary routes come from api.py
+app = create_app(storage, allow_origins=["*"])  # Allow all origins for public access
+
+# Uploads larger than this are rejected while they stream in
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Files accepted by one /uploadfiles/ request
+MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', '10'))
+# Allow for the multipart boundaries and headers around the files themselves
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES + 64 * 1024,
+                   path_prefixes=('/uploadfile/',))
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_BATCH_FILES * (MAX_UPLOAD_BYTES + 64 * 1024),
+                   path_prefixes=('/uploadfiles/',))
+
+# Background extraction jobs for uploads
+extraction_jobs = JobQueue()
+# Files of batch uploads that may be extracted at once, shared by all batches; each batch
+# also stays within its owner's per-user job limit (see extract_batch)
+UPLOAD_BATCH_PARALLELISM = int(os.getenv('UPLOAD_BATCH_PARALLELISM', '8'))
+batch_executor = ThreadPoolExecutor(max_workers=UPLOAD_BATCH_PARALLELISM, thread_name_prefix='batch')
+# Cache of extracted events keyed on the uploaded file's hash (None when disabled)
+extraction_cache = cache_from_env()
+SSE_KEEPALIVE_SECONDS = 15
+# Stream Bedrock from here so events reach the client as they are generated
+EXTRACTION_STREAMING = os.getenv('EXTRACTION_STREAMING', 'true').lower() == 'true'
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    extraction_jobs.shutdown()
+    batch_executor.shutdown(wait=False)
 
 @app.get("/debug/tables")
 async def debug_tables():
     try:
-        tables = list(dynamodb.tables.all())
-        return {"tables": [table.name for table in tables]}
+        return {"tables": await storage.table_names()}
     except Exception as e:
         return {"error": str(e)}
 
-@app.post("/auth/register")
-async def register(user_data: UserCreate):
+def get_token_username(token: Optional[str]):
+    """Return the username in an optional query-string token, or None if no token was sent."""
+    if not token:
+        return None
     try:
-        table = dynamodb.Table('Users')
-        
-        # Check if user exists
-        try:
-            response = table.get_item(Key={'username': user_data.username})
-            if 'Item' in response:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already registered"
-                )
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ResourceNotFoundException':
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Database tables not set up. Run setup_db.py first."
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Database error: {e.response['Error']['Code']}"
-                )
-        
-        # Create new user
-        hashed_password = get_password_hash(user_data.password)
-        user = {
-            'username': user_data.username,
-            'password': hashed_password,
-            'email': user_data.email
-        }
-        
-        table.put_item(Item=user)
-        return {"message": "User created successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Registration error: {e}")
-        raise HTTPException(status_code=500, detail=f"Registration service error: {str(e)}")
-
-# Event routes
-@app.get("/events/", response_model=List[Event])
-async def get_user_events(current_user: User = Depends(get_current_user)):
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username = payload.get("sub")
+        if not username:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return username
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def save_upload(file: UploadFile, file_path: str):
+    """Copy an upload to `file_path` a chunk at a time and return its SHA-256 hex digest."""
+    digest = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="File too large")
+            digest.update(chunk)
+            await buffer.write(chunk)
+    return digest.hexdigest()
+
+def stream_extract(file_path, kind, on_event=None):
+    """Get the prompts from the Lambda and stream Bedrock's answer, calling `on_event` per event.
+
+    If Bedrock fails from here before any event arrived, the Lambda runs the
+    same prompts instead, so the document is not read or OCR'd a second time.
+    """
+    if kind == 'pdf':
+        prompts = pdf_processor.pdfToPrompts(file_path)
+    else:
+        prompts = image_processor.imageToPrompts(file_path)
+    emitted = []
+    
+    def emit(event):
+        emitted.append(event)
+        if on_event is not None:
+            on_event(event)
+    
     try:
-        table = dynamodb.Table('Events')
-        response = table.query(
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(current_user['username'])
-        )
-        return response['Items']
-    except ClientError as e:
-        logger.error(f"Get events error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve events")
-
-@app.post("/events/")
-async def create_event(event: Event, current_user: User = Depends(get_current_user)):
+        return bedrock_stream.stream_events(prompts['system'], prompts['header'], prompts['chunks'], on_event=emit)
+    except (ClientError, BotoCoreError) as e:
+        # e.g. no Bedrock access or credentials on this host; let the Lambda call Bedrock instead
+        if emitted:
+            raise
+        logger.error(f"Streaming extraction failed, falling back to Lambda: {e}")
+    return json.loads(invoke_prompts(prompts)['body'])
+
+def extract_events(file_path, kind, digest, on_event=None):
+    """Run the extraction for a saved upload; called on the job queue's worker threads."""
     try:
-        table = dynamodb.Table('Events')
-        event_item = event.dict()
-        event_item['user_id'] = current_user['username']
-        
-        table.put_item(Item=event_item)
-        return {"message": "Event created successfully"}
-    except ClientError as e:
-        logger.error(f"Create event error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to create event")
-
-@app.delete("/events/{event_id}")
-async def delete_event(event_id: str, current_user: User = Depends(get_current_user)):
+        degraded = False
+        if EXTRACTION_STREAMING:
+            events = stream_extract(file_path, kind, on_event)
+        elif kind == 'pdf':
+            result = pdf_processor.pdfToEvents(file_path)
+            events = result['events']
+            degraded = result.get('truncated', False)
+        else:
+            events = image_processor.imageToEvents(file_path)['events']
+        # Failed and degraded extractions come back empty or short too; extract those
+        # again next time instead of serving them for the whole cache TTL
+        if extraction_cache is not None and events and not degraded:
+            extraction_cache.set(digest, kind, events)
+        return events
+    finally:
+        # Clean up
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                logger.error(f"Error removing temporary file: {e}")
+
+def extract_upload(report, file_path, kind, digest):
+    """Extract a single upload, reporting each event to the job as soon as it is generated."""
+    return extract_events(file_path, kind, digest, on_event=lambda event: report({"event": event}))
+
+def dedupe_events(event_lists):
+    """Merge extracted events from several files, dropping repeats of the same title and start."""
+    # Same rule the streamed chunks of one file are merged with
+    merger = bedrock_stream.EventMerger()
+    for events in event_lists:
+        for event in events or []:
+            merger.add(event)
+    return merger.events()
+
+def extract_batch(report, uploads, max_parallel):
+    """Extract several staged uploads in parallel, reporting each file's events as it finishes.
+
+    At most `max_parallel` files of the batch are on batch_executor at once
+    (the owner's per-user job limit), so one user's batches cannot take
+    every extraction thread from everyone else's.
+    """
+    results = [None] * len(uploads)
+    pending = []
+    for index, upload in enumerate(uploads):
+        if upload['events'] is not None:
+            results[index] = upload['events']
+            report({"file": upload['filename'], "events": upload['events'], "cached": True})
+        else:
+            pending.append(index)
+    
+    pending.reverse()
+    futures = {}
+    while pending or futures:
+        while pending and len(futures) < max_parallel:
+            index = pending.pop()
+            upload = uploads[index]
+            future = batch_executor.submit(extract_events, upload['file_path'], upload['kind'], upload['digest'])
+            futures[future] = index
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = futures.pop(future)
+            try:
+                results[index] = future.result()
+                report({"file": uploads[index]['filename'], "events": results[index]})
+            except Exception as e:
+                logger.error(f"Batch extraction error for {uploads[index]['filename']}: {e}")
+                report({"file": uploads[index]['filename'], "error": str(e)})
+    return dedupe_events(results)
+
+async def stage_upload(file: UploadFile):
+    """Validate and save one upload, looking it up in the extraction cache.
+
+    Returns a dict with the saved file's path, kind and digest. 'events' holds
+    the cached extraction (and the file is already gone) on a cache hit.
+    """
+    # Validate file type
+    if not (file.content_type.startswith('image/') or file.content_type == 'application/pdf'):
+        raise HTTPException(status_code=400, detail="File must be an image or PDF")
+    
+    # Create unique filename
+    file_extension = os.path.splitext(file.filename)[1]
+    unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_extension}"
+    file_path = os.path.join(UPLOAD_DIR, unique_filename)
+    kind = 'pdf' if file.content_type == 'application/pdf' else 'image'
+    
     try:
-        table = dynamodb.Table('Events')
-        table.delete_item(
-            Key={
-                'user_id': current_user['username'],
-                'id': event_id
-            }
-        )
-        return {"message": "Event deleted successfully"}
-    except ClientError as e:
-        logger.error(f"Delete event error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to delete event")
-
-@app.post("/uploadfile/")
+        # Save uploaded file
+        digest = await save_upload(file, file_path)
+        
+        # Repeat uploads of the same file skip the Lambda round-trip entirely
+        cached_events = None
+        if extraction_cache is not None:
+            cached_events = await run_in_threadpool(extraction_cache.get, digest, kind)
+            if cached_events is not None:
+                os.remove(file_path)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    return {
+        "filename": file.filename,
+        "file_path": file_path,
+        "kind": kind,
+        "digest": digest,
+        "events": cached_events
+    }
+
+def discard_uploads(uploads):
+    for upload in uploads:
+        if os.path.exists(upload['file_path']):
+            os.remove(upload['file_path'])
+
+@app.post("/uploadfile/", status_code=202)
 async def create_upload_file(file: UploadFile = File(...), token: str = None):
-    # Validate token if provided
-    if token:
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username = payload.get("sub")
-            if not username:
-                raise HTTPException(status_code=401, detail="Invalid token")
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Invalid token")
+    username = get_token_username(token)
     if not file:
         raise HTTPException(status_code=400, detail="No file provided")
     
     try:
-        # Validate file type
-        if not (file.content_type.startswith('image/') or file.content_type == 'application/pdf'):
-            raise HTTPException(status_code=400, detail="File must be an image or PDF")
-        
-        # Create unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        
-        try:
-            # Save uploaded file
-            content = await file.read()
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
-            
-            # Process file based on type
-            if file.content_type == 'application/pdf':
-                events = pdf_processor.pdfToEvents(file_path)['events']
-            else:
-                events = image_processor.imageToEvents(file_path)['events']
-
-            os.remove(file_path)
-            
+        upload = await stage_upload(file)
+        if upload['events'] is not None:
             return JSONResponse(content={
                 "status": "File uploaded successfully",
-                "events": events
+                "events": upload['events'],
+                "cached": True
             })
-            
-        finally:
-            # Clean up
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    logger.error(f"Error removing temporary file: {e}")
+        
+        # Extraction calls Lambda and takes seconds, so hand it to the job queue;
+        # events show up in the job's partial results as they are generated
+        try:
+            job = extraction_jobs.submit_with_progress(username, extract_upload, upload['file_path'], upload['kind'], upload['digest'])
+        except QueueFullError as e:
+            discard_uploads([upload])
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        return JSONResponse(status_code=202, content={
+            "status": "File uploaded, processing",
+            "job_id": job.id
+        })
                     
     except HTTPException:
         raise
@@ -344,5 +292,87 @@ async def create_upload_file(file: UploadFile = File(...), token: str = None):
         logger.error(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="File processing failed")
 
+@app.post("/uploadfiles/", status_code=202)
+async def create_upload_files(files: List[UploadFile] = File(...), token: str = None):
+    username = get_token_username(token)
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files can be uploaded at once")
+    
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await stage_upload(file))
+        
+        # One job for the whole batch; its files are extracted in parallel on batch_executor
+        try:
+            job = extraction_jobs.submit_with_progress(username, extract_batch, uploads,
+                                                       extraction_jobs.owner_limit(username))
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        return JSONResponse(status_code=202, content={
+            "status": "Files uploaded, processing",
+            "job_id": job.id,
+            "files": len(uploads)
+        })
+    
+    except HTTPException:
+        discard_uploads(uploads)
+        raise
+    except Exception as e:
+        discard_uploads(uploads)
+        logger.error(f"Batch upload error: {e}")
+        raise HTTPException(status_code=500, detail="File processing failed")
+
+# Job routes
+@app.get("/jobs/metrics")
+async def get_job_metrics():
+    return extraction_jobs.metrics()
+
+@app.get("/cache/metrics")
+async def get_cache_metrics():
+    if extraction_cache is None:
+        return {"backend": None}
+    return extraction_cache.stats()
+
+def get_user_job(job_id: str, token: Optional[str]):
+    username = get_token_username(token)
+    job = extraction_jobs.get(job_id)
+    if job is None or (job.owner is not None and job.owner != username):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, token: str = None):
+    return get_user_job(job_id, token).to_dict()
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, token: str = None):
+    job = get_user_job(job_id, token)
+
+    async def job_events():
+        version = None
+        sent = 0
+        while True:
+            if job.version != version:
+                version = job.version
+                # Each partial result goes out once, rather than the whole list on every change
+                for item in job.partial[sent:]:
+                    yield f"event: partial\ndata: {json.dumps(item)}\n\n"
+                sent = len(job.partial)
+                snapshot = job.to_dict()
+                del snapshot['partial']
+                snapshot['partial_count'] = sent
+                yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+            if job.done:
+                break
+            if not await job.wait_for_change(version, timeout=SSE_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(job_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
 if __name__ == "__main__":
     uvicorn.run("FastAPI:app", host="0.0.0.0", port=80, reload=False)
\ No newline at end of file
@@ -0,0 +1,388 @@
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import RedirectResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+from datetime import datetime, timedelta
+import os
+from typing import List, Optional
+import json
+from pydantic import BaseModel, ValidationError
+from dotenv import load_dotenv
+import logging
+import event_summary
+from principal_cache import PrincipalCache
+from password_hashing import PasswordHasher, LoginRateLimiter, HasherBusyError
+from storage import Storage, StorageError
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Security configurations
+SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+if not SECRET_KEY:
+    raise ValueError("JWT_SECRET_KEY environment variable is required")
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+# Password hashing - bcrypt on a worker pool so a login never stalls the event loop;
+# SHA-256 hashes from before are upgraded as their users log in
+password_hasher = PasswordHasher()
+login_limiter = LoginRateLimiter()
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+# Most events one POST /events/bulk may carry
+BULK_EVENTS_MAX = int(os.getenv('BULK_EVENTS_MAX', '500'))
+
+# Models
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+class TokenData(BaseModel):
+    username: Optional[str] = None
+
+class User(BaseModel):
+    username: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+
+class UserInDB(User):
+    hashed_password: str
+
+class Event(BaseModel):
+    id: str
+    title: str
+    start: str
+    end: Optional[str] = None
+    description: Optional[str] = None
+    tags: Optional[str] = None
+
+class UserCreate(BaseModel):
+    username: str
+    password: str
+    email: Optional[str] = None
+
+# Authentication functions
+def hasher_busy(e: HasherBusyError):
+    logger.error(f"Password hashing overloaded: {e}")
+    return HTTPException(status_code=503, detail="Too many logins at once, try again shortly",
+                         headers={"Retry-After": "1"})
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=15)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+def get_storage(request: Request) -> Storage:
+    """The Storage create_app() gave the app serving this request."""
+    return request.app.state.storage
+
+# Verified tokens, so authenticated requests skip the Users table read in the steady state
+principal_cache = PrincipalCache()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), storage: Storage = Depends(get_storage)):
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username: str = payload.get("sub")
+        if username is None:
+            raise credentials_exception
+        token_data = TokenData(username=username)
+    except JWTError:
+        raise credentials_exception
+
+    try:
+        user = await storage.get_user(token_data.username)
+
+        if user is None:
+            raise credentials_exception
+        principal_cache.put(token, user, payload.get('exp', 0))
+        return user
+    except StorageError as e:
+        logger.error(f"Storage error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+router = APIRouter()
+
+# Routes
+@router.get("/")
+async def read_root():
+    return RedirectResponse(url="/static/login.html")
+
+# Authentication routes
+@router.post("/auth/token", response_model=Token)
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(),
+                                 storage: Storage = Depends(get_storage)):
+    # Failures count against both the account and the address trying it
+    limiter_keys = ('user:' + form_data.username, 'address:' + (request.client.host if request.client else ''))
+    retry_after = login_limiter.retry_after(*limiter_keys)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed logins, try again later",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+
+    try:
+        user = await storage.get_user(form_data.username)
+    except StorageError as e:
+        if e.code == 'ResourceNotFoundException':
+            raise HTTPException(status_code=500, detail="Database tables not set up. Run setup_db.py first.")
+        logger.error(f"Login error: {e}")
+        raise HTTPException(status_code=500, detail=f"Authentication service error: {e.code}")
+
+    try:
+        if user:
+            verified, new_hash = await password_hasher.verify_and_update(form_data.password, user['password'])
+        else:
+            await password_hasher.dummy_verify()
+            verified, new_hash = False, None
+    except HasherBusyError as e:
+        raise hasher_busy(e)
+
+    if not verified:
+        login_limiter.failed(*limiter_keys)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    login_limiter.succeeded(limiter_keys[0])
+
+    if new_hash:
+        # Rehash on verify: the stored hash is an old scheme or cost, and we have the password now
+        try:
+            await storage.put_user({**user, 'password': new_hash})
+        except StorageError as e:
+            logger.error(f"Password rehash error: {e}")
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user['username']}, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/auth/register")
+async def register(user_data: UserCreate, storage: Storage = Depends(get_storage)):
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except HasherBusyError as e:
+        raise hasher_busy(e)
+    user = {
+        'username': user_data.username,
+        'password': hashed_password,
+        'email': user_data.email
+    }
+
+    try:
+        created = await storage.add_user(user)
+    except StorageError as e:
+        if e.code == 'ResourceNotFoundException':
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database tables not set up. Run setup_db.py first."
+            )
+        logger.error(f"Registration error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {e.code}"
+        )
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        )
+    # Tokens cached for an earlier account with this name no longer apply
+    principal_cache.invalidate_user(user_data.username)
+    return {"message": "User created successfully"}
+
+# Event routes
+def event_range_bounds(start, end):
+    """Storage range bounds for the window [start, end); None where the window is open.
+
+    `start` and `end` are ISO dates or datetimes such as FullCalendar sends.
+    Event times are stored as local ISO strings, so the window is matched on
+    whole days. Storage returns every event overlapping it, including long
+    ones that started well before it.
+    """
+    try:
+        lower = datetime.strptime(start[:10], '%Y-%m-%d').strftime('%Y-%m-%d') if start else None
+        upper = datetime.strptime(end[:10], '%Y-%m-%d').strftime('%Y-%m-%d') if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO dates")
+    return lower, upper
+
+# Last element of an /events/ response cut short by a storage error after it started
+EVENTS_INCOMPLETE_MARKER = {"error": "Failed to retrieve events", "incomplete": True}
+
+@router.get("/events/", response_model=List[Event])
+async def get_user_events(start: Optional[str] = None, end: Optional[str] = None,
+                          current_user: User = Depends(get_current_user),
+                          storage: Storage = Depends(get_storage)):
+    """The user's events overlapping [start, end), or all of them without a range.
+
+    Events are streamed page by page as storage returns them. A failure on
+    the first page is a 500; once the 200 has been sent, a failure on a
+    later page ends the array with EVENTS_INCOMPLETE_MARKER instead of an
+    event, so the client can tell a failed load from a short list and retry.
+    """
+    pages = storage.query_events(current_user['username'], *event_range_bounds(start, end))
+    try:
+        page = await pages.__anext__()
+    except StopAsyncIteration:
+        page = []
+    except StorageError as e:
+        logger.error(f"Get events error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve events")
+
+    async def event_pages(page):
+        # Send each page as it arrives instead of collecting every event first
+        yield '['
+        separator = ''
+        while True:
+            events = [json.dumps(Event(**item).dict()) for item in page]
+            if events:
+                yield separator + ','.join(events)
+                separator = ','
+            try:
+                page = await pages.__anext__()
+            except StopAsyncIteration:
+                break
+            except StorageError as e:
+                # The 200 is already sent: end the array with the marker rather than a short list
+                logger.error(f"Get events error, response cut short: {e}")
+                yield separator + json.dumps(EVENTS_INCOMPLETE_MARKER)
+                break
+        yield ']'
+
+    return StreamingResponse(event_pages(page), media_type="application/json")
+
+@router.get("/summary")
+async def get_summary(start: str, end: str, granularity: str, current_user: User = Depends(get_current_user),
+                      storage: Storage = Depends(get_storage)):
+    """Tag hours for the view [start, end], read from the per-day aggregates.
+
+    `start` and `end` are the view's local ISO bounds and `granularity` is
+    day, week or month; the numbers match what the calendar used to compute
+    from the loaded events.
+    """
+    range_start = event_summary.parse_time(start)
+    range_end = event_summary.parse_time(end)
+    if range_start is None or range_end is None:
+        raise HTTPException(status_code=400, detail="start and end must be ISO dates")
+    if granularity not in ('day', 'week', 'month'):
+        raise HTTPException(status_code=400, detail="granularity must be day, week or month")
+
+    try:
+        items = await storage.summary_items(current_user['username'], range_start.strftime('%Y-%m-%d'),
+                                            range_end.strftime('%Y-%m-%d'))
+    except StorageError as e:
+        logger.error(f"Get summary error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve summary")
+    return event_summary.summarize(items, range_start, range_end, granularity)
+
+@router.post("/events/")
+async def create_event(event: Event, current_user: User = Depends(get_current_user),
+                       storage: Storage = Depends(get_storage)):
+    try:
+        await storage.put_event(current_user['username'], event.dict())
+        return {"message": "Event created successfully"}
+    except StorageError as e:
+        logger.error(f"Create event error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create event")
+
+@router.post("/events/bulk")
+async def create_events_bulk(events: List[dict], current_user: User = Depends(get_current_user),
+                             storage: Storage = Depends(get_storage)):
+    """Create or replace many events with batched writes.
+
+    Each entry is validated as an Event on its own, so one bad entry does not
+    sink the rest. The response lists a status per entry, in request order:
+    created, updated, invalid or failed (the last two with an error).
+    """
+    if len(events) > BULK_EVENTS_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_EVENTS_MAX} events per request")
+    results = [None] * len(events)
+    items = {}
+    for index, raw in enumerate(events):
+        try:
+            item = Event(**raw).dict()
+        except (ValidationError, TypeError) as e:
+            results[index] = {"status": "invalid", "error": str(e)}
+            continue
+        if item['id'] in items:
+            results[index] = {"id": item['id'], "status": "invalid", "error": "Duplicate id in this request"}
+            continue
+        items[item['id']] = (index, item)
+
+    entries = list(items.values())
+    try:
+        old_events, failed = await storage.put_events(current_user['username'], [item for _, item in entries])
+    except StorageError as e:
+        logger.error(f"Bulk create events error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create events")
+
+    for position, (index, item) in enumerate(entries):
+        if position in failed:
+            results[index] = {"id": item['id'], "status": "failed", "error": failed[position]}
+        else:
+            results[index] = {"id": item['id'], "status": "updated" if old_events[position] else "created"}
+
+    written = len(entries) - len(failed)
+    return {"written": written, "failed": len(events) - written, "results": results}
+
+@router.delete("/events/{event_id}")
+async def delete_event(event_id: str, current_user: User = Depends(get_current_user),
+                       storage: Storage = Depends(get_storage)):
+    try:
+        await storage.delete_event(current_user['username'], event_id)
+        return {"message": "Event deleted successfully"}
+    except StorageError as e:
+        logger.error(f"Delete event error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete event")
+
+def create_app(storage: Storage, allow_origins=("*",)):
+    """The SnapPlanner API (auth, events, summaries and the static UI) on top of `storage`.
+
+    FastAPI.py adds the upload and extraction routes to the app it gets
+    from here; FastAPI_local.py serves it as is.
+    """
+    app = FastAPI(title="SnapPlanner API", version="1.0.0")
+    app.state.storage = storage
+
+    # CORS configuration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(allow_origins),
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["*"],
+    )
+
+    # Mount static files
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    app.include_router(router)
+
+    @app.on_event("shutdown")
+    async def close_storage():
+        storage.close()
+
+    return app
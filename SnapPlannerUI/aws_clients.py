@@ -0,0 +1,94 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+# Read .env once per process instead of on every upload
+load_dotenv()
+
+# Connections each shared client may keep open; should cover the worker threads using it
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '32'))
+
+# Lambda extraction can take most of the function's 60s timeout, so allow for it
+SERVICE_CONFIG = {
+    'lambda': Config(read_timeout=120, retries=dict(max_attempts=2)),
+    # Path-style URLs work with MinIO and other local stand-ins as well as S3
+    's3': Config(retries=dict(max_attempts=2), s3={'addressing_style': 'path'}),
+}
+DEFAULT_CONFIG = Config(retries=dict(max_attempts=2))
+
+# Local stand-ins (DynamoDB Local, MinIO, ...) by service name
+ENDPOINT_ENV = {
+    'dynamodb': 'DYNAMODB_ENDPOINT_URL',
+    's3': 'S3_ENDPOINT_URL',
+}
+
+_clients = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _client_kwargs(service):
+    config = SERVICE_CONFIG.get(service, DEFAULT_CONFIG).merge(
+        Config(max_pool_connections=AWS_MAX_POOL_CONNECTIONS))
+    endpoint_env = ENDPOINT_ENV.get(service)
+    return {
+        'region_name': os.getenv('AWS_DEFAULT_REGION', 'us-east-1'),
+        'endpoint_url': os.getenv(endpoint_env) if endpoint_env else None,
+        'config': config,
+    }
+
+
+def get_client(service):
+    """Return the process-wide boto3 client for `service`, creating it on first use.
+
+    Building a client loads the service's endpoint and API models, which costs
+    tens of milliseconds, so each one is built once and shared. boto3 clients
+    are thread-safe; creating them is not, hence the lock.
+    """
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                client = boto3.session.Session().client(service, **_client_kwargs(service))
+                _clients[service] = client
+    return client
+
+
+def lambda_client():
+    return get_client('lambda')
+
+
+def textract_client():
+    return get_client('textract')
+
+
+def bedrock_client():
+    return get_client('bedrock-runtime')
+
+
+def s3_client():
+    return get_client('s3')
+
+
+def dynamodb_client():
+    return get_client('dynamodb')
+
+
+def dynamodb_resource():
+    """Return the calling thread's DynamoDB resource.
+
+    Resources, unlike clients, are not thread-safe, so each thread gets its
+    own, created once and reused with its connection pool.
+    """
+    resource = getattr(_local, 'dynamodb', None)
+    if resource is None:
+        with _lock:
+            session = boto3.session.Session()
+        resource = session.resource('dynamodb', **_client_kwargs('dynamodb'))
+        _local.dynamodb = resource
+    return resource
+
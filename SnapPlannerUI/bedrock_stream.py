@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aws_clients
+
+BEDROCK_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+BEDROCK_MAX_TOKENS = 2500
+# Chunks streamed from Bedrock at once for one upload
+BEDROCK_PARALLELISM = int(os.getenv('BEDROCK_PARALLELISM', '4'))
+# A chunk whose answer hits max_tokens is halved and retried down to this size
+BEDROCK_MIN_CHUNK_CHARS = 500
+
+
+class EventArrayParser:
+    """Incremental parser for a JSON array of objects arriving in pieces.
+
+    `feed(text)` returns every top-level object that closed within `text`,
+    so each event can be used as soon as the model finishes writing it.
+    Anything before the opening '[' is ignored, and so is everything after
+    the closing ']'.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.closed = False
+        self._pieces = []
+
+    def feed(self, text):
+        objects = []
+        start = 0 if self.depth >= 2 else None
+        for i, char in enumerate(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif self.closed:
+                break
+            elif self.depth == 0:
+                if char == '[':
+                    self.depth = 1
+            elif char == '"':
+                self.in_string = True
+            elif char in '[{':
+                self.depth += 1
+                if self.depth == 2:
+                    start = i
+            elif char in ']}':
+                self.depth -= 1
+                if self.depth == 1:
+                    self._pieces.append(text[start:i + 1])
+                    start = None
+                    item = "".join(self._pieces)
+                    self._pieces = []
+                    try:
+                        value = json.loads(item)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(value, dict):
+                        objects.append(value)
+                elif self.depth == 0:
+                    self.closed = True
+        if start is not None:
+            self._pieces.append(text[start:])
+        return objects
+
+
+class EventMerger:
+    """Collects events from concurrent streams, dropping repeats of the same title and start."""
+
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        """Record `event`; returns True if it had not been seen before."""
+        key = (str(event.get('eventTitle', '')).strip().lower(), event.get('startDate'))
+        with self._lock:
+            if key not in self._events:
+                self._events[key] = dict(event)
+                return True
+            merged = self._events[key]
+            if isinstance(event.get('tags'), list) and isinstance(merged.get('tags'), list):
+                merged['tags'] = merged['tags'] + [tag for tag in event['tags'] if tag not in merged['tags']]
+            return False
+
+    def events(self):
+        with self._lock:
+            return list(self._events.values())
+
+
+def stream_prompt(system_prompt, prompt, on_event):
+    """Stream one Bedrock completion, calling `on_event` for each event as it closes.
+
+    Returns the stop reason, 'max_tokens' when the answer was cut off.
+    """
+    response = aws_clients.bedrock_client().invoke_model_with_response_stream(
+        modelId=BEDROCK_MODEL_ID,
+        body=json.dumps({
+            'anthropic_version': 'bedrock-2023-05-31',
+            'max_tokens': BEDROCK_MAX_TOKENS,
+            'temperature': 0.5,
+            'system': system_prompt,
+            'messages': [{'role': 'user', 'content': prompt}]
+        })
+    )
+    parser = EventArrayParser()
+    stop_reason = None
+    for message in response['body']:
+        chunk = json.loads(message['chunk']['bytes'])
+        if chunk['type'] == 'content_block_delta':
+            for event in parser.feed(chunk['delta'].get('text', '')):
+                on_event(event)
+        elif chunk['type'] == 'message_delta':
+            stop_reason = chunk['delta'].get('stop_reason')
+    return stop_reason
+
+
+def _halve(text):
+    lines = text.splitlines(keepends=True)
+    if len(lines) < 2:
+        return None
+    middle = len(lines) // 2
+    return ["".join(lines[:middle]), "".join(lines[middle:])]
+
+
+def _stream_chunk(system_prompt, header, chunk, merger, on_event):
+    def emit(event):
+        if merger.add(event) and on_event is not None:
+            on_event(event)
+
+    stop_reason = stream_prompt(system_prompt, header + chunk, emit)
+    if stop_reason == 'max_tokens':
+        halves = _halve(chunk) if len(chunk) > BEDROCK_MIN_CHUNK_CHARS else None
+        if halves:
+            # Events already streamed are kept; the merger drops them when the halves repeat them
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(lambda half: _stream_chunk(system_prompt, header, half, merger, on_event), halves))
+
+
+def stream_events(system_prompt, header, chunks, on_event=None, parallelism=BEDROCK_PARALLELISM):
+    """Stream every chunk's events from Bedrock, several chunks at a time.
+
+    `on_event(event)` is called from worker threads once per distinct event,
+    as soon as the model has written it. Returns all distinct events.
+    """
+    merger = EventMerger()
+    if len(chunks) == 1:
+        _stream_chunk(system_prompt, header, chunks[0], merger, on_event)
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(chunks)))) as executor:
+            list(executor.map(lambda chunk: _stream_chunk(system_prompt, header, chunk, merger, on_event), chunks))
+    return merger.events()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import statistics
+import time
+
+from fake_dynamodb import FakeDynamoDB
+
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('JWT_SECRET_KEY', 'bench')
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p50/p99 of GET /events/ with and without the principal cache")
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help="simulated DynamoDB round-trip in seconds")
+    args = parser.parse_args()
+
+    with FakeDynamoDB(latency=args.latency) as fake:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = fake.url
+        fake.items['Users'][fake._key('Users', {'username': {'S': 'bench'}})] = {
+            'username': {'S': 'bench'}, 'password': {'S': 'x'}}
+
+        import FastAPI
+        import api
+        from fastapi.testclient import TestClient
+        from principal_cache import PrincipalCache
+
+        headers = {'Authorization': f"Bearer {api.create_access_token({'sub': 'bench'})}"}
+        params = {'start': '2025-03-09T00:00:00-05:00', 'end': '2025-03-16T00:00:00-04:00'}
+        with TestClient(FastAPI.app) as client:
+            for label, cache in [('Users read per request', PrincipalCache(ttl=0)),
+                                 ('principal cache', PrincipalCache())]:
+                api.principal_cache = cache
+                client.get('/events/', params=params, headers=headers).raise_for_status()
+                requests_before = fake.request_count
+                samples = []
+                for _ in range(args.requests):
+                    start = time.perf_counter()
+                    client.get('/events/', params=params, headers=headers).raise_for_status()
+                    samples.append((time.perf_counter() - start) * 1000)
+                p50, p99 = percentiles(samples)
+                reads = (fake.request_count - requests_before) / args.requests
+                print(f"{label:23s} p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  mean {statistics.mean(samples):6.2f} ms  "
+                      f"{reads:.1f} DynamoDB calls/request")
@@ -0,0 +1,56 @@
+import argparse
+import json
+import time
+
+import aws_clients
+import bedrock_stream
+
+
+class FakeStreamingBedrock:
+    """Streams a canned JSON array of `events` events like invoke_model_with_response_stream.
+
+    Text arrives in pieces of about `tokens_per_delta` tokens (4 characters
+    each), one every `seconds_per_token * tokens_per_delta` seconds.
+    """
+
+    def __init__(self, events, seconds_per_token, tokens_per_delta=4):
+        self.text = json.dumps([{
+            "startDate": f"2025-02-{day % 28 + 1:02d}T23:59:00-0500",
+            "endDate": f"2025-02-{day % 28 + 1:02d}T23:59:00-0500",
+            "eventTitle": f"Assignment {day + 1} due",
+            "eventDescription": "Submit on the course site",
+            "tags": ["productivity"],
+        } for day in range(events)], indent=1)
+        self.seconds_per_token = seconds_per_token
+        self.tokens_per_delta = tokens_per_delta
+
+    def _messages(self):
+        step = self.tokens_per_delta * 4
+        for start in range(0, len(self.text), step):
+            time.sleep(self.seconds_per_token * self.tokens_per_delta)
+            delta = {'type': 'content_block_delta', 'index': 0,
+                     'delta': {'type': 'text_delta', 'text': self.text[start:start + step]}}
+            yield {'chunk': {'bytes': json.dumps(delta).encode()}}
+        stop = {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}}
+        yield {'chunk': {'bytes': json.dumps(stop).encode()}}
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        return {'body': self._messages()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time to first event with streamed Bedrock output")
+    parser.add_argument('--events', type=int, default=30)
+    parser.add_argument('--seconds-per-token', type=float, default=0.007,
+                        help="simulated generation speed; Haiku is roughly 0.007")
+    args = parser.parse_args()
+
+    aws_clients._clients['bedrock-runtime'] = FakeStreamingBedrock(args.events, args.seconds_per_token)
+    arrivals = []
+    start = time.perf_counter()
+    events = bedrock_stream.stream_events("", "", ["document text"],
+                                          on_event=lambda event: arrivals.append(time.perf_counter() - start))
+    total = time.perf_counter() - start
+    print(f"{len(events)} events, generation took {total * 1000:8.0f} ms")
+    print(f"  blocking invoke_model: first event after {total * 1000:8.0f} ms")
+    print(f"  streamed:              first event after {arrivals[0] * 1000:8.0f} ms")
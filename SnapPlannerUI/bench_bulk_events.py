@@ -0,0 +1,83 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from fake_dynamodb import FakeDynamoDB
+
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('JWT_SECRET_KEY', 'bench')
+
+
+def syllabus_events(count, prefix):
+    """`count` review-shaped events, two a week like a course syllabus."""
+    first = datetime(2025, 1, 13, 10)
+    events = []
+    for number in range(count):
+        start = first + timedelta(days=7 * (number // 2) + 2 * (number % 2))
+        events.append({
+            'id': f"{prefix}{number:04d}",
+            'title': f"Lecture {number + 1}",
+            'start': start.strftime('%Y-%m-%dT%H:%M'),
+            'end': (start + timedelta(minutes=75)).strftime('%Y-%m-%dT%H:%M'),
+            'description': "Read the chapter beforehand",
+            'tags': 'productivity, school',
+        })
+    return events
+
+
+def summary_items(fake, username):
+    return {key: item for key, item in fake.items['EventSummaries'].items()
+            if item['user_id']['S'] == username}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accepting reviewed events one POST at a time vs POST /events/bulk")
+    parser.add_argument('--events', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help="simulated DynamoDB round-trip in seconds")
+    parser.add_argument('--batch-write-limit', type=int, default=None,
+                        help="writes the stand-in applies per BatchWriteItem, to exercise the retries")
+    args = parser.parse_args()
+
+    with FakeDynamoDB(latency=args.latency, batch_write_limit=args.batch_write_limit) as fake:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = fake.url
+        for username in ('warmup', 'single', 'bulk'):
+            fake.items['Users'][fake._key('Users', {'username': {'S': username}})] = {
+                'username': {'S': username}, 'password': {'S': 'x'}}
+
+        import FastAPI
+        import api
+        from fastapi.testclient import TestClient
+
+        with TestClient(FastAPI.app) as client:
+            # Let every DynamoDB worker thread build its client before timing
+            headers = {'Authorization': f"Bearer {api.create_access_token({'sub': 'warmup'})}"}
+            client.post('/events/bulk', json=syllabus_events(args.events, 'w'), headers=headers)
+
+            headers = {'Authorization': f"Bearer {api.create_access_token({'sub': 'single'})}"}
+            requests_before = fake.request_count
+            start = time.perf_counter()
+            for event in syllabus_events(args.events, 'e'):
+                client.post('/events/', json=event, headers=headers).raise_for_status()
+            single = time.perf_counter() - start
+            single_calls = fake.request_count - requests_before
+
+            headers = {'Authorization': f"Bearer {api.create_access_token({'sub': 'bulk'})}"}
+            requests_before = fake.request_count
+            start = time.perf_counter()
+            response = client.post('/events/bulk', json=syllabus_events(args.events, 'e'), headers=headers)
+            bulk = time.perf_counter() - start
+            bulk_calls = fake.request_count - requests_before
+            response.raise_for_status()
+            result = response.json()
+
+        print(f"{args.events} events, one POST each: {single * 1000:8.0f} ms  {single_calls:4d} DynamoDB calls")
+        print(f"{args.events} events, POST /events/bulk: {bulk * 1000:8.0f} ms  {bulk_calls:4d} DynamoDB calls  "
+              f"({result['written']} written, {result['failed']} failed)")
+        strip = lambda items: sorted((key[1:], sorted((k, v) for k, v in item.items() if k != 'user_id'))
+                                     for key, item in items.items())
+        same = strip(summary_items(fake, 'single')) == strip(summary_items(fake, 'bulk'))
+        print(f"summaries match: {same}")
@@ -0,0 +1,42 @@
+import argparse
+import os
+import time
+
+import boto3
+from dotenv import load_dotenv
+
+import aws_clients
+
+# Client creation needs a region and credentials, not a network round-trip
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+
+
+def per_call_client():
+    # What imageToEvents/pdfToEvents used to do on every upload
+    load_dotenv()
+    return boto3.client('lambda', region_name='us-east-1')
+
+
+def shared_client():
+    return aws_clients.lambda_client()
+
+
+def time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-upload overhead of getting a Lambda client")
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    before = time_per_call(per_call_client, args.iterations)
+    first = time_per_call(shared_client, 1)
+    after = time_per_call(shared_client, args.iterations)
+    print(f"load_dotenv + boto3.client per upload:  {before * 1000:8.3f} ms")
+    print(f"aws_clients.lambda_client(), first use: {first * 1000:8.3f} ms")
+    print(f"aws_clients.lambda_client(), after:     {after * 1000:8.3f} ms")
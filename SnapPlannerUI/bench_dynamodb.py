@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import os
+import time
+
+import boto3
+
+from dynamodb_async import AsyncDynamoDB
+from fake_dynamodb import FakeDynamoDB
+
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+
+
+async def run_load(call, requests, concurrency):
+    """Fire `requests` calls with at most `concurrency` in flight; return requests/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def benchmark(endpoint_url, requests, concurrency, workers):
+    region = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
+    blocking_table = boto3.resource('dynamodb', endpoint_url=endpoint_url, region_name=region).Table('Users')
+    blocking_table.put_item(Item={'username': 'bench', 'password': 'x'})
+
+    # aws_clients reads the endpoint when each worker thread builds its resource
+    os.environ['DYNAMODB_ENDPOINT_URL'] = endpoint_url
+    dynamodb = AsyncDynamoDB(max_workers=workers)
+    async_table = dynamodb.Table('Users')
+
+    async def blocking_get():
+        # What the routes used to do: a synchronous boto3 call inside `async def`
+        blocking_table.get_item(Key={'username': 'bench'})
+
+    async def async_get():
+        await async_table.get_item(Key={'username': 'bench'})
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(async_get())  # warm up the worker connections
+        blocking_rps = loop.run_until_complete(run_load(blocking_get, requests, concurrency))
+        async_rps = loop.run_until_complete(run_load(async_get, requests, concurrency))
+    finally:
+        loop.close()
+        dynamodb.shutdown()
+
+    print(f"{requests} get_item calls, concurrency {concurrency}, {workers} workers")
+    print(f"  blocking boto3 on the event loop: {blocking_rps:8.1f} req/s")
+    print(f"  AsyncDynamoDB thread pool:        {async_rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare blocking vs async DynamoDB access")
+    parser.add_argument('--endpoint-url', default=os.getenv('DYNAMODB_ENDPOINT_URL'),
+                        help="DynamoDB Local endpoint; defaults to an in-process stand-in")
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help="simulated round-trip in seconds for the in-process stand-in")
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        benchmark(args.endpoint_url, args.requests, args.concurrency, args.workers)
+    else:
+        with FakeDynamoDB(latency=args.latency) as fake:
+            benchmark(fake.url, args.requests, args.concurrency, args.workers)
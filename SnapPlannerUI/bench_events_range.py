@@ -0,0 +1,68 @@
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from fake_dynamodb import FakeDynamoDB
+
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('JWT_SECRET_KEY', 'bench')
+
+
+def seed_events(fake, username, count, days=365):
+    """Spread `count` one-hour events for `username` over `days` days starting 2025-01-01."""
+    rng = random.Random(0)
+    first = datetime(2025, 1, 1)
+    fake.items['Users'][fake._key('Users', {'username': {'S': username}})] = {
+        'username': {'S': username}, 'password': {'S': 'x'}}
+    for number in range(count):
+        start = first + timedelta(days=rng.randrange(days), hours=rng.randrange(8, 20))
+        item = {
+            'user_id': {'S': username},
+            'id': {'S': f"{number:08d}"},
+            'title': {'S': f"Event {number}"},
+            'start': {'S': start.strftime('%Y-%m-%dT%H:%M')},
+            'end': {'S': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M')},
+            'description': {'S': "Lecture, reading and assignment notes " * 3},
+            'tags': {'S': 'productivity'},
+        }
+        fake.items['Events'][fake._key('Events', item)] = item
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GET /events/ with and without a date range")
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help="simulated DynamoDB round-trip in seconds")
+    parser.add_argument('--page-kb', type=int, default=256,
+                        help="query page size of the stand-in (DynamoDB uses 1024)")
+    args = parser.parse_args()
+
+    with FakeDynamoDB(latency=args.latency, page_bytes=args.page_kb * 1024) as fake:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = fake.url
+        seed_events(fake, 'bench', args.events)
+
+        import FastAPI
+        import api
+        from fastapi.testclient import TestClient
+
+        token = api.create_access_token({'sub': 'bench'})
+        headers = {'Authorization': f"Bearer {token}"}
+        with TestClient(FastAPI.app) as client:
+            # Verify the token once so the counts below are Events queries only
+            client.get('/events/', params={'start': '2024-01-01', 'end': '2024-01-02'}, headers=headers)
+            for label, params in [
+                ('everything', {}),
+                ('month view', {'start': '2025-02-23T00:00:00-05:00', 'end': '2025-04-06T00:00:00-04:00'}),
+                ('week view', {'start': '2025-03-09T00:00:00-05:00', 'end': '2025-03-16T00:00:00-04:00'}),
+            ]:
+                requests_before = fake.request_count
+                start = time.perf_counter()
+                response = client.get('/events/', params=params, headers=headers)
+                elapsed = time.perf_counter() - start
+                response.raise_for_status()
+                print(f"{label:11s} {len(response.json()):6d} events  {len(response.content) / 1024:8.1f} KB  "
+                      f"{fake.request_count - requests_before:3d} queries  {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,60 @@
+import argparse
+import glob
+import os
+import time
+from io import BytesIO
+
+from PIL import Image
+
+from image_processor import prepare_image
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'SampleImages')
+
+
+def quality_loop(image_path, max_bytes):
+    # What imageToEvents used to do: full-resolution re-encodes from quality 100 down by 5
+    encodes = 0
+    with open(image_path, 'rb') as f:
+        data = f.read()
+    if len(data) > max_bytes:
+        img = Image.open(BytesIO(data))
+        quality = 100
+        while quality > 10:
+            buffer = BytesIO()
+            img.save(buffer, format='JPEG', quality=quality, optimize=True)
+            encodes += 1
+            if buffer.tell() <= max_bytes:
+                data = buffer.getvalue()
+                break
+            quality -= 5
+    return len(data), encodes
+
+
+def pipeline(image_path, max_bytes):
+    with prepare_image(image_path, max_bytes=max_bytes) as source:
+        return len(source.read()), None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare image preprocessing on SampleImages/")
+    parser.add_argument('images', nargs='*', help="images to process; defaults to SampleImages/*.jpg")
+    parser.add_argument('--max-mb', type=float, default=4.5,
+                        help="payload limit; lower it to force the old quality loop to run")
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_mb * 1024 * 1024)
+    images = args.images or sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+    totals = {'quality loop': [0, 0], 'prepare_image': [0, 0]}
+    for path in images:
+        print(f"{os.path.basename(path)} ({os.path.getsize(path) / 1024:.0f} KB)")
+        for name, func in [('quality loop', quality_loop), ('prepare_image', pipeline)]:
+            start = time.perf_counter()
+            size, encodes = func(path, max_bytes)
+            elapsed = time.perf_counter() - start
+            totals[name][0] += elapsed
+            totals[name][1] += size
+            detail = f", {encodes} encodes" if encodes is not None else ""
+            print(f"  {name:14s} {elapsed * 1000:8.1f} ms  {size / 1024:8.0f} KB{detail}")
+    print("Totals")
+    for name, (elapsed, size) in totals.items():
+        print(f"  {name:14s} {elapsed * 1000:8.1f} ms  {size / 1024:8.0f} KB")
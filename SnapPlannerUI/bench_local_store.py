@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlite_store import SQLiteStore
+
+
+class JsonFileStore:
+    """What FastAPI_local.py used to do: load the whole events.json, filter, rewrite it."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                return json.load(f)
+        return []
+
+    def query_events(self, username, lower=None, upper=None):
+        return [event for event in self.load() if event.get('user_id') == username]
+
+    def put_event(self, username, event):
+        events = self.load()
+        events.append({**event, 'user_id': username})
+        with open(self.path, 'w') as f:
+            json.dump(events, f)
+
+
+def make_event(number, rng):
+    start = datetime(2025, 1, 1) + timedelta(days=rng.randrange(365), hours=rng.randrange(8, 20))
+    return {
+        'id': f"{number:08d}",
+        'title': f"Event {number}",
+        'start': start.strftime('%Y-%m-%dT%H:%M'),
+        'end': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+        'description': "Lecture, reading and assignment notes",
+        'tags': 'productivity',
+    }
+
+
+def seed(store, users, events):
+    rng = random.Random(0)
+    if isinstance(store, JsonFileStore):
+        with open(store.path, 'w') as f:
+            json.dump([{**make_event(number, rng), 'user_id': f"user{number % users}"}
+                       for number in range(events)], f)
+        return
+    for user in range(users):
+        store.put_events(f"user{user}", [make_event(number, rng) for number in range(user, events, users)])
+
+
+def time_reads(store, requests):
+    start = time.perf_counter()
+    for number in range(requests):
+        store.query_events('user0', '2025-03-02', '2025-03-09')
+    return (time.perf_counter() - start) / requests * 1000
+
+
+def lost_writes(store, writers, per_writer):
+    """Create events from `writers` threads at once and count how many did not survive."""
+    rng = random.Random(1)
+    events = [make_event(10 ** 7 + number, rng) for number in range(writers * per_writer)]
+    before = len(store.query_events('racer'))
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        for number in range(writers):
+            pool.submit(lambda batch: [store.put_event('racer', event) for event in batch],
+                        events[number::writers])
+    return len(events) - (len(store.query_events('racer')) - before)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FastAPI_local.py storage: events.json vs SQLite")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=25, help="events each writer creates")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, store in [('events.json', JsonFileStore(os.path.join(directory, 'events.json'))),
+                             ('SQLite (WAL)', SQLiteStore(os.path.join(directory, 'snapplanner.db')))]:
+            seed(store, args.users, args.events)
+            read_ms = time_reads(store, args.requests)
+            try:
+                lost = lost_writes(store, args.writers, args.writes)
+            except ValueError:
+                # A reader caught the file half-written
+                lost = 'file corrupted, all'
+            print(f"{label:13s} week query {read_ms:8.2f} ms  "
+                  f"{args.writers} concurrent writers: {lost} of {args.writers * args.writes} events lost")
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import os
+import time
+
+from fastapi.security import OAuth2PasswordRequestForm
+from starlette.requests import Request
+
+os.environ.setdefault('JWT_SECRET_KEY', 'bench')
+
+import api
+from password_hashing import PasswordHasher, password_context
+from storage import MemoryStorage
+
+
+class InlineHasher:
+    """The old way: passlib called straight from the async handler, on the event loop."""
+
+    def __init__(self, context):
+        self.context = context
+
+    async def hash(self, password):
+        return self.context.hash(password)
+
+    async def verify_and_update(self, password, hashed):
+        return self.context.verify_and_update(password, hashed)
+
+    async def dummy_verify(self):
+        self.context.dummy_verify()
+
+
+async def run(hasher, storage, logins, tick):
+    """Run `logins` concurrent logins while a ticker measures how late the event loop wakes it."""
+    api.password_hasher = hasher
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - start - tick)
+
+    async def login(number):
+        request = Request({'type': 'http', 'client': (f"10.0.0.{number % 250}", 0), 'headers': []})
+        form = OAuth2PasswordRequestForm(username='bench', password='bench', scope='')
+        await api.login_for_access_token(request, form, storage)
+
+    ticking = asyncio.ensure_future(ticker())
+    await asyncio.sleep(tick * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(login(number) for number in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticking
+    lags.sort()
+    return logins / elapsed, lags[len(lags) // 2] * 1000, lags[-1] * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login throughput and event-loop lag, inline vs pooled hashing")
+    parser.add_argument('--logins', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt cost")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--tick', type=float, default=0.01, help="ticker interval in seconds")
+    args = parser.parse_args()
+
+    context = password_context(args.rounds)
+    storage = MemoryStorage()
+    storage.users['bench'] = {'username': 'bench', 'password': context.hash('bench'), 'email': None}
+    print(f"bcrypt cost {args.rounds}, {args.logins} concurrent logins, {os.cpu_count()} CPUs")
+    for label, hasher in [('inline', InlineHasher(context)),
+                          (f"pool of {args.workers}", PasswordHasher(context, workers=args.workers))]:
+        throughput, lag_p50, lag_max = asyncio.run(run(hasher, storage, args.logins, args.tick))
+        print(f"{label:10s} {throughput:6.2f} logins/s  event-loop lag p50 {lag_p50:7.1f} ms  max {lag_max:7.1f} ms")
@@ -0,0 +1,92 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fake_dynamodb import FakeDynamoDB
+
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+os.environ.setdefault('JWT_SECRET_KEY', 'bench')
+
+WEEK = {'start': '2025-03-09T00:00:00', 'end': '2025-03-16T00:00:00'}
+
+
+def semester(count, rng):
+    """`count` one-hour events spread over 2025 for POST /events/bulk."""
+    first = datetime(2025, 1, 1)
+    events = []
+    for number in range(count):
+        start = first + timedelta(days=rng.randrange(365), hours=rng.randrange(8, 20))
+        events.append({
+            'id': f"{number:08d}",
+            'title': f"Event {number}",
+            'start': start.strftime('%Y-%m-%dT%H:%M'),
+            'end': (start + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'description': "Lecture, reading and assignment notes",
+            'tags': 'productivity, school',
+        })
+    return events
+
+
+def load_test(client, headers, requests, rng):
+    """Calendar traffic: mostly week views and summaries, some edits. Returns mean ms per request."""
+    start = time.perf_counter()
+    for number in range(requests):
+        roll = rng.random()
+        if roll < 0.6:
+            client.get('/events/', params=WEEK, headers=headers).raise_for_status()
+        elif roll < 0.9:
+            client.get('/summary', params={**WEEK, 'granularity': 'week'}, headers=headers).raise_for_status()
+        else:
+            client.post('/events/', headers=headers, json={
+                'id': f"edit{number}", 'title': "Office hours", 'start': '2025-03-11T15:00',
+                'end': '2025-03-11T16:00', 'tags': 'school'}).raise_for_status()
+    return (time.perf_counter() - start) / requests * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="The same API load test against each Storage backend")
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help="simulated DynamoDB round-trip in seconds")
+    parser.add_argument('--cache-ttl', type=int, default=30, help="TTL of the CachingStorage runs")
+    args = parser.parse_args()
+
+    with FakeDynamoDB(latency=args.latency) as fake, tempfile.TemporaryDirectory() as directory:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = fake.url
+        from fastapi.testclient import TestClient
+
+        import api
+        from sqlite_store import SQLiteStore
+        from storage import CachingStorage, DynamoDBStorage, MemoryStorage, SQLiteStorage
+
+        backends = [
+            ('memory', MemoryStorage),
+            ('sqlite', lambda: SQLiteStorage(SQLiteStore(os.path.join(directory, 'bench.db')))),
+            ('dynamodb', DynamoDBStorage),
+        ]
+        for name, make in backends:
+            for cached in (False, True):
+                storage = make()
+                if cached:
+                    storage = CachingStorage(storage, ttl=args.cache_ttl)
+                # Start every run with a cold principal cache and a fresh user
+                api.principal_cache = api.PrincipalCache()
+                username = f"{name}{'-cached' if cached else ''}"
+                with TestClient(api.create_app(storage)) as client:
+                    client.post('/auth/register', json={'username': username, 'password': 'bench'}).raise_for_status()
+                    token = client.post('/auth/token', data={'username': username, 'password': 'bench'}).json()
+                    headers = {'Authorization': f"Bearer {token['access_token']}"}
+                    events = semester(args.events, random.Random(0))
+                    for first in range(0, len(events), api.BULK_EVENTS_MAX):
+                        client.post('/events/bulk', json=events[first:first + api.BULK_EVENTS_MAX],
+                                    headers=headers).raise_for_status()
+                    mean_ms = load_test(client, headers, args.requests, random.Random(1))
+                label = f"{name}{' + cache' if cached else ''}"
+                hit_rate = f"  cache hit rate {storage.stats()['hit_rate']:.0%}" if cached else ''
+                print(f"{label:18s} {mean_ms:7.2f} ms/request{hit_rate}")
@@ -0,0 +1,71 @@
+import argparse
+import base64
+import io
+import json
+import os
+import time
+
+from fake_s3 import FakeS3
+
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+
+# Largest synchronous invoke payload Lambda accepts
+LAMBDA_PAYLOAD_LIMIT = 6 * 1024 * 1024
+
+
+class PayloadLambda:
+    """Stands in for SnapPlannerFunction: gets the file back out of the payload like lambda_handler does."""
+
+    def __init__(self, s3):
+        self.s3 = s3
+        self.payload_bytes = 0
+
+    def invoke(self, FunctionName, Payload):
+        raw = Payload if isinstance(Payload, bytes) else Payload.read()
+        self.payload_bytes = len(raw)
+        body = json.loads(raw)['body']
+        staged = body.get('s3')
+        if staged:
+            data = self.s3.get_object(Bucket=staged['bucket'], Key=staged['key'])['Body'].read()
+        else:
+            data = base64.b64decode(body['pdf'])
+        result = json.dumps({'body': json.dumps({'bytes': len(data)})}).encode('utf-8')
+        return {'Payload': io.BytesIO(result)}
+
+
+def run(size, bucket, rounds):
+    """Mean ms for one PDF round trip through invoke_extraction, and the invoke payload's size."""
+    data = os.urandom(size)
+    fake_lambda.payload_bytes = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = lambda_payload.invoke_extraction(io.BytesIO(data), 'pdf', bucket=bucket)
+        assert json.loads(result['body'])['bytes'] == size
+    return (time.perf_counter() - start) / rounds * 1000, fake_lambda.payload_bytes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Base64-in-JSON vs S3-staged uploads to the Lambda")
+    parser.add_argument('--size-mb', type=float, nargs='*', default=[1, 4, 20])
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with FakeS3() as fake:
+        os.environ['S3_ENDPOINT_URL'] = fake.url
+        import aws_clients
+        import lambda_payload
+
+        fake_lambda = PayloadLambda(aws_clients.s3_client())
+        aws_clients._clients['lambda'] = fake_lambda
+        # Build the S3 client outside the timed runs
+        run(1024, 'bench', 1)
+
+        for size_mb in args.size_mb:
+            size = int(size_mb * 1024 * 1024)
+            for label, bucket in (('base64', None), ('staged', 'bench')):
+                elapsed, payload = run(size, bucket, args.rounds)
+                limit = '  over the 6 MB invoke limit' if payload > LAMBDA_PAYLOAD_LIMIT else ''
+                print(f"{size_mb:5.1f} MB {label:7s} {elapsed:8.1f} ms  payload {payload / 1024:9.1f} KB{limit}")
+        assert not fake.objects, "staged uploads were not deleted"
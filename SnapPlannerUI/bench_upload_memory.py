@@ -0,0 +1,59 @@
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from lambda_payload import build_payload
+
+
+def old_payload(path):
+    # What imageToEvents/pdfToEvents used to do before invoking Lambda
+    with open(path, 'rb') as f:
+        data = f.read()
+    encoded = base64.b64encode(data).decode('utf-8')
+    return json.dumps({'body': {'pdf': encoded}}).encode('utf-8')
+
+
+def streamed_payload(path):
+    with open(path, 'rb') as f:
+        payload = build_payload(f, 'pdf')
+    # Drain it the way botocore sends a file-like body
+    with payload:
+        for chunk in iter(lambda: payload.read(64 * 1024), b''):
+            pass
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of building a Lambda payload for one upload")
+    parser.add_argument('path', nargs='?', help="file to encode; defaults to a random file of --size-mb")
+    parser.add_argument('--size-mb', type=int, default=20)
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(args.size_mb * 1024 * 1024))
+
+    try:
+        size = os.path.getsize(path)
+        print(f"{size / 1024 / 1024:.1f} MB upload")
+        for name, func in [('read + b64encode + json.dumps', old_payload), ('streamed build_payload', streamed_payload)]:
+            peak, elapsed = measure(func, path)
+            print(f"  {name:32s} peak {peak / 1024 / 1024:7.1f} MB  ({peak / size:4.2f}x file)  {elapsed * 1000:7.1f} ms")
+    finally:
+        if args.path is None:
+            os.remove(path)
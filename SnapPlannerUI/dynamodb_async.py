@@ -0,0 +1,154 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+
+# Number of DynamoDB calls that may be in flight at once
+DYNAMODB_MAX_WORKERS = int(os.getenv('DYNAMODB_MAX_WORKERS', '16'))
+# Most writes BatchWriteItem accepts in one request, and keys BatchGetItem accepts
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+# Times unprocessed batch items are retried (with exponential backoff) before giving up
+BATCH_RETRIES = int(os.getenv('DYNAMODB_BATCH_RETRIES', '5'))
+BATCH_BACKOFF = 0.05
+
+
+class AsyncDynamoDB:
+    """Awaitable wrapper around a boto3 DynamoDB resource.
+
+    Every call runs on a bounded thread pool so a slow DynamoDB round-trip
+    never blocks the event loop. Each worker thread reuses its own resource
+    (and HTTP connection pool) from aws_clients for the life of the process.
+    """
+
+    def __init__(self, max_workers=DYNAMODB_MAX_WORKERS):
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dynamodb')
+
+    def resource(self):
+        """Return the calling thread's boto3 resource."""
+        return aws_clients.dynamodb_resource()
+
+    def sync_table(self, name):
+        """Return the calling thread's cached boto3 Table for `name`."""
+        tables = getattr(self._local, 'tables', None)
+        if tables is None:
+            tables = self._local.tables = {}
+        table = tables.get(name)
+        if table is None:
+            table = tables[name] = self.resource().Table(name)
+        return table
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the DynamoDB thread pool."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def Table(self, name):
+        return AsyncTable(self, name)
+
+    async def table_names(self):
+        return await self.run(lambda: [table.name for table in self.resource().tables.all()])
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class AsyncTable:
+    """Async counterpart of boto3's Table exposing the methods the routes use."""
+
+    def __init__(self, db, name):
+        self._db = db
+        self.name = name
+
+    async def _call(self, method, **kwargs):
+        def call():
+            return getattr(self._db.sync_table(self.name), method)(**kwargs)
+        return await self._db.run(call)
+
+    async def get_item(self, **kwargs):
+        return await self._call('get_item', **kwargs)
+
+    async def put_item(self, **kwargs):
+        return await self._call('put_item', **kwargs)
+
+    async def update_item(self, **kwargs):
+        return await self._call('update_item', **kwargs)
+
+    async def delete_item(self, **kwargs):
+        return await self._call('delete_item', **kwargs)
+
+    async def query(self, **kwargs):
+        return await self._call('query', **kwargs)
+
+    async def scan(self, **kwargs):
+        return await self._call('scan', **kwargs)
+
+    async def query_pages(self, **kwargs):
+        """Yield the Items of each page of a query, following LastEvaluatedKey."""
+        while True:
+            response = await self.query(**kwargs)
+            yield response['Items']
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    async def batch_get(self, keys):
+        """Return the items that exist for `keys`, BATCH_GET_SIZE keys per BatchGetItem."""
+        def get_all():
+            resource = self._db.resource()
+            items = []
+            for first in range(0, len(keys), BATCH_GET_SIZE):
+                request = {self.name: {'Keys': keys[first:first + BATCH_GET_SIZE]}}
+                for attempt in range(BATCH_RETRIES + 1):
+                    response = resource.batch_get_item(RequestItems=request)
+                    items.extend(response['Responses'].get(self.name, []))
+                    request = response.get('UnprocessedKeys')
+                    if not request:
+                        break
+                    time.sleep(BATCH_BACKOFF * 2 ** attempt)
+                else:
+                    raise RuntimeError(f"BatchGetItem left {len(request[self.name]['Keys'])} keys unprocessed")
+            return items
+        return await self._db.run(get_all)
+
+    async def batch_put(self, items, key_attributes):
+        """Put `items` BATCH_WRITE_SIZE at a time, retrying unprocessed ones with backoff.
+
+        This is the protocol boto3's batch_writer() follows, done here so the
+        caller learns which items failed instead of getting one exception for
+        all of them. Returns {index in items: error message} for the failures;
+        the keys (`key_attributes` of each item) must be unique within `items`.
+        """
+        def item_key(item):
+            return tuple(item[attribute] for attribute in key_attributes)
+
+        def put_all():
+            resource = self._db.resource()
+            failed = {}
+            for first in range(0, len(items), BATCH_WRITE_SIZE):
+                pending = {item_key(item): first + offset
+                           for offset, item in enumerate(items[first:first + BATCH_WRITE_SIZE])}
+                requests = [{'PutRequest': {'Item': items[index]}} for index in pending.values()]
+                for attempt in range(BATCH_RETRIES + 1):
+                    try:
+                        response = resource.batch_write_item(RequestItems={self.name: requests})
+                    except ClientError as e:
+                        failed.update({index: str(e) for index in pending.values()})
+                        break
+                    requests = response.get('UnprocessedItems', {}).get(self.name, [])
+                    if not requests:
+                        break
+                    unprocessed = {item_key(request['PutRequest']['Item']) for request in requests}
+                    pending = {key: index for key, index in pending.items() if key in unprocessed}
+                    time.sleep(BATCH_BACKOFF * 2 ** attempt)
+                else:
+                    failed.update({index: "Throttled: still unprocessed after retries" for index in pending.values()})
+            return failed
+        return await self._db.run(put_all)
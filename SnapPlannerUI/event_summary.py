@@ -0,0 +1,167 @@
+import math
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+# Per-user, per-day tag-hour aggregates maintained alongside Events
+SUMMARY_TABLE = 'EventSummaries'
+# Hours the calendar can hold for each summary granularity (month depends on the range)
+GRANULARITY_HOURS = {'day': 24, 'week': 7 * 24}
+
+MS_PER_HOUR = 60 * 60 * 1000
+ONE_MS = timedelta(milliseconds=1)
+
+# Attributes of a summary item: everything that starts that day, and the part
+# of it starting exactly at midnight (a range ending at that midnight still
+# includes those, like the calendar's inclusive end check)
+TOTAL = 'ms'
+TAG_PREFIX = 'tag:'
+MIDNIGHT_TOTAL = 'midnight_ms'
+MIDNIGHT_TAG_PREFIX = 'midnight_tag:'
+
+
+def parse_time(value):
+    """Parse the ISO strings events are stored with ('2025-02-03', '2025-02-03T10:00', '...-0500')."""
+    if not value:
+        return None
+    value = re.sub(r'([+-]\d{2})(\d{2})$', r'\1:\2', value.strip()).replace('Z', '+00:00')
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def event_contribution(event):
+    """Return what an event adds to its start day's summary, or None if it adds nothing.
+
+    Mirrors the calendar's old client-side math: duration is end minus start
+    (0 without an end) and counts toward the scheduled total and each of the
+    event's comma-separated tags. Durations are kept in whole milliseconds
+    so aggregates add up exactly.
+    """
+    start = parse_time(event.get('start'))
+    end = parse_time(event.get('end'))
+    if start is None or end is None:
+        return None
+    if (start.tzinfo is None) != (end.tzinfo is None):
+        # Read the wall time without an offset in the other one's zone
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=end.tzinfo)
+        else:
+            end = end.replace(tzinfo=start.tzinfo)
+    ms = (end - start) // ONE_MS
+    if ms <= 0:
+        # FullCalendar drops an end that is not after the start, leaving no duration
+        return None
+
+    tags = Counter()
+    for tag in (event.get('tags') or '').split(','):
+        if tag.strip():
+            tags[tag.strip()] += ms
+    return {
+        'day': start.strftime('%Y-%m-%d'),
+        'midnight': start.time() == datetime.min.time(),
+        'ms': ms,
+        'tags': tags,
+    }
+
+
+def _deltas(contribution):
+    deltas = {TOTAL: contribution['ms']}
+    deltas.update({TAG_PREFIX + tag: ms for tag, ms in contribution['tags'].items()})
+    if contribution['midnight']:
+        deltas[MIDNIGHT_TOTAL] = contribution['ms']
+        deltas.update({MIDNIGHT_TAG_PREFIX + tag: ms for tag, ms in contribution['tags'].items()})
+    return deltas
+
+
+def summary_update(username, day, deltas):
+    """update_item arguments that ADD `deltas` (attribute -> ms) to a user's day."""
+    names, values, clauses = {}, {}, []
+    for number, (attribute, delta) in enumerate(deltas.items()):
+        names[f'#a{number}'] = attribute
+        values[f':v{number}'] = delta
+        clauses.append(f'#a{number} :v{number}')
+    return {
+        'Key': {'user_id': username, 'day': day},
+        'UpdateExpression': 'ADD ' + ', '.join(clauses),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+    }
+
+
+def batch_summary_updates(username, changes):
+    """update_item arguments for several (old_event, new_event) changes, one per day touched.
+
+    Either event of a change may be None (a create or a delete). Changes
+    that cancel out, such as an edit that leaves the times and tags alone,
+    produce no update.
+    """
+    days = defaultdict(Counter)
+    for old_event, new_event in changes:
+        for event, sign in ((old_event, -1), (new_event, 1)):
+            contribution = event_contribution(event) if event else None
+            if contribution is not None:
+                for attribute, ms in _deltas(contribution).items():
+                    days[contribution['day']][attribute] += sign * ms
+    updates = []
+    for day, deltas in days.items():
+        deltas = {attribute: delta for attribute, delta in deltas.items() if delta}
+        if deltas:
+            updates.append(summary_update(username, day, deltas))
+    return updates
+
+
+def summary_updates(username, old_event=None, new_event=None):
+    """update_item arguments that move the summaries from old_event to new_event (either may be None)."""
+    return batch_summary_updates(username, [(old_event, new_event)])
+
+
+def summary_items(username, events):
+    """The EventSummaries items `events` add up to, for stores that compute summaries on read."""
+    items = []
+    for update in batch_summary_updates(username, [(None, event) for event in events]):
+        names = update['ExpressionAttributeNames']
+        item = dict(update['Key'])
+        for placeholder, value in update['ExpressionAttributeValues'].items():
+            item[names['#a' + placeholder[2:]]] = value
+        items.append(item)
+    return items
+
+
+def available_hours(granularity, start, end):
+    """Hours in the range, as the calendar counts them for each view."""
+    if granularity == 'month':
+        return math.ceil((end - start) / timedelta(days=1)) * 24
+    return GRANULARITY_HOURS[granularity]
+
+
+def summarize(items, start, end, granularity):
+    """Build the summary for [start, end] from the EventSummaries items of those days.
+
+    `start` and `end` are the view's first and last instants (local midnights).
+    Days before end's day count in full; on end's day only events starting
+    exactly at midnight count.
+    """
+    end_day = end.strftime('%Y-%m-%d')
+    total_ms = 0
+    tag_ms = {}
+    for item in sorted(items, key=lambda item: item['day']):
+        if item['day'] < end_day:
+            total_key, tag_prefix = TOTAL, TAG_PREFIX
+        elif item['day'] == end_day and end.time() == datetime.min.time():
+            total_key, tag_prefix = MIDNIGHT_TOTAL, MIDNIGHT_TAG_PREFIX
+        else:
+            continue
+        total_ms += int(item.get(total_key, 0))
+        for attribute in sorted(item):
+            if attribute.startswith(tag_prefix):
+                tag = attribute[len(tag_prefix):]
+                tag_ms[tag] = tag_ms.get(tag, 0) + int(item[attribute])
+
+    scheduled = total_ms / MS_PER_HOUR
+    return {
+        'tagHours': {tag: ms / MS_PER_HOUR for tag, ms in tag_ms.items() if ms > 0},
+        'scheduledHours': scheduled,
+        'unscheduledHours': available_hours(granularity, start, end) - scheduled,
+    }
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+import aws_clients
+from botocore.exceptions import ClientError
+
+# Bump whenever the Lambda prompt or Bedrock model changes so stale extractions are not served
+EXTRACTION_VERSION = os.getenv('EXTRACTION_VERSION', 'anthropic.claude-3-haiku-20240307-v1:0/prompt-1')
+# memory, disk, dynamodb or off
+EXTRACTION_CACHE_BACKEND = os.getenv('EXTRACTION_CACHE_BACKEND', 'memory')
+EXTRACTION_CACHE_TTL = int(os.getenv('EXTRACTION_CACHE_TTL', str(24 * 60 * 60)))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', '512'))
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv('EXTRACTION_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+EXTRACTION_CACHE_DIR = os.getenv('EXTRACTION_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'cache'))
+EXTRACTION_CACHE_TABLE = os.getenv('EXTRACTION_CACHE_TABLE', 'ExtractionCache')
+# UTC offset of the day the Lambda resolves relative dates in (EST); keys are per day in that zone.
+# The Lambda reads the same setting, and deploy_lambda_with_deps.py copies it there from .env
+EXTRACTION_UTC_OFFSET_HOURS = float(os.getenv('EXTRACTION_UTC_OFFSET_HOURS', '-5'))
+
+
+class MemoryCacheBackend:
+    """In-process LRU holding at most `max_entries` values."""
+
+    def __init__(self, max_entries=EXTRACTION_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskCacheBackend:
+    """One JSON file per key, evicting least recently used files past `max_bytes`."""
+
+    def __init__(self, directory=EXTRACTION_CACHE_DIR, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry['expires'] < time.time():
+            self._remove(path)
+            return None
+        # mtime doubles as the last-access time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            # Evicted since it was read; the value is still good for this lookup
+            pass
+        return entry['value']
+
+    def set(self, key, value, ttl):
+        path = self._path(key)
+        data = json.dumps({'expires': time.time() + ttl, 'value': value})
+        with self._lock:
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def _evict(self):
+        entries = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')),
+                         key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self._size -= size
+
+
+class DynamoDBCacheBackend:
+    """Shared cache in a DynamoDB table (see setup_db.py); expiry uses the table's TTL attribute."""
+
+    def __init__(self, table_name=EXTRACTION_CACHE_TABLE):
+        self.table_name = table_name
+        # Low-level clients are thread-safe, unlike resources
+        self._client = aws_clients.dynamodb_client()
+
+    def get(self, key):
+        try:
+            response = self._client.get_item(TableName=self.table_name, Key={'hash': {'S': key}})
+        except ClientError:
+            return None
+        item = response.get('Item')
+        # DynamoDB TTL deletion can lag by hours, so check expiry ourselves too
+        if item is None or float(item['expires']['N']) < time.time():
+            return None
+        return json.loads(item['value']['S'])
+
+    def set(self, key, value, ttl):
+        try:
+            self._client.put_item(TableName=self.table_name, Item={
+                'hash': {'S': key},
+                'expires': {'N': str(int(time.time() + ttl))},
+                'value': {'S': json.dumps(value)},
+            })
+        except ClientError:
+            pass
+
+
+class ExtractionCache:
+    """Caches extracted events by the SHA-256 of the uploaded bytes.
+
+    The key also covers the file kind, EXTRACTION_VERSION and today's date,
+    because the Lambda prompt includes the current date and relative dates
+    ("next Friday") resolve differently from one day to the next.
+    """
+
+    def __init__(self, backend, ttl=EXTRACTION_CACHE_TTL, version=EXTRACTION_VERSION):
+        self.backend = backend
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, digest, kind):
+        today = datetime.now(timezone(timedelta(hours=EXTRACTION_UTC_OFFSET_HOURS))).strftime('%Y-%m-%d')
+        return hashlib.sha256(f"{digest}:{kind}:{self.version}:{today}".encode()).hexdigest()
+
+    def get(self, digest, kind):
+        value = self.backend.get(self.key(digest, kind))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, digest, kind, value):
+        self.backend.set(self.key(digest, kind), value, self.ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def cache_from_env():
+    """Build the cache selected by EXTRACTION_CACHE_BACKEND, or None when it is 'off'."""
+    backends = {
+        'memory': MemoryCacheBackend,
+        'disk': DiskCacheBackend,
+        'dynamodb': DynamoDBCacheBackend,
+    }
+    if EXTRACTION_CACHE_BACKEND == 'off':
+        return None
+    if EXTRACTION_CACHE_BACKEND not in backends:
+        raise ValueError(f"Unknown EXTRACTION_CACHE_BACKEND: {EXTRACTION_CACHE_BACKEND}")
+    return ExtractionCache(backends[EXTRACTION_CACHE_BACKEND]())
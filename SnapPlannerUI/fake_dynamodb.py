@@ -0,0 +1,290 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Key attributes of the tables created by setup_db.py
+DEFAULT_TABLES = {
+    'Users': ['username'],
+    'Events': ['user_id', 'id'],
+    'ExtractionCache': ['hash'],
+    'EventSummaries': ['user_id', 'day'],
+}
+# Global secondary indexes (hash, range) by table
+DEFAULT_INDEXES = {
+    'Events': {'user_id-start-index': ['user_id', 'start'], 'user_id-long_end-index': ['user_id', 'long_end']},
+}
+# DynamoDB stops a Query page after this much data and returns LastEvaluatedKey
+QUERY_PAGE_BYTES = 1024 * 1024
+
+
+class _ConditionalCheckFailed(Exception):
+    pass
+
+
+def _value(attr):
+    """Turn a typed DynamoDB attribute ({'S': 'x'}, {'N': '1'}) into something comparable."""
+    (kind, value), = attr.items()
+    if kind == 'N':
+        return float(value)
+    return value
+
+
+class FakeDynamoDB:
+    """In-process DynamoDB stand-in for local load tests and benchmarks.
+
+    Speaks enough of the DynamoDB JSON protocol for the calls SnapPlanner makes
+    (GetItem, PutItem, UpdateItem, DeleteItem, Query, BatchGetItem,
+    BatchWriteItem, ListTables) and can add an artificial per-request latency
+    to mimic a real network round-trip. Queries can use an index and are
+    paginated like the real thing. `batch_write_limit` caps the writes each
+    BatchWriteItem applies, returning the rest as UnprocessedItems the way
+    a throttled table does. Point boto3 at it with
+    `endpoint_url=fake.url` (or DYNAMODB_ENDPOINT_URL for the app).
+    """
+
+    def __init__(self, tables=None, indexes=None, latency=0.0, host='127.0.0.1', port=0,
+                 page_bytes=QUERY_PAGE_BYTES, batch_write_limit=None):
+        self.latency = latency
+        self.page_bytes = page_bytes
+        self.batch_write_limit = batch_write_limit
+        self.key_schema = dict(tables or DEFAULT_TABLES)
+        self.index_schema = dict(DEFAULT_INDEXES if indexes is None else indexes)
+        self.items = {name: {} for name in self.key_schema}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                operation = self.headers.get('X-Amz-Target', '').split('.')[-1]
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, result = fake.dispatch(operation, body)
+                payload = json.dumps(result).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/x-amz-json-1.0')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def dispatch(self, operation, body):
+        handler = getattr(self, f"_op_{operation}", None)
+        if handler is None:
+            return 400, {'__type': 'com.amazon.coral.validate#ValidationException',
+                         'message': f"Unsupported operation {operation}"}
+        table = body.get('TableName')
+        if table is not None and table not in self.items:
+            return 400, {'__type': 'com.amazonaws.dynamodb.v20120810#ResourceNotFoundException',
+                         'message': 'Requested resource not found'}
+        with self._lock:
+            self.request_count += 1
+            try:
+                return 200, handler(body)
+            except ValueError as e:
+                return 400, {'__type': 'com.amazon.coral.validate#ValidationException', 'message': str(e)}
+            except _ConditionalCheckFailed:
+                return 400, {'__type': 'com.amazonaws.dynamodb.v20120810#ConditionalCheckFailedException',
+                             'message': 'The conditional request failed'}
+
+    def _key(self, table, item):
+        return tuple(json.dumps(item[name], sort_keys=True) for name in self.key_schema[table])
+
+    def _op_ListTables(self, body):
+        return {'TableNames': sorted(self.items)}
+
+    def _op_GetItem(self, body):
+        item = self.items[body['TableName']].get(self._key(body['TableName'], body['Key']))
+        return {'Item': item} if item is not None else {}
+
+    def _op_PutItem(self, body):
+        table = body['TableName']
+        old = self.items[table].get(self._key(table, body['Item']))
+        condition = body.get('ConditionExpression')
+        if condition is not None:
+            # Only attribute_not_exists(key), the create-if-absent check SnapPlanner uses
+            if not re.fullmatch(r'attribute_not_exists\(\S+\)', condition.strip()):
+                raise ValueError(f"Unsupported condition expression {condition}")
+            if old is not None:
+                raise _ConditionalCheckFailed()
+        self.items[table][self._key(table, body['Item'])] = body['Item']
+        if old is not None and body.get('ReturnValues') == 'ALL_OLD':
+            return {'Attributes': old}
+        return {}
+
+    def _op_UpdateItem(self, body):
+        # Only ADD on top-level number attributes, which is all SnapPlanner uses
+        table = body['TableName']
+        names = body.get('ExpressionAttributeNames', {})
+        values = body.get('ExpressionAttributeValues', {})
+        expression = body['UpdateExpression'].strip()
+        if not expression.startswith('ADD '):
+            raise ValueError(f"Unsupported update expression {expression}")
+        key = self._key(table, body['Key'])
+        item = self.items[table].get(key)
+        old = dict(item) if item is not None else None
+        item = dict(item or body['Key'])
+        for clause in expression[4:].split(','):
+            name, placeholder = clause.split()
+            name = names.get(name, name)
+            total = _value(item[name]) if name in item else 0
+            total += _value(values[placeholder])
+            item[name] = {'N': str(int(total)) if total == int(total) else str(total)}
+        self.items[table][key] = item
+        if body.get('ReturnValues') == 'ALL_NEW':
+            return {'Attributes': item}
+        if old is not None and body.get('ReturnValues') == 'ALL_OLD':
+            return {'Attributes': old}
+        return {}
+
+    def _op_DeleteItem(self, body):
+        old = self.items[body['TableName']].pop(self._key(body['TableName'], body['Key']), None)
+        if old is not None and body.get('ReturnValues') == 'ALL_OLD':
+            return {'Attributes': old}
+        return {}
+
+    def _op_BatchGetItem(self, body):
+        responses = {}
+        for table, request in body['RequestItems'].items():
+            if table not in self.items:
+                raise ValueError(f"Requested resource not found: {table}")
+            found = (self.items[table].get(self._key(table, key)) for key in request['Keys'])
+            responses[table] = [item for item in found if item is not None]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def _op_BatchWriteItem(self, body):
+        requests = [(table, request) for table, table_requests in body['RequestItems'].items()
+                    for request in table_requests]
+        if len(requests) > 25:
+            raise ValueError("Too many items requested for the BatchWriteItem call")
+        keys = set()
+        for table, request in requests:
+            if table not in self.items:
+                raise ValueError(f"Requested resource not found: {table}")
+            item = request['PutRequest']['Item'] if 'PutRequest' in request else request['DeleteRequest']['Key']
+            if (table, self._key(table, item)) in keys:
+                raise ValueError("Provided list of item keys contains duplicates")
+            keys.add((table, self._key(table, item)))
+        limit = len(requests) if self.batch_write_limit is None else self.batch_write_limit
+        unprocessed = {}
+        for number, (table, request) in enumerate(requests):
+            if number >= limit:
+                unprocessed.setdefault(table, []).append(request)
+            elif 'PutRequest' in request:
+                item = request['PutRequest']['Item']
+                self.items[table][self._key(table, item)] = item
+            else:
+                self.items[table].pop(self._key(table, request['DeleteRequest']['Key']), None)
+        return {'UnprocessedItems': unprocessed}
+
+    def _op_Query(self, body):
+        names = body.get('ExpressionAttributeNames', {})
+        values = body.get('ExpressionAttributeValues', {})
+        conditions = []
+        expression = body['KeyConditionExpression'].replace('(', ' ').replace(')', ' ')
+        # Split on the AND joining clauses, not the one inside BETWEEN :low AND :high
+        for clause in re.split(r'\s+AND\s+(?!:)', expression.strip()):
+            match = re.match(r'(\S+)\s+BETWEEN\s+(\S+)\s+AND\s+(\S+)$', clause)
+            if match:
+                name, low, high = match.groups()
+                conditions.append((names.get(name, name), 'BETWEEN', (_value(values[low]), _value(values[high]))))
+                continue
+            name, op, placeholder = re.match(r'(\S+)\s*(=|<=|>=|<|>)\s*(\S+)$', clause).groups()
+            conditions.append((names.get(name, name), op, _value(values[placeholder])))
+
+        def matches(item):
+            for name, op, expected in conditions:
+                if name not in item:
+                    return False
+                actual = _value(item[name])
+                if op == 'BETWEEN':
+                    ok = expected[0] <= actual <= expected[1]
+                else:
+                    ok = {'=': actual == expected, '<': actual < expected, '<=': actual <= expected,
+                          '>': actual > expected, '>=': actual >= expected}[op]
+                if not ok:
+                    return False
+            return True
+
+        table = body['TableName']
+        key_names = self.key_schema[table]
+        sort_names = key_names[1:]
+        if 'IndexName' in body:
+            index = self.index_schema.get(table, {}).get(body['IndexName'])
+            if index is None:
+                raise ValueError(f"The table does not have the specified index: {body['IndexName']}")
+            # Items without the index's keys are not in the index
+            key_names = list(dict.fromkeys(index + key_names))
+            sort_names = index[1:] + sort_names
+
+        def position(item):
+            return tuple(_value(item[name]) for name in sort_names)
+
+        items = sorted((item for item in self.items[table].values()
+                        if all(name in item for name in key_names) and matches(item)),
+                       key=position, reverse=not body.get('ScanIndexForward', True))
+        if 'ExclusiveStartKey' in body:
+            after = position(body['ExclusiveStartKey'])
+            if body.get('ScanIndexForward', True):
+                items = [item for item in items if position(item) > after]
+            else:
+                items = [item for item in items if position(item) < after]
+
+        page, size = [], 0
+        for item in items:
+            if len(page) == body.get('Limit') or (page and size >= self.page_bytes):
+                break
+            page.append(item)
+            size += len(json.dumps(item))
+        result = {'Items': page, 'Count': len(page), 'ScannedCount': len(page)}
+        if len(page) < len(items):
+            result['LastEvaluatedKey'] = {name: page[-1][name] for name in key_names}
+        return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve an in-memory DynamoDB stand-in")
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeDynamoDB(latency=args.latency, port=args.port)
+    print(f"Fake DynamoDB listening on {fake.url} (set DYNAMODB_ENDPOINT_URL to use it)")
+    fake._server.serve_forever()
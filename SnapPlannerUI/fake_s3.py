@@ -0,0 +1,105 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+
+class FakeS3:
+    """In-process S3 stand-in (MinIO-style, path-style URLs) for local tests and benchmarks.
+
+    Handles the object calls upload staging makes: PutObject, GetObject,
+    HeadObject and DeleteObject, on any bucket name. Like FakeDynamoDB it can
+    add an artificial per-request latency. Point boto3 at it with
+    `endpoint_url=fake.url` (or S3_ENDPOINT_URL for the app).
+    """
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.objects = {}
+        self.request_count = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _object_key(self):
+                bucket, _, key = unquote(urlsplit(self.path).path).lstrip('/').partition('/')
+                return bucket, key
+
+            def _begin(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                with fake._lock:
+                    fake.request_count += 1
+
+            def _reply(self, status, body=b'', headers=None, send_body=True):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def _not_found(self, send_body=True):
+                self._reply(404, b'<?xml version="1.0" encoding="UTF-8"?>\n<Error><Code>NoSuchKey</Code>'
+                                 b'<Message>The specified key does not exist.</Message></Error>',
+                            {'Content-Type': 'application/xml'}, send_body)
+
+            def do_PUT(self):
+                self._begin()
+                data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with fake._lock:
+                    fake.objects[self._object_key()] = data
+                    fake.bytes_received += len(data)
+                self._reply(200, headers={'ETag': '"0"'})
+
+            def do_GET(self, send_body=True):
+                self._begin()
+                data = fake.objects.get(self._object_key())
+                if data is None:
+                    self._not_found(send_body)
+                    return
+                self._reply(200, data, {'Content-Type': 'application/octet-stream', 'ETag': '"0"'}, send_body)
+
+            def do_HEAD(self):
+                self.do_GET(send_body=False)
+
+            def do_DELETE(self):
+                self._begin()
+                with fake._lock:
+                    fake.objects.pop(self._object_key(), None)
+                self._reply(204)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,4 +1,4 @@
-from PIL import Image
+from PIL import Image, ImageOps
 import pytesseract
 import re
 from datetime import datetime
@@ -9,51 +9,94 @@ import json
 import base64
 from dotenv import load_dotenv
 from io import BytesIO
+from lambda_payload import invoke_extraction, UPLOAD_STAGING_BUCKET
 
 
-def imageToEvents(image_path):
-    load_dotenv()
-    lambda_client = boto3.client('lambda', region_name='us-east-1')
-    
-    # Load and compress image if needed
-    with open(image_path, 'rb') as f:
-        image_data = f.read()
-    
-    # Compress if too large (6MB limit - 1.5MB buffer for JSON overhead)
-    max_size = 4.5 * 1024 * 1024  # 5MB
-    print(len(image_data))
-    if len(image_data) > max_size:
-        img = Image.open(BytesIO(image_data))
-        quality = 100
-        while quality > 10:
-            buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=quality, optimize=True)
-            compressed_data = buffer.getvalue()
-            
-            if len(compressed_data) <= max_size:
-                image_data = compressed_data
-                break
-            quality -= 5
-    
-    test_image = base64.b64encode(image_data).decode('utf-8')
-    print(len(image_data))
-    
-    # Test payload
-    test_event = {
-        'body': {
-            'image': test_image
-        }
-    }
-    
-    # Invoke Lambda
-    response = lambda_client.invoke(
-        FunctionName='SnapPlannerFunction',
-        Payload=json.dumps(test_event)
-    )
+# Largest image we send (6MB Lambda limit - 1.5MB buffer for JSON overhead)
+MAX_IMAGE_BYTES = int(4.5 * 1024 * 1024)
+# Textract's own limit, which is all that applies once images are staged in S3
+STAGED_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+# Longest side sent to Textract; phone photos are far bigger than OCR needs
+OCR_MAX_DIMENSION = int(os.getenv('OCR_MAX_DIMENSION', '2560'))
+# JPEG draft decoding may undershoot OCR_MAX_DIMENSION by this much in exchange for a 1/2-1/8 decode
+OCR_DRAFT_SLACK = 0.75
+# Textract only needs luminance, and grayscale JPEGs are much smaller
+OCR_GRAYSCALE = os.getenv('OCR_GRAYSCALE', 'true').lower() == 'true'
+# Quality tried first; lower ones are only searched if it doesn't fit
+OCR_JPEG_QUALITY = 90
+EXIF_ORIENTATION = 0x0112
+
+
+def _encode_jpeg(img, quality):
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality)
+    return buffer
+
+
+def prepare_image(image_path, max_bytes=MAX_IMAGE_BYTES, max_dimension=OCR_MAX_DIMENSION, grayscale=OCR_GRAYSCALE):
+    """Return a readable binary file with the image to send for extraction.
 
-    print(response)
+    Images that already fit (small enough, upright and within max_dimension)
+    are sent untouched. Anything else is decoded at reduced size where the
+    format allows it (JPEG draft mode), rotated per its EXIF orientation,
+    downscaled to max_dimension, optionally converted to grayscale, and
+    encoded at the highest JPEG quality that fits in max_bytes, found by
+    binary search instead of stepping down one quality level at a time.
+    """
+    img = Image.open(image_path)
+    width, height = img.size
+    orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+    if (os.path.getsize(image_path) <= max_bytes and max(width, height) <= max_dimension
+            and orientation == 1 and img.format in ('JPEG', 'PNG')):
+        img.close()
+        return open(image_path, 'rb')
+
+    # Let the JPEG decoder do most of the downscaling (1/2, 1/4, 1/8) while it decodes
+    scale = min(1.0, max_dimension * OCR_DRAFT_SLACK / max(width, height))
+    img.draft('L' if grayscale else 'RGB', (int(width * scale), int(height * scale)))
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('L' if grayscale else 'RGB')
+
+    # Cheap integer reduction first, then resample the remainder exactly
+    factor = max(img.size) // max_dimension
+    if factor >= 2:
+        img = img.reduce(factor)
+    if max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    while True:
+        buffer = _encode_jpeg(img, OCR_JPEG_QUALITY)
+        if buffer.tell() <= max_bytes:
+            break
+        # Highest quality in [low, high] that still fits
+        low, high, best = 10, OCR_JPEG_QUALITY - 1, None
+        while low <= high:
+            quality = (low + high) // 2
+            candidate = _encode_jpeg(img, quality)
+            if candidate.tell() <= max_bytes:
+                best, low = candidate, quality + 1
+            else:
+                high = quality - 1
+        if best is not None:
+            buffer = best
+            break
+        # Not even the lowest quality fits, so give up some resolution
+        img = img.resize((img.width * 3 // 4, img.height * 3 // 4), Image.LANCZOS)
+
+    buffer.seek(0)
+    return buffer
+
+
+def _max_image_bytes():
+    return MAX_IMAGE_BYTES if UPLOAD_STAGING_BUCKET is None else STAGED_MAX_IMAGE_BYTES
+
+
+def imageToEvents(image_path):
+    print(os.path.getsize(image_path))
     
-    result = json.loads(response['Payload'].read())
+    # Staged in S3 or streamed as base64, never several copies of the image in memory
+    with prepare_image(image_path, max_bytes=_max_image_bytes()) as source:
+        result = invoke_extraction(source, 'image')
     print("Lambda result:", result)
     
     # Handle different response structures
@@ -83,6 +126,12 @@ def imageToEvents(image_path):
         raise Exception(f"Error processing image with Tesseract OCR: {str(e)}")
     
 
+def imageToPrompts(image_path):
+    """Have the Lambda OCR the image and return its Bedrock prompts without calling Bedrock."""
+    with prepare_image(image_path, max_bytes=_max_image_bytes()) as source:
+        result = invoke_extraction(source, 'image', {'prompts_only': True})
+    
+    return json.loads(result['body'])
 
 def parse_date_time(text):
     """Try to parse date and time from text"""
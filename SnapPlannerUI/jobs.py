@@ -0,0 +1,197 @@
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Extraction jobs that may run at once across all users
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', '4'))
+# Extraction jobs a single user may have running at once
+EXTRACTION_MAX_PER_USER = int(os.getenv('EXTRACTION_MAX_PER_USER', '2'))
+# Extraction jobs all anonymous uploads together may have running at once
+EXTRACTION_MAX_ANONYMOUS = int(os.getenv('EXTRACTION_MAX_ANONYMOUS', '2'))
+# Jobs that may be queued or running before new uploads are rejected
+EXTRACTION_MAX_QUEUE = int(os.getenv('EXTRACTION_MAX_QUEUE', '100'))
+# How long finished jobs stay available for polling
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', '3600'))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, owner):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = 'queued'
+        self.result = None
+        self.partial = []
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def _set_status(self, status):
+        self.status = status
+        # Bumped on every change, including new partial results
+        self.version += 1
+        # Wake everyone waiting on the old event and start a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _add_partial(self, item):
+        self.partial.append(item)
+        self._set_status(self.status)
+
+    async def wait_for_change(self, version, timeout=None):
+        """Wait until the job moves past `version`; returns False on timeout."""
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'version': self.version,
+            'result': self.result,
+            'partial': self.partial,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobQueue:
+    """Runs blocking extraction work off the event loop with fair concurrency limits.
+
+    At most `max_workers` jobs run at once, each on the thread pool, and a
+    single user can only occupy `max_per_user` of those slots, so one large
+    upload (or a burst of them) cannot starve everyone else. Anonymous jobs
+    cannot be told apart by user, so they all share one bucket of
+    `max_anonymous` slots.
+    """
+
+    def __init__(self, max_workers=EXTRACTION_WORKERS, max_per_user=EXTRACTION_MAX_PER_USER,
+                 max_queue=EXTRACTION_MAX_QUEUE, ttl=JOB_TTL_SECONDS, max_anonymous=EXTRACTION_MAX_ANONYMOUS):
+        self.max_workers = max_workers
+        self.max_per_user = max_per_user
+        self.max_anonymous = max_anonymous
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.jobs = {}
+        self.completed = 0
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='extract')
+        self._slots = None
+        # owner (None for anonymous jobs) -> [semaphore, jobs holding or waiting for it],
+        # dropped when no job needs it
+        self._user_slots = {}
+
+    def _active(self):
+        return [job for job in self.jobs.values() if not job.done]
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job.id for job in self.jobs.values() if job.done and job.finished < cutoff]:
+            del self.jobs[job_id]
+
+    def submit(self, owner, func, *args, **kwargs):
+        """Queue `func(*args, **kwargs)` and return the Job right away."""
+        self._expire()
+        if len(self._active()) >= self.max_queue:
+            raise QueueFullError("Too many uploads are being processed, try again shortly")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        job = Job(owner)
+        self.jobs[job.id] = job
+        asyncio.ensure_future(self._run(job, partial(func, *args, **kwargs)))
+        return job
+
+    def submit_with_progress(self, owner, func, *args, **kwargs):
+        """Like submit, but calls `func(report, *args, **kwargs)`.
+
+        `report(item)` may be called from the worker thread any number of
+        times; each item is appended to `job.partial` and wakes up anyone
+        streaming the job, before the final result is ready.
+        """
+        loop = asyncio.get_event_loop()
+        job = None
+
+        def report(item):
+            loop.call_soon_threadsafe(job._add_partial, item)
+
+        job = self.submit(owner, func, report, *args, **kwargs)
+        return job
+
+    def get(self, job_id):
+        self._expire()
+        return self.jobs.get(job_id)
+
+    def owner_limit(self, owner):
+        """Jobs `owner` may have running at once; None is every anonymous upload together."""
+        return self.max_anonymous if owner is None else self.max_per_user
+
+    async def _run(self, job, work):
+        user_slot = self._user_slots.get(job.owner)
+        if user_slot is None:
+            user_slot = self._user_slots[job.owner] = [asyncio.Semaphore(self.owner_limit(job.owner)), 0]
+        user_slot[1] += 1
+        try:
+            # Take the per-user slot first so a busy user's queued jobs don't hold global slots
+            async with user_slot[0]:
+                await self._run_in_slot(job, work)
+        finally:
+            user_slot[1] -= 1
+            if user_slot[1] == 0:
+                del self._user_slots[job.owner]
+
+    async def _run_in_slot(self, job, work):
+        async with self._slots:
+            job.started = time.time()
+            job._set_status('running')
+            loop = asyncio.get_event_loop()
+            try:
+                job.result = await loop.run_in_executor(self._executor, work)
+                job.finished = time.time()
+                self.completed += 1
+                job._set_status('done')
+            except Exception as e:
+                job.error = str(e)
+                job.finished = time.time()
+                self.failed += 1
+                job._set_status('failed')
+
+    def metrics(self):
+        active = self._active()
+        queued = [job for job in active if job.status == 'queued']
+        running = [job for job in active if job.status == 'running']
+        oldest = min((job.created for job in queued), default=None)
+        return {
+            'queued': len(queued),
+            'running': len(running),
+            'completed': self.completed,
+            'failed': self.failed,
+            'max_workers': self.max_workers,
+            'max_per_user': self.max_per_user,
+            'max_anonymous': self.max_anonymous,
+            'max_queue': self.max_queue,
+            'oldest_queued_seconds': time.time() - oldest if oldest else 0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -1,7 +1,10 @@
+import hashlib
+import threading
 import warnings
 from binascii import unhexlify
+from collections import OrderedDict
 from math import ceil
-from typing import Any, Dict, List, Tuple, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from ._codecs import adobe_glyphs, charset_encoding
 from ._utils import logger_warning
@@ -9,6 +12,17 @@ from .errors import PdfReadWarning
 from .generic import DecodedStreamObject, DictionaryObject, StreamObject
 
 
+# Parsed /ToUnicode CMaps kept for the life of the process, keyed by a hash
+# of the CMap data, so documents made with the same fonts skip parsing them
+# again. 0 turns the cache off; long-lived processes such as a warm Lambda
+# container set it.
+TO_UNICODE_CACHE_SIZE = 0
+
+# digest -> (map_dict, int_entry, code mapped to " " or None), least recently used first
+_to_unicode_cache: "OrderedDict[bytes, Tuple[Dict[Any, Any], List[int], Optional[int]]]" = OrderedDict()
+_to_unicode_lock = threading.Lock()
+
+
 # code freely inspired from @twiggy ; see #711
 def build_char_map(
     font_name: str, space_width: float, obj: DictionaryObject
@@ -177,6 +191,31 @@ def parse_encoding(
 def parse_to_unicode(
     ft: DictionaryObject, space_code: int
 ) -> Tuple[Dict[Any, Any], int, List[int]]:
+    if "/ToUnicode" not in ft:
+        return {}, space_code, []
+    cm = to_unicode_data(ft)
+    if TO_UNICODE_CACHE_SIZE <= 0:
+        map_dict, int_entry, cm_space_code = _parse_cm(cm)
+    else:
+        digest = hashlib.sha256(cm).digest()
+        with _to_unicode_lock:
+            parsed = _to_unicode_cache.get(digest)
+            if parsed is not None:
+                _to_unicode_cache.move_to_end(digest)
+        if parsed is None:
+            parsed = _parse_cm(cm)
+            with _to_unicode_lock:
+                _to_unicode_cache[digest] = parsed
+                while len(_to_unicode_cache) > TO_UNICODE_CACHE_SIZE:
+                    _to_unicode_cache.popitem(last=False)
+        # Shared with other documents: build_char_map and text extraction only read them
+        map_dict, int_entry, cm_space_code = parsed
+    if cm_space_code is not None:
+        space_code = cm_space_code
+    return map_dict, space_code, int_entry
+
+
+def _parse_cm(cm: bytes) -> Tuple[Dict[Any, Any], List[int], Optional[int]]:
     # will store all translation code
     # and map_dict[-1] we will have the number of bytes to convert
     map_dict: Dict[Any, Any] = {}
@@ -184,26 +223,25 @@ def parse_to_unicode(
     # will provide the list of cmap keys as int to correct encoding
     int_entry: List[int] = []
 
-    if "/ToUnicode" not in ft:
-        return {}, space_code, []
     process_rg: bool = False
     process_char: bool = False
     multiline_rg: Union[
         None, Tuple[int, int]
     ] = None  # tuple = (current_char, remaining size) ; cf #1285 for example of file
-    cm = prepare_cm(ft)
-    for l in cm.split(b"\n"):
+    for l in prepare_cm_data(cm).split(b"\n"):
         process_rg, process_char, multiline_rg = process_cm_line(
             l.strip(b" "), process_rg, process_char, multiline_rg, map_dict, int_entry
         )
 
+    space_code = None
     for a, value in map_dict.items():
         if value == " ":
             space_code = a
-    return map_dict, space_code, int_entry
+    return map_dict, int_entry, space_code
 
 
-def prepare_cm(ft: DictionaryObject) -> bytes:
+def to_unicode_data(ft: DictionaryObject) -> bytes:
+    """The raw CMap of a font's /ToUnicode entry."""
     tu = ft["/ToUnicode"]
     cm: bytes
     if isinstance(tu, StreamObject):
@@ -212,6 +250,14 @@ def prepare_cm(ft: DictionaryObject) -> bytes:
         cm = b"beginbfrange\n<0000> <0001> <0000>\nendbfrange"  # the full range 0000-FFFF will be processed
     if isinstance(cm, str):
         cm = cm.encode()
+    return cm
+
+
+def prepare_cm(ft: DictionaryObject) -> bytes:
+    return prepare_cm_data(to_unicode_data(ft))
+
+
+def prepare_cm_data(cm: bytes) -> bytes:
     # we need to prepare cm before due to missing return line in pdf printed to pdf from word
     cm = (
         cm.strip()
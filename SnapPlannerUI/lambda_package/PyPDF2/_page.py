@@ -1338,8 +1338,23 @@ class PageObject(DictionaryObject):
         except Exception:
             return ""  # no resources means no text is possible (no font) we consider the file as not damaged, no need to check for TJ or Tj
         if "/Font" in resources_dict:
-            for f in cast(DictionaryObject, resources_dict["/Font"]):
-                cmaps[f] = build_char_map(f, space_width, obj)
+            # Most fonts are shared by every page; a PdfReader keeps what
+            # build_char_map made of each one, by the font's reference
+            char_maps = getattr(pdf, "_char_maps", None)
+            fonts = cast(DictionaryObject, resources_dict["/Font"])
+            for f in fonts:
+                ref = fonts.raw_get(f)
+                if (
+                    char_maps is None
+                    or not isinstance(ref, IndirectObject)
+                    or ref.pdf is not pdf
+                ):
+                    cmaps[f] = build_char_map(f, space_width, obj)
+                    continue
+                key = (ref.idnum, ref.generation, space_width)
+                if key not in char_maps:
+                    char_maps[key] = build_char_map(f, space_width, obj)
+                cmaps[f] = char_maps[key]
         cmap: Tuple[
             Union[str, Dict[int, str]], Dict[str, str], str, Optional[DictionaryObject]
         ] = (
@@ -1352,8 +1367,19 @@ class PageObject(DictionaryObject):
             content = (
                 obj[content_key].get_object() if isinstance(content_key, str) else obj
             )
-            if not isinstance(content, ContentStream):
-                content = ContentStream(content, pdf, "bytes")
+            if isinstance(content, ContentStream):
+                operations: Iterable[Tuple[Any, Any]] = content.operations
+            else:
+                # Parse as the loop below goes instead of building every
+                # operation first; unless an operand visitor wants to see
+                # them, paths and inline images are not built at all
+                operations = ContentStream.iter_operations(
+                    content,
+                    pdf,
+                    "bytes",
+                    skip_graphics=visitor_operand_before is None
+                    and visitor_operand_after is None,
+                )
         except KeyError:  # it means no content can be extracted(certainly empty page)
             return ""
         # Note: we check all strings are TextStringObjects.  ByteStringObjects
@@ -1693,7 +1719,16 @@ class PageObject(DictionaryObject):
                 except Exception:
                     pass
 
-        for operands, operator in content.operations:
+        operations_iter = iter(operations)
+        while True:
+            # Parsing happens as the loop goes, so it is still under the guard
+            # against pages without extractable content
+            try:
+                operands, operator = next(operations_iter)
+            except StopIteration:
+                break
+            except KeyError:
+                return ""
             if visitor_operand_before is not None:
                 visitor_operand_before(operator, operands, cm_matrix, tm_matrix)
             # multiple operators are defined in here ####
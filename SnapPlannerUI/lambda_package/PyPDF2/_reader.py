@@ -31,6 +31,7 @@ import os
 import re
 import struct
 import zlib
+from collections import OrderedDict
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
@@ -71,6 +72,7 @@ from .constants import FieldDictionaryAttributes, GoToActionArguments
 from .constants import PageAttributes as PG
 from .constants import PagesAttributes as PA
 from .constants import TrailerKeys as TK
+from .filters import decode_stream_data
 from .errors import (
     EmptyFileError,
     FileNotDecryptedError,
@@ -101,6 +103,14 @@ from .types import OutlineType, PagemodeType
 from .xmp import XmpInformation
 
 
+# Decoded object streams a reader keeps, by total decoded size; the most
+# recently used stream is always kept, even if it alone is larger
+OBJECT_STREAM_CACHE_BYTES = 32 * 1024 * 1024
+
+# One "objnum offset" pair of an object stream header
+_OBJECT_STREAM_PAIR = re.compile(rb"[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)")
+
+
 def convert_to_int(d: bytes, size: int) -> Union[int, Tuple[Any, ...]]:
     if size > 8:
         raise PdfReadError("invalid size in convert_to_int")
@@ -303,6 +313,12 @@ class PdfReader:
         self.strict = strict
         self.flattened_pages: Optional[List[PageObject]] = None
         self.resolved_objects: Dict[Tuple[Any, Any], Optional[PdfObject]] = {}
+        # stmnum -> (decoded data, {objnum: (index, offset)}, /First, /N), least recently used first
+        self._object_streams: "OrderedDict[int, Tuple[bytes, Dict[int, Tuple[int, int]], int, int]]" = OrderedDict()
+        self._object_streams_size = 0
+        self.object_stream_cache_bytes = OBJECT_STREAM_CACHE_BYTES
+        # (idnum, generation, space_width) of a font -> what build_char_map made of it
+        self._char_maps: Dict[Tuple[int, int, float], Tuple[Any, ...]] = {}
         self.xref_index = 0
         self._page_id2num: Optional[
             Dict[Any, Any]
@@ -1127,59 +1143,93 @@ class PdfReader:
             # TODO: Could flattened_pages be None at this point?
             self.flattened_pages.append(page_obj)  # type: ignore
 
-    def _get_object_from_stream(
-        self, indirect_reference: IndirectObject
-    ) -> Union[int, PdfObject, str]:
-        # indirect reference to object in object stream
-        # read the entire object stream into memory
-        stmnum, idx = self.xref_objStm[indirect_reference.idnum]
+    def _object_stream(
+        self, stmnum: int
+    ) -> Tuple[bytes, Dict[int, Tuple[int, int]], int, int]:
+        """
+        Return the decoded data, object offsets, /First and /N of object stream `stmnum`.
+
+        Each stream is decoded and its header parsed once, then kept in an
+        LRU cache bounded by ``object_stream_cache_bytes``, so reading the N
+        objects of a stream no longer decodes and scans it N times.
+        """
+        entry = self._object_streams.get(stmnum)
+        if entry is not None:
+            self._object_streams.move_to_end(stmnum)
+            return entry
+
         obj_stm: EncodedStreamObject = IndirectObject(stmnum, 0, self).get_object()  # type: ignore
         # This is an xref to a stream, so its type better be a stream
         assert cast(str, obj_stm["/Type"]) == "/ObjStm"
+        if isinstance(obj_stm, EncodedStreamObject) and obj_stm.decoded_self is None:
+            # Decoded here rather than through get_data(), which would keep a
+            # copy on the stream object beyond the reach of the cache bound
+            data = b_(decode_stream_data(obj_stm))
+        else:
+            data = b_(obj_stm.get_data())
+        first = int(obj_stm["/First"])  # type: ignore
         # /N is the number of indirect objects in the stream
-        assert idx < obj_stm["/N"]
-        stream_data = BytesIO(b_(obj_stm.get_data()))  # type: ignore
-        for i in range(obj_stm["/N"]):  # type: ignore
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
-            objnum = NumberObject.read_from_stream(stream_data)
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
-            offset = NumberObject.read_from_stream(stream_data)
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
-            if objnum != indirect_reference.idnum:
-                # We're only interested in one object
-                continue
-            if self.strict and idx != i:
-                raise PdfReadError("Object is in wrong index.")
-            stream_data.seek(int(obj_stm["/First"] + offset), 0)  # type: ignore
+        count = obj_stm["/N"]
 
-            # to cope with some case where the 'pointer' is on a white space
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
+        offsets: Dict[int, Tuple[int, int]] = {}
+        pos = 0
+        for i in range(count):  # type: ignore
+            match = _OBJECT_STREAM_PAIR.match(data, pos)
+            if match is None:
+                break
+            # A repeated object number keeps its first offset, as a linear scan would find
+            offsets.setdefault(int(match.group(1)), (i, int(match.group(2))))
+            pos = match.end()
+        entry = (data, offsets, first, count)
+
+        self._object_streams[stmnum] = entry
+        self._object_streams_size += len(data)
+        while (
+            self._object_streams_size > self.object_stream_cache_bytes
+            and len(self._object_streams) > 1
+        ):
+            _, (evicted, *_) = self._object_streams.popitem(last=False)
+            self._object_streams_size -= len(evicted)
+        return entry
 
-            try:
-                obj = read_object(stream_data, self)
-            except PdfStreamError as exc:
-                # Stream object cannot be read. Normally, a critical error, but
-                # Adobe Reader doesn't complain, so continue (in strict mode?)
-                logger_warning(
-                    f"Invalid stream (index {i}) within object "
-                    f"{indirect_reference.idnum} {indirect_reference.generation}: "
-                    f"{exc}",
-                    __name__,
-                )
+    def _get_object_from_stream(
+        self, indirect_reference: IndirectObject
+    ) -> Union[int, PdfObject, str]:
+        # indirect reference to object in object stream
+        stmnum, idx = self.xref_objStm[indirect_reference.idnum]
+        data, offsets, first, count = self._object_stream(stmnum)
+        assert idx < count
+        if indirect_reference.idnum not in offsets:
+            if self.strict:
+                raise PdfReadError("This is a fatal error in strict mode.")
+            return NullObject()
+        i, offset = offsets[indirect_reference.idnum]
+        if self.strict and idx != i:
+            raise PdfReadError("Object is in wrong index.")
+        stream_data = BytesIO(data)
+        stream_data.seek(first + offset, 0)
+
+        # to cope with some case where the 'pointer' is on a white space
+        read_non_whitespace(stream_data)
+        stream_data.seek(-1, 1)
 
-                if self.strict:
-                    raise PdfReadError(f"Can't read object stream: {exc}")
-                # Replace with null. Hopefully it's nothing important.
-                obj = NullObject()
-            return obj
+        try:
+            obj = read_object(stream_data, self)
+        except PdfStreamError as exc:
+            # Stream object cannot be read. Normally, a critical error, but
+            # Adobe Reader doesn't complain, so continue (in strict mode?)
+            logger_warning(
+                f"Invalid stream (index {i}) within object "
+                f"{indirect_reference.idnum} {indirect_reference.generation}: "
+                f"{exc}",
+                __name__,
+            )
 
-        if self.strict:
-            raise PdfReadError("This is a fatal error in strict mode.")
-        return NullObject()
+            if self.strict:
+                raise PdfReadError(f"Can't read object stream: {exc}")
+            # Replace with null. Hopefully it's nothing important.
+            obj = NullObject()
+        return obj
 
     def _get_indirect_object(self, num: int, gen: int) -> Optional[PdfObject]:
         """
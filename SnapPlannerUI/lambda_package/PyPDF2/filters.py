@@ -34,7 +34,9 @@ See TABLE H.1 Abbreviations for standard filter names
 __author__ = "Mathieu Fenniak"
 __author_email__ = "biziqe@mathieu.fenniak.net"
 
+import functools
 import math
+import re
 import struct
 import zlib
 from io import BytesIO
@@ -49,7 +51,7 @@ except ImportError:
     # For older Python versions, the backport typing_extensions is necessary:
     from typing_extensions import Literal  # type: ignore[misc]
 
-from ._utils import b_, deprecate_with_replacement, ord_, paeth_predictor
+from ._utils import b_, deprecate_with_replacement, ord_
 from .constants import CcittFaxDecodeParameters as CCITT
 from .constants import ColorSpaces
 from .constants import FilterTypeAbbreviations as FTA
@@ -61,6 +63,127 @@ from .constants import StreamAttributes as SA
 from .errors import PdfReadError, PdfStreamError
 
 
+@functools.lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """NumPy if it is installed, else None; imported on first use as it is slow to load."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# A byte and every copy of it that follows
+_SAME_BYTE_RUN = re.compile(rb"([\s\S])\1*")
+# Up rows shorter than this (xref streams' are 4 to 10 bytes) are summed a run at a time
+_PNG_NARROW_ROW = 128
+# Average and Paeth runs at least this many rows long and bytes wide are
+# decoded a diagonal at a time with NumPy; smaller ones a byte at a time
+_PNG_WAVEFRONT_MIN = 16
+
+
+@functools.lru_cache(maxsize=16)
+def _byte_masks(size: int) -> Tuple[int, int]:
+    """The low seven bits and the top bit of each of size bytes, as big ints."""
+    return int.from_bytes(b"\x7f" * size, "big"), int.from_bytes(b"\x80" * size, "big")
+
+
+def _add_bytes(a: bytes, b: bytes) -> bytes:
+    """Add two equally long byte strings byte by byte, modulo 256."""
+    # Read as one big int, the bytes sit side by side; masking off each
+    # byte's top bit before adding keeps carries from crossing into the next
+    size = len(a)
+    low, high = _byte_masks(size)
+    x = int.from_bytes(a, "big")
+    y = int.from_bytes(b, "big")
+    return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(size, "big")
+
+
+def _add_bytes_running(data: bytes, stride: int) -> bytes:
+    """Replace every byte by the sum, modulo 256, of itself and each byte a multiple of stride before it."""
+    size = len(data)
+    low, high = _byte_masks(size)
+    value = int.from_bytes(data, "big")
+    shift = 8 * stride
+    # Add the running sum so far shifted by 1, 2, 4, ... strides
+    while 0 < shift < 8 * size:
+        shifted = value >> shift
+        value = ((value & low) + (shifted & low)) ^ ((value ^ shifted) & high)
+        shift <<= 1
+    return value.to_bytes(size, "big")
+
+
+def _png_average_row(row: bytes, prev: bytes) -> bytes:
+    out = bytearray(row)
+    left = 0
+    for i, up in enumerate(prev):
+        left = (out[i] + ((left + up) >> 1)) & 0xFF
+        out[i] = left
+    return bytes(out)
+
+
+def _png_paeth_row(row: bytes, prev: bytes) -> bytes:
+    out = bytearray(row)
+    left = up_left = 0
+    for i, up in enumerate(prev):
+        # paeth_predictor(left, up, up_left), inlined
+        p = left + up - up_left
+        dist_left = abs(p - left)
+        dist_up = abs(p - up)
+        dist_up_left = abs(p - up_left)
+        if dist_left <= dist_up and dist_left <= dist_up_left:
+            paeth = left
+        elif dist_up <= dist_up_left:
+            paeth = up
+        else:
+            paeth = up_left
+        left = (out[i] + paeth) & 0xFF
+        out[i] = left
+        up_left = up
+    return bytes(out)
+
+
+def _png_unpredict_wavefront(np: Any, filter_byte: int, block: Any, prev: Any) -> Any:
+    """
+    Undo Average (3) or Paeth (4) prediction on a 2-D uint8 block of rows.
+
+    A byte depends on its left, up and up-left neighbours, which all lie on
+    the two previous anti-diagonals, so a whole anti-diagonal is decoded at
+    once. With a column of zeros to the left and ``prev`` above, the grid is
+    flat and each anti-diagonal is a slice stepping one row less one byte.
+    """
+    rows, width = block.shape
+    stride = width + 1
+    grid = np.zeros((rows + 1, stride), dtype=np.int16)
+    grid[0, 1:] = prev
+    grid[1:, 1:] = block
+    flat = grid.reshape(-1)
+    for diagonal in range(rows + width - 1):
+        first_row = max(0, diagonal - width + 1)
+        count = min(rows - 1, diagonal) - first_row + 1
+        start = (first_row + 1) * stride + diagonal - first_row + 1
+        stop = start + (count - 1) * width + 1
+        left = flat[start - 1 : stop - 1 : width]
+        up = flat[start - stride : stop - stride : width]
+        if filter_byte == 3:
+            predicted = (left + up) >> 1
+        else:
+            up_left = flat[start - stride - 1 : stop - stride - 1 : width]
+            # paeth_predictor(left, up, up_left), on arrays
+            dist_left = np.abs(up - up_left)
+            dist_up = np.abs(left - up_left)
+            dist_up_left = np.abs(left + up - 2 * up_left)
+            predicted = np.where(
+                (dist_left <= dist_up) & (dist_left <= dist_up_left),
+                left,
+                np.where(dist_up <= dist_up_left, up, up_left),
+            )
+        cells = flat[start:stop:width]
+        cells += predicted
+        cells &= 0xFF
+    return grid[1:, 1:].astype(np.uint8)
+
+
 def decompress(data: bytes) -> bytes:
     try:
         return zlib.decompress(data)
@@ -145,44 +268,100 @@ class FlateDecode:
         return str_data
 
     @staticmethod
-    def _decode_png_prediction(data: str, columns: int, rowlength: int) -> bytes:
-        output = BytesIO()
+    def _decode_png_prediction(data: bytes, columns: int, rowlength: int) -> bytes:
+        """
+        Undo PNG prediction, one filter type byte at the start of each row.
+
+        Every byte's left neighbour is taken to be the byte before it (one
+        byte per pixel, whatever /Colors says), as this decoder always has.
+        Rows are whole-row big-int operations, or NumPy array
+        operations over runs of rows with the same filter when NumPy is
+        installed; only Average and Paeth rows go byte by byte. The result
+        is the same either way.
+        """
         # PNG prediction can vary from row to row
         if len(data) % rowlength != 0:
             raise PdfReadError("Image data is not rectangular")
-        prev_rowdata = (0,) * rowlength
-        for row in range(len(data) // rowlength):
-            rowdata = [
-                ord_(x) for x in data[(row * rowlength) : ((row + 1) * rowlength)]
-            ]
-            filter_byte = rowdata[0]
+        np = _numpy()
+        if np is not None:
+            return FlateDecode._decode_png_prediction_numpy(np, data, rowlength)
+        return FlateDecode._decode_png_prediction_bytes(data, rowlength)
 
+    @staticmethod
+    def _decode_png_prediction_bytes(data: bytes, rowlength: int) -> bytes:
+        width = rowlength - 1
+        output = bytearray()
+        prev_rowdata = bytes(width)
+        # Runs of consecutive rows that use the same filter
+        for run in _SAME_BYTE_RUN.finditer(data[::rowlength]):
+            filter_byte = data[run.start() * rowlength]
+            rows = data[run.start() * rowlength : run.end() * rowlength]
             if filter_byte == 0:
-                pass
+                block = bytearray(rows)
+                del block[::rowlength]
             elif filter_byte == 1:
-                for i in range(2, rowlength):
-                    rowdata[i] = (rowdata[i] + rowdata[i - 1]) % 256
+                block = bytearray()
+                for start in range(0, len(rows), rowlength):
+                    # Running sum along the row: add the byte 1 to the left,
+                    # then the (updated) byte 2 to the left, 4, ...
+                    block += _add_bytes_running(rows[start + 1 : start + rowlength], 1)
+            elif filter_byte == 2 and width < _PNG_NARROW_ROW:
+                block = bytearray(rows)
+                del block[::rowlength]
+                # Running sum down the columns of the whole run, plus the row
+                # above it; cheaper than a step per row when rows are short
+                block = _add_bytes_running(block, width)
+                block = _add_bytes(block, prev_rowdata * (run.end() - run.start()))
             elif filter_byte == 2:
-                for i in range(1, rowlength):
-                    rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
-            elif filter_byte == 3:
-                for i in range(1, rowlength):
-                    left = rowdata[i - 1] if i > 1 else 0
-                    floor = math.floor(left + prev_rowdata[i]) / 2
-                    rowdata[i] = (rowdata[i] + int(floor)) % 256
-            elif filter_byte == 4:
-                for i in range(1, rowlength):
-                    left = rowdata[i - 1] if i > 1 else 0
-                    up = prev_rowdata[i]
-                    up_left = prev_rowdata[i - 1] if i > 1 else 0
-                    paeth = paeth_predictor(left, up, up_left)
-                    rowdata[i] = (rowdata[i] + paeth) % 256
+                block = bytearray()
+                for start in range(0, len(rows), rowlength):
+                    prev_rowdata = _add_bytes(rows[start + 1 : start + rowlength], prev_rowdata)
+                    block += prev_rowdata
+            elif filter_byte in (3, 4):
+                unpredict_row = _png_average_row if filter_byte == 3 else _png_paeth_row
+                block = bytearray()
+                for start in range(0, len(rows), rowlength):
+                    prev_rowdata = unpredict_row(rows[start + 1 : start + rowlength], prev_rowdata)
+                    block += prev_rowdata
             else:
                 # unsupported PNG filter
                 raise PdfReadError(f"Unsupported PNG filter {filter_byte!r}")
-            prev_rowdata = tuple(rowdata)
-            output.write(bytearray(rowdata[1:]))
-        return output.getvalue()
+            output += block
+            prev_rowdata = bytes(block[len(block) - width :])
+        return bytes(output)
+
+    @staticmethod
+    def _decode_png_prediction_numpy(np: Any, data: bytes, rowlength: int) -> bytes:
+        rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, rowlength)
+        if len(rows) == 0:
+            return b""
+        filters = rows[:, 0]
+        unsupported = np.flatnonzero(filters > 4)
+        if len(unsupported):
+            raise PdfReadError(f"Unsupported PNG filter {int(filters[unsupported[0]])!r}")
+        output = rows[:, 1:].copy()
+        # Runs of consecutive rows that use the same filter
+        bounds = [0, *(np.flatnonzero(np.diff(filters)) + 1).tolist(), len(rows)]
+        for start, end in zip(bounds, bounds[1:]):
+            filter_byte = filters[start]
+            block = output[start:end]
+            if filter_byte == 1:
+                # uint8 sums wrap around, which is the % 256
+                np.cumsum(block, axis=1, dtype=np.uint8, out=block)
+            elif filter_byte == 2:
+                np.cumsum(block, axis=0, dtype=np.uint8, out=block)
+                if start:
+                    block += output[start - 1]
+            elif filter_byte in (3, 4) and min(end - start, rowlength - 1) >= _PNG_WAVEFRONT_MIN:
+                prev_rowdata = output[start - 1] if start else np.zeros(rowlength - 1, dtype=np.uint8)
+                block[...] = _png_unpredict_wavefront(np, filter_byte, block, prev_rowdata)
+            elif filter_byte in (3, 4):
+                unpredict_row = _png_average_row if filter_byte == 3 else _png_paeth_row
+                prev_rowdata = output[start - 1].tobytes() if start else bytes(rowlength - 1)
+                for row in range(start, end):
+                    prev_rowdata = unpredict_row(output[row].tobytes(), prev_rowdata)
+                    output[row] = np.frombuffer(prev_rowdata, dtype=np.uint8)
+        return output.tobytes()
 
     @staticmethod
     def encode(data: bytes) -> bytes:
@@ -32,7 +32,18 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 import logging
 import re
 from io import BytesIO
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
 from .._protocols import PdfWriterProtocol
 from .._utils import (
@@ -59,6 +70,7 @@ from ..constants import TypFitArguments as TF
 from ..errors import STREAM_TRUNCATED_PREMATURELY, PdfReadError, PdfStreamError
 from ._base import (
     BooleanObject,
+    ByteStringObject,
     FloatObject,
     IndirectObject,
     NameObject,
@@ -68,12 +80,107 @@ from ._base import (
     TextStringObject,
 )
 from ._fit import Fit
-from ._utils import read_hex_string_from_stream, read_string_from_stream
+from ._utils import (
+    create_string_object,
+    read_hex_string_from_stream,
+    read_string_from_stream,
+)
 
 logger = logging.getLogger(__name__)
 NumberSigns = b"+-"
 IndirectPattern = re.compile(rb"[+-]?(\d+)\s+(\d+)\s+R[^a-zA-Z]")
 
+# Content stream lexer: one match per token. Each alternative mirrors the
+# stream reader it stands in for: read_non_whitespace's whitespace (and
+# ArrayObject's isspace() inside arrays), NameObject.delimiter_pattern
+# ending operators and names, NumberObject.NumberPattern ending numbers.
+# Numbers only match when int() or Decimal() takes them without a warning,
+# strings only without nested parentheses and hex strings only with valid
+# digits (so never "<<"). "other" is anything left to read_object; it
+# excludes the leading whitespace so trailing whitespace cannot backtrack
+# into a token (there are no possessive quantifiers before Python 3.11).
+# Group 1 is the whitespace, so a token starts at match.end(1).
+_CONTENT_TOKEN = re.compile(
+    rb"([ \n\r\t\x00]*)(?:"
+    rb"(?P<op>[A-Za-z'\"][^\s()<>\[\]{}/%]*)"
+    rb"|(?P<name>/[^\s()<>\[\]{}/%]*)"
+    rb"|(?P<num>[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?![+,\-.0-9]))"
+    rb"|\((?P<str>[^()\\]*(?:\\[\s\S][^()\\]*)*)\)"
+    rb"|<(?P<hex>[0-9A-Fa-f \n\r\t\x00]*)>"
+    rb"|(?P<comment>%[^\r\n]*[\r\n]?)"
+    rb"|(?P<other>[^ \n\r\t\x00]))"
+)
+_CONTENT_ARRAY_TOKEN = re.compile(
+    rb"([ \t\n\r\x0b\x0c]*)(?:"
+    rb"(?P<end>\])"
+    rb"|(?P<name>/[^\s()<>\[\]{}/%]*)"
+    rb"|(?P<num>[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?![+,\-.0-9]))"
+    rb"|\((?P<str>[^()\\]*(?:\\[\s\S][^()\\]*)*)\)"
+    rb"|<(?P<hex>[0-9A-Fa-f \n\r\t\x00]*)>"
+    rb"|(?P<open>\[)"
+    rb"|(?P<other>[^ \t\n\r\x0b\x0c]))"
+)
+# One escape sequence as read_string_from_stream reads it; a line break
+# after the backslash swallows one more \r or \n
+_CONTENT_ESCAPE = re.compile(rb"\\([0-7]{1,3}|[\r\n][\r\n]?|[\s\S])")
+_CONTENT_ESCAPES = {
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"c": rb"\c",
+    **{char: char for char in (b"(", b")", b"/", b"\\", b" ", b"%", b"<", b">",
+                               b"[", b"]", b"#", b"_", b"&", b"$")},
+}
+_CONTENT_HEX_WHITESPACE = re.compile(rb"[ \n\r\t\x00]")
+# How every IndirectPattern match ends; a far cheaper search than IndirectPattern itself
+_CONTENT_REFERENCE_END = re.compile(rb"R[^a-zA-Z]")
+# Operators that construct, paint or clip paths; text extraction ignores them
+_PATH_OPERATORS = frozenset(
+    (b"m", b"l", b"c", b"v", b"y", b"h", b"re", b"S", b"s", b"f", b"F", b"f*",
+     b"B", b"B*", b"b", b"b*", b"n", b"W", b"W*")
+)
+# A path operator with nothing but plain numbers as operands, exactly as the
+# lexer would split it (the number lookahead leaves only one way to do so)
+_CONTENT_PATH_RUN = re.compile(
+    rb"(?:[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?![+,\-.0-9])[ \n\r\t\x00]*)*"
+    rb"(?:[fBbW]\*|re|[mlcvyhSsfFBbnW])(?![^\s()<>\[\]{}/%])"
+)
+
+
+class _UnknownEscape(Exception):
+    pass
+
+
+def _content_escape(match: "re.Match[bytes]") -> bytes:
+    escape = match.group(1)
+    if escape in _CONTENT_ESCAPES:
+        return _CONTENT_ESCAPES[escape]
+    if 0x30 <= escape[0] <= 0x37:  # 0-7
+        return b_(chr(int(escape, base=8)))
+    if escape[0] in (0x0A, 0x0D):
+        return b""
+    # read_string_from_stream warns about these; leave that to it
+    raise _UnknownEscape
+
+
+def _unescape_content_string(string: bytes) -> Optional[bytes]:
+    """Resolve the escapes of a string's body, or None if read_string_from_stream must."""
+    if b"\\" not in string:
+        return string
+    try:
+        return _CONTENT_ESCAPE.sub(_content_escape, string)
+    except _UnknownEscape:
+        return None
+
+
+def _content_hex_string(digits: bytes) -> bytes:
+    digits = _CONTENT_HEX_WHITESPACE.sub(b"", digits)
+    if len(digits) % 2:
+        digits += b"0"
+    return bytes.fromhex(digits.decode())
+
 
 class ArrayObject(list, PdfObject):
     def clone(
@@ -857,25 +964,48 @@ class ContentStream(DecodedStreamObject):
         #  [1] : str
         self.operations: List[Tuple[Any, Any]] = []
 
-        # stream may be a StreamObject or an ArrayObject containing
-        # multiple StreamObjects to be cat'd together.
         if stream is not None:
-            stream = stream.get_object()
-            if isinstance(stream, ArrayObject):
-                data = b""
-                for s in stream:
-                    data += b_(s.get_object().get_data())
-                    if len(data) == 0 or data[-1] != b"\n":
-                        data += b"\n"
-                stream_bytes = BytesIO(data)
-            else:
-                stream_data = stream.get_data()
-                assert stream_data is not None
-                stream_data_bytes = b_(stream_data)
-                stream_bytes = BytesIO(stream_data_bytes)
+            stream_bytes = BytesIO(self._content_bytes(stream))
             self.forced_encoding = forced_encoding
             self.__parse_content_stream(stream_bytes)
 
+    @classmethod
+    def iter_operations(
+        cls,
+        stream: Any,
+        pdf: Any,
+        forced_encoding: Union[None, str, List[str], Dict[int, str]] = None,
+        skip_graphics: bool = False,
+    ) -> Iterator[Tuple[Any, Any]]:
+        """
+        Parse ``stream`` lazily, one ``(operands, operator)`` pair at a time.
+
+        Nothing is kept in ``operations``. With ``skip_graphics``, path
+        construction, painting and clipping operators and inline images are
+        left out, and their operands and image data are not built at all.
+        """
+        content = cls(None, pdf)
+        content.forced_encoding = forced_encoding
+        return content._parse_operations(
+            BytesIO(cls._content_bytes(stream)), skip_graphics
+        )
+
+    @staticmethod
+    def _content_bytes(stream: Any) -> bytes:
+        # stream may be a StreamObject or an ArrayObject containing
+        # multiple StreamObjects to be cat'd together.
+        stream = stream.get_object()
+        if isinstance(stream, ArrayObject):
+            data = b""
+            for s in stream:
+                data += b_(s.get_object().get_data())
+                if len(data) == 0 or data[-1] != b"\n":
+                    data += b"\n"
+            return data
+        stream_data = stream.get_data()
+        assert stream_data is not None
+        return b_(stream_data)
+
     def clone(
         self,
         pdf_dest: Any,
@@ -912,37 +1042,170 @@ class ContentStream(DecodedStreamObject):
         # super(DictionaryObject,self)._clone(src, pdf_dest, force_duplicate, ignore_fields)
         return
 
-    def __parse_content_stream(self, stream: StreamType) -> None:
-        stream.seek(0, 0)
+    def __parse_content_stream(self, stream: BytesIO) -> None:
+        """Parse the content stream into ``self.operations``."""
+        self.operations.extend(self._parse_operations(stream))
+
+    def _parse_operations(
+        self, stream: BytesIO, skip_graphics: bool = False
+    ) -> Iterator[Tuple[Any, Any]]:
+        """
+        Yield the operations of the content stream as they are read.
+
+        The bytes are scanned in bulk, one ``_CONTENT_TOKEN`` match per token,
+        instead of one ``read(1)``/``seek(-1, 1)`` pair per byte. Anything the
+        pattern does not cover exactly (dictionaries, hex strings, strings
+        with escapes, indirect references, malformed input) is handed to
+        ``read_object`` at the same offset, so the operations and any error
+        are the same as reading the stream byte by byte.
+        """
+        data = stream.getvalue()
+        # Without an "R" that could end one, no number can start a reference
+        references = _CONTENT_REFERENCE_END.search(data) is not None
+        make_string = self._content_string_factory()
+        match_token = _CONTENT_TOKEN.match
+        match_path = _CONTENT_PATH_RUN.match if skip_graphics else None
+        pos = 0
         operands: List[Union[int, str, PdfObject]] = []
         while True:
-            peek = read_non_whitespace(stream)
-            if peek == b"" or peek == 0:
+            match = match_token(data, pos)
+            if match is None:
                 break
-            stream.seek(-1, 1)
-            if peek.isalpha() or peek in (b"'", b'"'):
-                operator = read_until_regex(stream, NameObject.delimiter_pattern, True)
+            kind = match.lastgroup
+            if kind == "op":
+                operator = match.group(kind)
+                pos = match.end()
                 if operator == b"BI":
                     # begin inline image - a completely different parsing
                     # mechanism is required, of course... thanks buddy...
                     assert operands == []
-                    ii = self._read_inline_image(stream)
-                    self.operations.append((ii, b"INLINE IMAGE"))
+                    stream.seek(pos, 0)
+                    ii = self._read_inline_image(stream, keep_data=not skip_graphics)
+                    pos = stream.tell()
+                    if not skip_graphics:
+                        yield ii, b"INLINE IMAGE"
+                elif skip_graphics and operator in _PATH_OPERATORS:
+                    operands = []
                 else:
-                    self.operations.append((operands, operator))
+                    yield operands, operator
                     operands = []
-            elif peek == b"%":
+                continue
+            start = match.end(1)
+            if kind == "num":
+                if match_path is not None and not operands:
+                    # Step over a whole "x y w h re" in one match, building nothing
+                    path = match_path(data, start)
+                    if path is not None:
+                        pos = path.end()
+                        continue
+                # read_object raises on a number running into the end of the stream
+                if match.end() < len(data) and not (
+                    references and IndirectPattern.match(data, start, start + 20)
+                ):
+                    number = match.group(kind)
+                    operands.append(FloatObject(number) if b"." in number else NumberObject(number))
+                    pos = match.end()
+                    continue
+            elif kind == "name":
+                name = match.group(kind)
+                if b"#" not in name and name.isascii():
+                    operands.append(NameObject(name.decode()))
+                    pos = match.end()
+                    continue
+            elif kind == "str":
+                string = _unescape_content_string(match.group(kind))
+                if string is not None:
+                    operands.append(make_string(string))
+                    pos = match.end()
+                    continue
+            elif kind == "hex":
+                operands.append(make_string(_content_hex_string(match.group(kind))))
+                pos = match.end()
+                continue
+            elif kind == "comment":
                 # If we encounter a comment in the content stream, we have to
                 # handle it here.  Typically, read_object will handle
                 # encountering a comment -- but read_object assumes that
                 # following the comment must be the object we're trying to
                 # read.  In this case, it could be an operator instead.
-                while peek not in (b"\r", b"\n"):
-                    peek = stream.read(1)
+                pos = match.end()
+                continue
+            elif data[start] == 0x5B:  # [
+                array = self._read_content_array(data, start, references, make_string)
+                if array is not None:
+                    operands.append(array[0])
+                    pos = array[1]
+                    continue
+            # Everything else, and whatever the fast paths declined, the slow way
+            stream.seek(start, 0)
+            operands.append(read_object(stream, None, self.forced_encoding))
+            pos = stream.tell()
+
+    def _content_string_factory(self) -> Callable[[bytes], Any]:
+        forced_encoding = self.forced_encoding
+        if isinstance(forced_encoding, str) and forced_encoding == "bytes":
+            # What create_string_object does for "bytes", without the dispatch
+            return ByteStringObject
+        return lambda string: create_string_object(string, forced_encoding)
+
+    def _read_content_array(
+        self,
+        data: bytes,
+        pos: int,
+        references: bool,
+        make_string: Callable[[bytes], Any],
+    ) -> Optional[Tuple["ArrayObject", int]]:
+        """
+        Read the array at ``data[pos]``; return it with the offset past the ``]``.
+
+        Returns None when an element needs read_object, and the whole array is
+        then read by ArrayObject.read_from_stream instead. Elements built
+        before that point are plain names, numbers and strings, whose
+        construction has no side effects, so they are simply dropped.
+        """
+        arr = ArrayObject()
+        pos += 1
+        while True:
+            match = _CONTENT_ARRAY_TOKEN.match(data, pos)
+            if match is None:
+                return None
+            kind = match.lastgroup
+            if kind == "end":
+                return arr, match.end()
+            if kind == "num":
+                start = match.end(1)
+                if match.end() >= len(data) or (
+                    references and IndirectPattern.match(data, start, start + 20)
+                ):
+                    return None
+                number = match.group(kind)
+                arr.append(FloatObject(number) if b"." in number else NumberObject(number))
+            elif kind == "str":
+                string = _unescape_content_string(match.group(kind))
+                if string is None:
+                    return None
+                arr.append(make_string(string))
+            elif kind == "hex":
+                arr.append(make_string(_content_hex_string(match.group(kind))))
+            elif kind == "name":
+                name = match.group(kind)
+                if b"#" in name or not name.isascii():
+                    return None
+                arr.append(NameObject(name.decode()))
+            elif kind == "open":
+                nested = self._read_content_array(data, match.end(1), references, make_string)
+                if nested is None:
+                    return None
+                arr.append(nested[0])
+                pos = nested[1]
+                continue
             else:
-                operands.append(read_object(stream, None, self.forced_encoding))
+                return None
+            pos = match.end()
 
-    def _read_inline_image(self, stream: StreamType) -> Dict[str, Any]:
+    def _read_inline_image(
+        self, stream: StreamType, keep_data: bool = True
+    ) -> Dict[str, Any]:
         # begin reading just after the "BI" - begin image
         # first read the dictionary of settings.
         settings = DictionaryObject()
@@ -961,6 +1224,8 @@ class ContentStream(DecodedStreamObject):
         tmp = stream.read(3)
         assert tmp[:2] == b"ID"
         data = BytesIO()
+        # Skipping the image still has to find its EI, but not keep its bytes
+        write = data.write if keep_data else (lambda chunk: 0)
         # Read the inline image, while checking for EI (End Image) operator.
         while True:
             # Read 8 kB at a time and check if the chunk contains the E operator.
@@ -971,10 +1236,10 @@ class ContentStream(DecodedStreamObject):
             loc = buf.find(b"E")
 
             if loc == -1:
-                data.write(buf)
+                write(buf)
             else:
                 # Write out everything before the E.
-                data.write(buf[0:loc])
+                write(buf[0:loc])
 
                 # Seek back in the stream to read the E next.
                 stream.seek(loc - len(buf), 1)
@@ -996,10 +1261,10 @@ class ContentStream(DecodedStreamObject):
                         break
                     else:
                         stream.seek(-1, 1)
-                        data.write(info)
+                        write(info)
                 else:
                     stream.seek(-1, 1)
-                    data.write(tok)
+                    write(tok)
         return {"settings": settings, "data": data.getvalue()}
 
     @property
@@ -0,0 +1,80 @@
+import base64
+import json
+import os
+import tempfile
+import uuid
+
+import aws_clients
+
+# A multiple of 3 so every chunk base64-encodes without padding
+ENCODE_CHUNK_SIZE = 3 * 256 * 1024
+# Payloads larger than this spill from memory to a temporary file
+SPOOL_MAX_MEMORY = 1024 * 1024
+# Bucket uploads are staged in for the Lambda to read; unset sends them base64 in the payload
+UPLOAD_STAGING_BUCKET = os.getenv('UPLOAD_STAGING_BUCKET')
+# Staged uploads go under this prefix; give it a lifecycle rule in case a delete is missed
+UPLOAD_STAGING_PREFIX = os.getenv('UPLOAD_STAGING_PREFIX', 'staging/')
+
+
+def build_payload(source, field, options=None):
+    """Build the SnapPlannerFunction invoke payload {"body": {**options, field: <base64>}}.
+
+    `source` is a buffered binary file (or BytesIO). It is base64-encoded a
+    chunk at a time straight into a spooled temp file, so the raw file, its
+    base64 text and the JSON document are never all in memory at once. The
+    returned file is rewound and can be passed directly as `Payload=` to
+    `lambda_client.invoke`, which streams it from there.
+    """
+    payload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    payload.write(b'{"body": {')
+    if options:
+        payload.write(json.dumps(options)[1:-1].encode('utf-8') + b', ')
+    payload.write(b'"' + field.encode('ascii') + b'": "')
+    for chunk in iter(lambda: source.read(ENCODE_CHUNK_SIZE), b''):
+        payload.write(base64.b64encode(chunk))
+    payload.write(b'"}}')
+    payload.seek(0)
+    return payload
+
+
+def staged_payload(bucket, key, field, options=None):
+    """Build the invoke payload {"body": {**options, "s3": {"bucket", "key"}, "type": field}}."""
+    body = dict(options or {})
+    body['s3'] = {'bucket': bucket, 'key': key}
+    body['type'] = field
+    return json.dumps({'body': body}).encode('utf-8')
+
+
+def invoke_extraction(source, field, options=None, bucket=UPLOAD_STAGING_BUCKET):
+    """Invoke SnapPlannerFunction on `source` and return its decoded response.
+
+    With a staging bucket the file is uploaded as-is and the Lambda gets only
+    its key, which Textract reads directly; the object is deleted once the
+    Lambda returns. Without one the file travels base64-encoded in the
+    payload, as build_payload describes.
+    """
+    lambda_client = aws_clients.lambda_client()
+    if bucket is None:
+        with build_payload(source, field, options) as payload:
+            response = lambda_client.invoke(FunctionName='SnapPlannerFunction', Payload=payload)
+        return json.loads(response['Payload'].read())
+
+    s3 = aws_clients.s3_client()
+    key = f"{UPLOAD_STAGING_PREFIX}{uuid.uuid4()}"
+    s3.put_object(Bucket=bucket, Key=key, Body=source)
+    try:
+        response = lambda_client.invoke(FunctionName='SnapPlannerFunction',
+                                        Payload=staged_payload(bucket, key, field, options))
+        return json.loads(response['Payload'].read())
+    finally:
+        s3.delete_object(Bucket=bucket, Key=key)
+
+
+def invoke_prompts(prompts):
+    """Have SnapPlannerFunction run Bedrock on the prompts a prompts_only call returned.
+
+    Returns its decoded response, whose body is the JSON list of events.
+    """
+    payload = json.dumps({'body': {'prompts': prompts}}).encode('utf-8')
+    response = aws_clients.lambda_client().invoke(FunctionName='SnapPlannerFunction', Payload=payload)
+    return json.loads(response['Payload'].read())
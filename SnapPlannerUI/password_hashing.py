@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+# bcrypt work factor; each step doubles the cost (12 is a few hundred ms on one core)
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', '12'))
+# Hashes computed at once; bcrypt releases the GIL, so threads use every core
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+# Hashes allowed in flight or waiting for a worker before new ones are turned away
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '64'))
+# Failed logins allowed per username, and per client address, within LOGIN_WINDOW_SECONDS
+LOGIN_MAX_FAILURES = int(os.getenv('LOGIN_MAX_FAILURES', '5'))
+LOGIN_WINDOW_SECONDS = int(os.getenv('LOGIN_WINDOW_SECONDS', '300'))
+# Usernames and addresses the limiter remembers before dropping the oldest
+LOGIN_LIMITER_MAX_KEYS = 100000
+
+
+def password_context(rounds=PASSWORD_BCRYPT_ROUNDS):
+    """bcrypt for new hashes; the unsalted SHA-256 hex digests FastAPI.py used to store still verify.
+
+    Anything but bcrypt at `rounds` counts as needing an update, so hashes
+    are upgraded on the next successful login.
+    """
+    return CryptContext(schemes=["bcrypt", "hex_sha256"], deprecated="auto",
+                        bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+class HasherBusyError(Exception):
+    """Raised when PASSWORD_HASH_QUEUE hashes are already waiting."""
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a worker pool instead of the event loop.
+
+    At most `queue_size` calls may be pending at once; past that new calls
+    fail fast with HasherBusyError rather than queueing without bound while
+    logins pile up.
+    """
+
+    def __init__(self, context=None, workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE):
+        self.context = context or password_context()
+        self.queue_size = queue_size
+        self.pending = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hash')
+
+    async def _run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.queue_size:
+                self.rejected += 1
+                raise HasherBusyError(f"{self.pending} password hashes already pending")
+            self.pending += 1
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def hash(self, password):
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password, hashed):
+        """Return (matches, new_hash); new_hash is set when the stored hash should be replaced."""
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    async def dummy_verify(self):
+        """Spend one verify's worth of time, so unknown usernames are not told apart by speed."""
+        await self._run(self.context.dummy_verify)
+
+    def stats(self):
+        with self._lock:
+            return {'pending': self.pending, 'rejected': self.rejected, 'queue_size': self.queue_size}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class LoginRateLimiter:
+    """Counts failed logins per key (username, client address) in a sliding window."""
+
+    def __init__(self, max_failures=LOGIN_MAX_FAILURES, window=LOGIN_WINDOW_SECONDS,
+                 max_keys=LOGIN_LIMITER_MAX_KEYS):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, *keys):
+        """Seconds until a login for `keys` may be tried again, or 0 if it may be tried now."""
+        now = time.time()
+        wait = 0
+        with self._lock:
+            for key in keys:
+                failures = self._recent(key, now)
+                if failures is not None and len(failures) >= self.max_failures:
+                    wait = max(wait, failures[-self.max_failures] + self.window - now)
+        return wait
+
+    def failed(self, *keys):
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                failures = self._recent(key, now)
+                if failures is None:
+                    failures = self._failures[key] = deque(maxlen=self.max_failures)
+                failures.append(now)
+                self._failures.move_to_end(key)
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def succeeded(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
@@ -13,36 +13,16 @@ import json
 import base64
 from dotenv import load_dotenv
 from io import BytesIO
+from lambda_payload import invoke_extraction
 
 
     
 def pdfToEvents(pdf_path):
-    load_dotenv()
-    lambda_client = boto3.client('lambda', region_name='us-east-1')
-
-    with open(pdf_path, 'rb') as f:
-        pdf_data = f.read()
-    
-
-    test_pdf = base64.b64encode(pdf_data).decode('utf-8')
-    print(len(pdf_data))
-    
-    # payload
-    test_event = {
-        'body': {
-            'pdf': test_pdf
-        }
-    }
+    print(os.path.getsize(pdf_path))
     
-    # Invoke Lambda
-    response = lambda_client.invoke(
-        FunctionName='SnapPlannerFunction',
-        Payload=json.dumps(test_event)
-    )
-
-
-    print(response)
-    result = json.loads(response['Payload'].read())
+    # Staged in S3 or streamed as base64, never several copies of the PDF in memory
+    with open(pdf_path, 'rb') as f:
+        result = invoke_extraction(f, 'pdf')
     print(result)
 
     try:
@@ -62,7 +42,16 @@ def pdfToEvents(pdf_path):
                 events = {"events": []}
         else:
             events = {"events": []}
+        # Recovered from a cut-off answer, so events may be missing
+        events["truncated"] = True
     
     print(events)
     
-    return events
\ No newline at end of file
+    return events
+
+def pdfToPrompts(pdf_path):
+    """Have the Lambda extract the PDF's text and return its Bedrock prompts without calling Bedrock."""
+    with open(pdf_path, 'rb') as f:
+        result = invoke_extraction(f, 'pdf', {'prompts_only': True})
+    
+    return json.loads(result['body'])
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+# Verified tokens remembered per process
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv('PRINCIPAL_CACHE_MAX_ENTRIES', '10000'))
+# Seconds a verified token is trusted before the Users table is read again (0 disables the cache)
+PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', '300'))
+
+
+class PrincipalCache:
+    """LRU of verified bearer tokens and the user each one belongs to.
+
+    An entry lasts until the token's `exp` or `ttl` seconds, whichever comes
+    first. invalidate_user() drops a user's entries at once in this process;
+    the TTL bounds how long other processes may keep trusting them.
+    """
+
+    def __init__(self, max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl=PRINCIPAL_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tokens_by_user = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Return the cached user for `token`, or None if it has to be verified again."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, user = entry
+            if expires <= time.time():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def put(self, token, user, token_expires):
+        """Remember a verified token; `token_expires` is its exp claim as a Unix timestamp."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (min(token_expires, time.time() + self.ttl), user)
+            self._tokens_by_user[user['username']].add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username):
+        """Forget every token of `username`, e.g. after a password change or deletion."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(username, ())):
+                self._remove(token)
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            username = entry[1]['username']
+            self._tokens_by_user[username].discard(token)
+            if not self._tokens_by_user[username]:
+                del self._tokens_by_user[username]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl': self.ttl,
+            }
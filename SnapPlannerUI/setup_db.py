@@ -1,10 +1,127 @@
 import boto3
 from botocore.exceptions import ClientError
 import os
+from collections import Counter, defaultdict
 from dotenv import load_dotenv
+import event_summary
+import storage
+from storage import long_event_end
 
 load_dotenv()
 
+# Lets GET /events/?start=&end= read one date range instead of the whole partition
+EVENTS_START_INDEX = {
+    'IndexName': storage.EVENTS_START_INDEX,
+    'KeySchema': [
+        {
+            'AttributeName': 'user_id',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'start',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+# Finds events longer than storage.LONG_EVENT_DAYS by their end, for ranges they run into
+EVENTS_END_INDEX = {
+    'IndexName': storage.EVENTS_END_INDEX,
+    'KeySchema': [
+        {
+            'AttributeName': 'user_id',
+            'KeyType': 'HASH'
+        },
+        {
+            'AttributeName': 'long_end',
+            'KeyType': 'RANGE'
+        }
+    ],
+    'Projection': {
+        'ProjectionType': 'ALL'
+    }
+}
+
+def add_events_start_index(dynamodb):
+    """Add the start index to an Events table created before it existed"""
+    client = dynamodb.meta.client
+    description = client.describe_table(TableName='Events')['Table']
+    indexes = [index['IndexName'] for index in description.get('GlobalSecondaryIndexes', [])]
+    if EVENTS_START_INDEX['IndexName'] in indexes:
+        print("Events start index already exists")
+        return
+    try:
+        client.update_table(
+            TableName='Events',
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'user_id',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'start',
+                    'AttributeType': 'S'
+                }
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': EVENTS_START_INDEX}]
+        )
+        # Existing events are backfilled into the index in the background
+        print("Adding Events start index (backfill runs in the background)...")
+    except ClientError as e:
+        print(f"Error adding Events start index: {e}")
+
+def add_events_end_index(dynamodb):
+    """Add the long event end index to an Events table created before it existed"""
+    client = dynamodb.meta.client
+    description = client.describe_table(TableName='Events')['Table']
+    indexes = [index['IndexName'] for index in description.get('GlobalSecondaryIndexes', [])]
+    if EVENTS_END_INDEX['IndexName'] not in indexes:
+        try:
+            client.update_table(
+                TableName='Events',
+                AttributeDefinitions=[
+                    {
+                        'AttributeName': 'user_id',
+                        'AttributeType': 'S'
+                    },
+                    {
+                        'AttributeName': 'long_end',
+                        'AttributeType': 'S'
+                    }
+                ],
+                GlobalSecondaryIndexUpdates=[{'Create': EVENTS_END_INDEX}]
+            )
+            print("Adding Events long event end index (backfill runs in the background)...")
+        except ClientError as e:
+            # DynamoDB creates one index at a time; run this again once the other is active
+            print(f"Error adding Events long event end index: {e}")
+            return
+    backfill_long_event_ends(dynamodb)
+
+def backfill_long_event_ends(dynamodb):
+    """Set long_end on stored events long enough to need it (for events created before it existed)"""
+    table = dynamodb.Table('Events')
+    updated = 0
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for event in response['Items']:
+            long_end = long_event_end(event)
+            if long_end is not None and event.get('long_end') != long_end:
+                table.update_item(
+                    Key={'user_id': event['user_id'], 'id': event['id']},
+                    UpdateExpression='SET long_end = :end',
+                    ExpressionAttributeValues={':end': long_end}
+                )
+                updated += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    print(f"Set long_end on {updated} events")
+
 def create_tables():
     """Create DynamoDB tables for Users and Events"""
     
@@ -65,8 +182,17 @@ def create_tables():
                 {
                     'AttributeName': 'id',
                     'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'start',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'long_end',
+                    'AttributeType': 'S'
                 }
             ],
+            GlobalSecondaryIndexes=[EVENTS_START_INDEX, EVENTS_END_INDEX],
             BillingMode='PAY_PER_REQUEST'
         )
         print("Creating Events table...")
@@ -76,8 +202,101 @@ def create_tables():
     except ClientError as e:
         if e.response['Error']['Code'] == 'ResourceInUseException':
             print("Events table already exists")
+            add_events_start_index(dynamodb)
+            add_events_end_index(dynamodb)
         else:
             print(f"Error creating Events table: {e}")
+    
+    # Create ExtractionCache table (used when EXTRACTION_CACHE_BACKEND=dynamodb)
+    try:
+        cache_table = dynamodb.create_table(
+            TableName='ExtractionCache',
+            KeySchema=[
+                {
+                    'AttributeName': 'hash',
+                    'KeyType': 'HASH'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'hash',
+                    'AttributeType': 'S'
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print("Creating ExtractionCache table...")
+        cache_table.wait_until_exists()
+        # Let DynamoDB delete expired cache entries on its own
+        dynamodb.meta.client.update_time_to_live(
+            TableName='ExtractionCache',
+            TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires'}
+        )
+        print("ExtractionCache table created successfully!")
+        
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("ExtractionCache table already exists")
+        else:
+            print(f"Error creating ExtractionCache table: {e}")
+
+    # Create EventSummaries table (per-user, per-day tag hours for GET /summary)
+    try:
+        summaries_table = dynamodb.create_table(
+            TableName='EventSummaries',
+            KeySchema=[
+                {
+                    'AttributeName': 'user_id',
+                    'KeyType': 'HASH'
+                },
+                {
+                    'AttributeName': 'day',
+                    'KeyType': 'RANGE'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'user_id',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'day',
+                    'AttributeType': 'S'
+                }
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        print("Creating EventSummaries table...")
+        summaries_table.wait_until_exists()
+        print("EventSummaries table created successfully!")
+        rebuild_summaries(dynamodb)
+        
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("EventSummaries table already exists")
+        else:
+            print(f"Error creating EventSummaries table: {e}")
+
+def rebuild_summaries(dynamodb):
+    """Recompute EventSummaries from every stored event (for events created before it existed)"""
+    totals = defaultdict(Counter)
+    scan_kwargs = {}
+    while True:
+        response = dynamodb.Table('Events').scan(**scan_kwargs)
+        for event in response['Items']:
+            for update in event_summary.summary_updates(event['user_id'], new_event=event):
+                key = (update['Key']['user_id'], update['Key']['day'])
+                names = update['ExpressionAttributeNames']
+                for placeholder, value in update['ExpressionAttributeValues'].items():
+                    totals[key][names['#a' + placeholder[2:]]] += value
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    with dynamodb.Table('EventSummaries').batch_writer() as batch:
+        for (username, day), attributes in totals.items():
+            batch.put_item(Item={'user_id': username, 'day': day, **attributes})
+    print(f"Rebuilt {len(totals)} EventSummaries items")
 
 if __name__ == "__main__":
     create_tables()
\ No newline at end of file
@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+
+# SQLite database FastAPI_local.py keeps users and events in
+LOCAL_DB_FILE = os.getenv('LOCAL_DB_FILE', 'snapplanner.db')
+# Milliseconds a writer waits for another connection's write lock before giving up
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+EVENT_FIELDS = ('id', 'title', 'start', 'end', 'description', 'tags')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    email TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    start TEXT NOT NULL,
+    "end" TEXT,
+    description TEXT,
+    tags TEXT,
+    PRIMARY KEY (user_id, id)
+);
+CREATE INDEX IF NOT EXISTS events_user_start ON events (user_id, start);
+"""
+
+
+class SQLiteStore:
+    """Users and events in one SQLite file, laid out like the DynamoDB tables.
+
+    events is keyed on (user_id, id) with an index on (user_id, start), the
+    same shape as Events and its user_id-start-index, so a user's events or
+    a date window of them are read without touching anyone else's. The
+    database runs in WAL mode: readers never wait for the writer, and each
+    write is one short transaction, so concurrent requests cannot lose
+    each other's changes. Every thread gets its own connection.
+    """
+
+    def __init__(self, path=LOCAL_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        # Every thread's open connection, so close() reaches the threadpool's too
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or connection not in self._connections:
+            # None yet on this thread, or close() closed it since
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+            with self._lock:
+                self._connections.add(connection)
+            self._local.connection = connection
+        return connection
+
+    def _write(self):
+        return _Transaction(self._connection())
+
+    def get_user(self, username):
+        row = self._connection().execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        return dict(row) if row else None
+
+    def add_user(self, user):
+        """Insert a user; returns False if the username is taken."""
+        with self._write() as connection:
+            cursor = connection.execute('INSERT OR IGNORE INTO users (username, password, email) VALUES (?, ?, ?)',
+                                        (user['username'], user['password'], user.get('email')))
+        return cursor.rowcount == 1
+
+    def put_user(self, user):
+        with self._write() as connection:
+            connection.execute('INSERT OR REPLACE INTO users (username, password, email) VALUES (?, ?, ?)',
+                               (user['username'], user['password'], user.get('email')))
+
+    def query_events(self, username, lower=None, upper=None):
+        """A user's events, only those overlapping lower..upper when either is given.
+
+        That is, starting by upper and ending (or starting, without an end)
+        at or after lower. The bounds compare as strings, like DynamoDB keys.
+        """
+        sql = 'SELECT * FROM events WHERE user_id = ?'
+        params = [username]
+        if lower is not None or upper is not None:
+            sql += ''' AND start <= ? AND COALESCE(NULLIF("end", ''), start) >= ? ORDER BY start'''
+            params += [upper if upper is not None else '\uffff', lower if lower is not None else '']
+        return [_event(row) for row in self._connection().execute(sql, params)]
+
+    def put_events(self, username, events):
+        """Create or replace events; returns the replaced event (or None) for each, in order."""
+        with self._write() as connection:
+            old_events = []
+            for event in events:
+                row = connection.execute('SELECT * FROM events WHERE user_id = ? AND id = ?',
+                                         (username, event['id'])).fetchone()
+                old_events.append(_event(row) if row else None)
+                connection.execute(
+                    'INSERT OR REPLACE INTO events (user_id, id, title, start, "end", description, tags) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (username, *(event.get(field) for field in EVENT_FIELDS)))
+        return old_events
+
+    def put_event(self, username, event):
+        """Create or replace one event; returns the event it replaced, if any."""
+        return self.put_events(username, [event])[0]
+
+    def delete_event(self, username, event_id):
+        """Delete an event; returns it, or None if there was none."""
+        with self._write() as connection:
+            row = connection.execute('SELECT * FROM events WHERE user_id = ? AND id = ?',
+                                     (username, event_id)).fetchone()
+            connection.execute('DELETE FROM events WHERE user_id = ? AND id = ?', (username, event_id))
+        return _event(row) if row else None
+
+    def table_names(self):
+        rows = self._connection().execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        return [row['name'] for row in rows]
+
+    def import_json(self, users_file, events_file):
+        """Move the old users.json/events.json into the database once, renaming them afterwards."""
+        if os.path.exists(users_file):
+            with open(users_file) as f:
+                users = json.load(f)
+            for user in users.values():
+                self.add_user(user)
+            os.replace(users_file, users_file + '.imported')
+        if os.path.exists(events_file):
+            with open(events_file) as f:
+                events = json.load(f)
+            for event in events:
+                self.put_event(event['user_id'], event)
+            os.replace(events_file, events_file + '.imported')
+
+    def close(self):
+        """Close every thread's connection; a thread that uses the store again opens a new one."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            connection.close()
+        self._local.connection = None
+
+
+class _Transaction:
+    """`with` block that runs its statements in one BEGIN IMMEDIATE transaction.
+
+    IMMEDIATE takes the write lock up front, so a read-then-write (the old
+    event, then its replacement) cannot interleave with another writer.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+
+
+def _event(row):
+    return {field: row[field] for field in ('user_id',) + EVENT_FIELDS}
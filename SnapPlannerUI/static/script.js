@@ -23,7 +23,9 @@ document.addEventListener('DOMContentLoaded', function() {
             right: 'dayGridMonth,timeGridWeek,timeGridDay'
         },
         events: function(fetchInfo, successCallback, failureCallback) {
-            fetch('/events/', {
+            // Only load the events in the visible range
+            const range = `start=${encodeURIComponent(fetchInfo.startStr)}&end=${encodeURIComponent(fetchInfo.endStr)}`;
+            fetch(`/events/?${range}`, {
                 method: 'GET',
                 headers: auth.getAuthHeaders()
             })
@@ -31,9 +33,17 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (!response.ok) {
                     throw new Error('Failed to fetch events');
                 }
-                return response.json();
+                // The list is streamed, so a dropped connection leaves it unparseable
+                return response.json().catch(() => {
+                    throw new Error('Event list was cut off, try again');
+                });
             })
             .then(events => {
+                // The server ends the list with an incomplete marker when storage failed part way
+                const last = events[events.length - 1];
+                if (last && last.incomplete) {
+                    throw new Error(last.error || 'Event list was cut off, try again');
+                }
                 console.log('Loaded events:', events);
                 successCallback(events);
                 setTimeout(() => updateSummary(calendar.view.type), 100); // Update summary after events load
@@ -142,39 +152,16 @@ document.addEventListener('DOMContentLoaded', function() {
         updateSummary(viewType);
     }
 
-    // Function to calculate event duration in hours
-    function getEventDuration(event) {
-        if (!event.start || !event.end) return 0;
-        const start = new Date(event.start);
-        const end = new Date(event.end);
-        return (end - start) / (1000 * 60 * 60); // Convert to hours
-    }
-
-    // Function to check if event is in date range
-    function isEventInRange(event, startDate, endDate) {
-        if (!event.start) return false;
-        const eventDate = new Date(event.start);
-        return eventDate >= startDate && eventDate <= endDate;
-    }
-
-    // Function to calculate total available hours for the period
-    function getTotalAvailableHours(viewType, startDate, endDate) {
-        if (viewType === 'timeGridDay') {
-            return 24; // 24 hours in a day
-        } else if (viewType === 'timeGridWeek') {
-            return 7 * 24; // 7 days * 24 hours
-        } else if (viewType === 'dayGridMonth') {
-            const days = Math.ceil((endDate - startDate) / (1000 * 60 * 60 * 24));
-            return days * 24; // Total days * 24 hours
-        }
-        return 0;
-    }
+    // Summary granularity for each calendar view
+    const summaryGranularity = {
+        'timeGridDay': 'day',
+        'timeGridWeek': 'week',
+        'dayGridMonth': 'month'
+    };
 
-    // Function to update summary based on current view
+    // Function to update summary based on current view; the server adds up the tag hours
     function updateSummary(viewType) {
         const view = calendar.view;
-        const startDate = new Date(view.activeStart);
-        const endDate = new Date(view.activeEnd);
         
         let title;
         if (viewType === 'dayGridMonth') {
@@ -187,30 +174,23 @@ document.addEventListener('DOMContentLoaded', function() {
         
         document.getElementById('summaryTitle').textContent = title;
         
-        const events = calendar.getEvents();
-        const tagHours = {};
-        let totalScheduledHours = 0;
-        
-        events.forEach(event => {
-            if (isEventInRange(event, startDate, endDate)) {
-                const duration = getEventDuration(event);
-                totalScheduledHours += duration;
-                
-                const tags = event.extendedProps.tags;
-                if (tags && duration > 0) {
-                    const tagList = tags.split(',').map(tag => tag.trim()).filter(tag => tag);
-                    tagList.forEach(tag => {
-                        tagHours[tag] = (tagHours[tag] || 0) + duration;
-                    });
-                }
-            }
+        const params = new URLSearchParams({
+            start: calendar.formatIso(view.activeStart),
+            end: calendar.formatIso(view.activeEnd),
+            granularity: summaryGranularity[viewType]
         });
-        
-        // Calculate unscheduled hours
-        const totalAvailableHours = getTotalAvailableHours(viewType, startDate, endDate);
-        const unscheduledHours = totalAvailableHours - totalScheduledHours;
-        
-        displaySummary(tagHours, unscheduledHours);
+        fetch(`/summary?${params}`, {
+            method: 'GET',
+            headers: auth.getAuthHeaders()
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Failed to fetch summary');
+            }
+            return response.json();
+        })
+        .then(summary => displaySummary(summary.tagHours, summary.unscheduledHours))
+        .catch(error => console.error('Error loading summary:', error));
     }
 
     // Function to generate vibrant color for custom tags
@@ -671,6 +651,97 @@ document.addEventListener('DOMContentLoaded', function() {
         uploadStatus.className = '';
     }
 
+    // Poll an extraction job until it finishes and return its events
+    async function waitForJob(jobId, onProgress) {
+        const token = localStorage.getItem('authToken');
+        while (true) {
+            const response = await fetch(`/jobs/${jobId}?token=${token}`);
+            const job = await response.json();
+            if (!response.ok) {
+                throw new Error(job.detail || 'Failed to check processing status');
+            }
+            if (onProgress) {
+                onProgress(job.partial);
+            }
+            if (job.status === 'done') {
+                return job.result;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Processing failed');
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
+    // Follow a job over server-sent events, passing each batch of new partial results to onItems.
+    // Falls back to polling if the browser has no EventSource or the stream drops.
+    function streamJob(jobId, onItems) {
+        let seen = 0;
+        const poll = () => waitForJob(jobId, partial => {
+            if (partial.length > seen) {
+                const items = partial.slice(seen);
+                seen = partial.length;
+                onItems(items);
+            }
+        });
+        if (!window.EventSource) {
+            return poll();
+        }
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/jobs/${jobId}/stream?token=${localStorage.getItem('authToken')}`);
+            source.addEventListener('partial', e => {
+                seen++;
+                onItems([JSON.parse(e.data)]);
+            });
+            source.addEventListener('status', e => {
+                const job = JSON.parse(e.data);
+                if (job.status === 'done') {
+                    source.close();
+                    resolve(job.result);
+                } else if (job.status === 'failed') {
+                    source.close();
+                    reject(new Error(job.error || 'Processing failed'));
+                }
+            });
+            source.onerror = () => {
+                source.close();
+                poll().then(resolve, reject);
+            };
+        });
+    }
+
+    // Wait for an upload's events, opening the review as soon as the first one is extracted
+    async function reviewUpload(result, successMessage) {
+        let reviewing = false;
+        const events = result.events || await streamJob(result.job_id, items => {
+            const newEvents = items.map(item => item.event);
+            if (!reviewing) {
+                document.getElementById('loadingSpinner').style.display = 'none';
+                uploadStatus.innerHTML = 'Extracting events...';
+                uploadStatus.className = 'success';
+                showEventReview(newEvents, true);
+                reviewing = true;
+            } else {
+                appendReviewEvents(newEvents);
+            }
+        });
+        document.getElementById('loadingSpinner').style.display = 'none';
+        uploadStatus.innerHTML = successMessage;
+        uploadStatus.className = 'success';
+        if (reviewing) {
+            finishEventReview();
+            return;
+        }
+        
+        // Show extracted events for user selection
+        if (events && events.length > 0) {
+            showEventReview(events);
+        } else {
+            uploadStatus.innerHTML = 'No events detected in the file.';
+            calendar.refetchEvents();
+        }
+    }
+
     // Handle file upload
     const uploadForm = document.getElementById('uploadForm');
     const uploadStatus = document.getElementById('uploadStatus');
@@ -689,6 +760,11 @@ document.addEventListener('DOMContentLoaded', function() {
             uploadStatus.className = 'error';
             return;
         }
+        if (fileInput.files.length > 1) {
+            await processFiles(fileInput.files);
+            fileInput.value = '';
+            return;
+        }
         
         const formData = new FormData();
         formData.append('file', fileInput.files[0]);
@@ -709,17 +785,9 @@ document.addEventListener('DOMContentLoaded', function() {
             console.log(result)
 
             if (response.ok) {
-                document.getElementById('loadingSpinner').style.display = 'none';
-                uploadStatus.innerHTML = result.message || 'File uploaded successfully!';
-                uploadStatus.className = 'success';
+                // Extraction runs in the background unless the file was cached; events stream in as they are found
                 fileInput.value = '';
-                
-                // Show extracted events for user selection
-                if (result.events && result.events.length > 0) {
-                    showEventReview(result.events);
-                } else {
-                    uploadStatus.innerHTML = 'No events detected in the file.';
-                }
+                await reviewUpload(result, result.message || 'File uploaded successfully!');
             } else {
                 throw new Error(result.detail || 'Upload failed');
             }
@@ -772,17 +840,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const result = await response.json();
             
             if (response.ok) {
-                document.getElementById('loadingSpinner').style.display = 'none';
-                uploadStatus.innerHTML = result.message || 'File processed successfully!';
-                uploadStatus.className = 'success';
-                
-                // Show extracted events for user selection
-                if (result.events && result.events.length > 0) {
-                    showEventReview(result.events);
-                } else {
-                    uploadStatus.innerHTML = 'No events detected in the file.';
-                    calendar.refetchEvents();
-                }
+                await reviewUpload(result, result.message || 'File processed successfully!');
             } else {
                 throw new Error(result.detail || 'Processing failed');
             }
@@ -793,20 +851,100 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Upload several files at once; the server extracts them in parallel
+    async function processFiles(files) {
+        const formData = new FormData();
+        for (const file of files) {
+            formData.append('files', file);
+        }
+        
+        try {
+            uploadStatus.innerHTML = '';
+            uploadStatus.className = '';
+            document.getElementById('loadingSpinner').style.display = 'block';
+            
+            const response = await fetch(`/uploadfiles/?token=${localStorage.getItem('authToken')}`, {
+                method: 'POST',
+                body: formData
+            });
+            
+            const result = await response.json();
+            if (!response.ok) {
+                throw new Error(result.detail || 'Upload failed');
+            }
+            
+            const events = await waitForJob(result.job_id, partial => {
+                uploadStatus.innerHTML = `Processed ${partial.length} of ${result.files} files...`;
+            });
+            document.getElementById('loadingSpinner').style.display = 'none';
+            uploadStatus.className = 'success';
+            
+            if (events && events.length > 0) {
+                showEventReview(events);
+            } else {
+                uploadStatus.innerHTML = 'No events detected in the files.';
+            }
+        } catch (error) {
+            document.getElementById('loadingSpinner').style.display = 'none';
+            uploadStatus.innerHTML = 'Error: ' + error.message;
+            uploadStatus.className = 'error';
+        }
+    }
+
     // Event review modal functions
     let reviewEvents = [];
     let currentReviewIndex = 0;
+    // True while the upload is still extracting, so more events may arrive
+    let reviewStreaming = false;
     
-    function showEventReview(events) {
+    function showEventReview(events, streaming = false) {
         reviewEvents = events;
         currentReviewIndex = 0;
+        reviewStreaming = streaming;
         showCurrentReviewEvent();
         
         const modal = new bootstrap.Modal(document.getElementById('reviewModal'));
         modal.show();
     }
     
+    // Add events to the open review as they are extracted
+    function appendReviewEvents(events) {
+        const waiting = currentReviewIndex >= reviewEvents.length;
+        reviewEvents.push(...events);
+        if (waiting) {
+            showCurrentReviewEvent();
+        } else {
+            updateReviewProgress();
+        }
+    }
+    
+    function finishEventReview() {
+        reviewStreaming = false;
+        if (currentReviewIndex >= reviewEvents.length) {
+            showCurrentReviewEvent();
+        } else {
+            updateReviewProgress();
+        }
+    }
+    
+    function updateReviewProgress() {
+        const total = reviewEvents.length + (reviewStreaming ? ' so far' : '');
+        document.getElementById('eventProgress').innerHTML = 
+            `<div class="progress mb-2">
+                <div class="progress-bar" style="width: ${((currentReviewIndex + 1) / reviewEvents.length) * 100}%"></div>
+            </div>
+            <small class="text-muted">Event ${currentReviewIndex + 1} of ${total}</small>`;
+    }
+    
     function showCurrentReviewEvent() {
+        if (currentReviewIndex >= reviewEvents.length && reviewStreaming) {
+            // Caught up with extraction; the next event shows up here when it arrives
+            document.getElementById('eventProgress').innerHTML = 
+                `<small class="text-muted">Reviewed ${reviewEvents.length} events, extracting more...</small>`;
+            document.getElementById('currentEvent').innerHTML = 
+                `<div class="text-center p-3"><div class="spinner-border" role="status"></div></div>`;
+            return;
+        }
         if (currentReviewIndex >= reviewEvents.length) {
             // All events processed
             const modal = bootstrap.Modal.getInstance(document.getElementById('reviewModal'));
@@ -822,11 +960,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const endDate = event.endDate ? new Date(event.endDate) : null;
         
         // Update progress
-        document.getElementById('eventProgress').innerHTML = 
-            `<div class="progress mb-2">
-                <div class="progress-bar" style="width: ${((currentReviewIndex + 1) / reviewEvents.length) * 100}%"></div>
-            </div>
-            <small class="text-muted">Event ${currentReviewIndex + 1} of ${reviewEvents.length}</small>`;
+        updateReviewProgress();
         
         // Show current event
         document.getElementById('currentEvent').innerHTML = `
@@ -858,6 +992,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Handle accept event button
     document.getElementById('acceptEvent').addEventListener('click', function() {
+        if (currentReviewIndex >= reviewEvents.length) {
+            return;
+        }
         const event = {
             id: Date.now().toString() + Math.random().toString(36).substr(2, 9),
             title: reviewEvents[currentReviewIndex].eventTitle,
@@ -881,8 +1018,72 @@ document.addEventListener('DOMContentLoaded', function() {
         .catch(error => console.error('Error adding event:', error));
     });
     
+    // Event as the review form would submit it without edits
+    function reviewEventToEvent(extractedEvent) {
+        const endDate = extractedEvent.endDate ? new Date(extractedEvent.endDate) : null;
+        return {
+            id: Date.now().toString() + Math.random().toString(36).substr(2, 9),
+            title: extractedEvent.eventTitle,
+            start: new Date(extractedEvent.startDate).toISOString().slice(0,16),
+            end: endDate ? endDate.toISOString().slice(0,16) : null,
+            description: extractedEvent.eventDescription || '',
+            tags: extractedEvent.tags ? (Array.isArray(extractedEvent.tags) ? extractedEvent.tags.join(', ') : extractedEvent.tags) : ''
+        };
+    }
+    
+    // Handle accept all button: the shown event with its edits plus every remaining one, in one request
+    document.getElementById('acceptAllEvents').addEventListener('click', function() {
+        if (currentReviewIndex >= reviewEvents.length) {
+            return;
+        }
+        const button = this;
+        const events = [{
+            id: Date.now().toString() + Math.random().toString(36).substr(2, 9),
+            title: reviewEvents[currentReviewIndex].eventTitle,
+            start: document.getElementById('reviewStartDate').value,
+            end: document.getElementById('reviewEndDate').value || null,
+            description: document.getElementById('reviewDescription').value,
+            tags: document.getElementById('reviewTags').value
+        }, ...reviewEvents.slice(currentReviewIndex + 1).map(reviewEventToEvent)];
+        
+        button.disabled = true;
+        fetch('/events/bulk', {
+            method: 'POST',
+            headers: auth.getAuthHeaders(),
+            body: JSON.stringify(events)
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Bulk add failed with status ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(result => {
+            currentReviewIndex += events.length;
+            showCurrentReviewEvent();
+            const failed = result.results
+                .map((item, index) => ({ ...item, title: events[index].title }))
+                .filter(item => item.status === 'failed' || item.status === 'invalid');
+            if (failed.length > 0) {
+                uploadStatus.innerHTML = `Added ${result.written} events; ${failed.length} could not be added: ` +
+                    failed.map(item => `${item.title} (${item.error})`).join(', ');
+                uploadStatus.className = 'error';
+            } else if (!reviewStreaming) {
+                uploadStatus.innerHTML = `Added ${result.written} events!`;
+                uploadStatus.className = 'success';
+            }
+        })
+        .catch(error => console.error('Error adding events:', error))
+        .finally(() => {
+            button.disabled = false;
+        });
+    });
+    
     // Handle remove event button
     document.getElementById('removeEvent').addEventListener('click', function() {
+        if (currentReviewIndex >= reviewEvents.length) {
+            return;
+        }
         currentReviewIndex++;
         showCurrentReviewEvent();
     });
@@ -0,0 +1,533 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Protocol, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from starlette.concurrency import run_in_threadpool
+
+import aws_clients
+import event_summary
+from dynamodb_async import AsyncDynamoDB
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# dynamodb, sqlite or memory; unset lets each app pick (FastAPI.py: dynamodb, FastAPI_local.py: sqlite)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND')
+# Seconds CachingStorage serves reads without asking the backend (0 leaves the cache out)
+STORAGE_CACHE_TTL = int(os.getenv('STORAGE_CACHE_TTL', '0'))
+STORAGE_CACHE_MAX_ENTRIES = int(os.getenv('STORAGE_CACHE_MAX_ENTRIES', '10000'))
+# Events index on (user_id, start) for date-range queries, created by setup_db.py
+EVENTS_START_INDEX = 'user_id-start-index'
+# Events index on (user_id, long_end); only events longer than LONG_EVENT_DAYS have long_end
+EVENTS_END_INDEX = 'user_id-long_end-index'
+# Range reads find events up to this many days long by their start; longer ones are found
+# by their end instead. Changing it means rerunning setup_db.py to backfill long_end
+LONG_EVENT_DAYS = 7
+
+
+class StorageError(Exception):
+    """A backend failed; `code` is the backend's error code when it has one."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class Storage(Protocol):
+    """Users and events as the API routes need them, whatever keeps them.
+
+    Events are dicts shaped like the Event model plus 'user_id'. Range reads
+    take string bounds compared the way DynamoDB compares keys, and return
+    the events overlapping them (see event_overlaps).
+    """
+
+    async def get_user(self, username: str) -> Optional[dict]:
+        ...
+
+    async def add_user(self, user: dict) -> bool:
+        """Store a new user; False if the username is taken."""
+        ...
+
+    async def put_user(self, user: dict) -> None:
+        """Create or replace a user, e.g. to store an upgraded password hash."""
+        ...
+
+    def query_events(self, username: str, lower: Optional[str] = None,
+                     upper: Optional[str] = None) -> AsyncIterator[List[dict]]:
+        """Pages of a user's events, only those overlapping lower..upper when either is given."""
+        ...
+
+    async def put_event(self, username: str, event: dict) -> Optional[dict]:
+        """Create or replace an event; returns the one it replaced."""
+        ...
+
+    async def put_events(self, username: str, events: List[dict]) -> Tuple[List[Optional[dict]], Dict[int, str]]:
+        """Create or replace events with unique ids.
+
+        Returns the replaced event (or None) for each, and {index: error}
+        for those that could not be written.
+        """
+        ...
+
+    async def delete_event(self, username: str, event_id: str) -> Optional[dict]:
+        """Delete an event; returns it, or None if there was none."""
+        ...
+
+    async def summary_items(self, username: str, first_day: str, last_day: str) -> List[dict]:
+        """EventSummaries-shaped items for the days first_day..last_day (YYYY-MM-DD)."""
+        ...
+
+    async def table_names(self) -> List[str]:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+def _client_error(e):
+    return StorageError(str(e), e.response['Error']['Code'])
+
+
+def event_overlaps(event, lower=None, upper=None):
+    """Whether the event starts by `upper` and ends (or, without an end, starts) at or after `lower`."""
+    return ((lower is None or (event.get('end') or event['start']) >= lower)
+            and (upper is None or event['start'] <= upper))
+
+
+def long_event_end(event):
+    """The event's end if it is more than LONG_EVENT_DAYS days after its start, else None.
+
+    An end whose distance from the start cannot be worked out counts as long,
+    so the event is still found by its end.
+    """
+    end = event.get('end')
+    if not end:
+        return None
+    try:
+        days = (datetime.strptime(end[:10], '%Y-%m-%d') - datetime.strptime(event['start'][:10], '%Y-%m-%d')).days
+    except ValueError:
+        return end
+    return end if days > LONG_EVENT_DAYS else None
+
+
+def _event_item(username, event):
+    item = {**event, 'user_id': username}
+    item.pop('long_end', None)
+    end = long_event_end(item)
+    if end is not None:
+        item['long_end'] = end
+    return item
+
+
+class DynamoDBStorage:
+    """The Users, Events and EventSummaries tables (see setup_db.py).
+
+    Event writes also move the per-day EventSummaries aggregates, so
+    summary_items() is a single query whatever the range.
+    """
+
+    def __init__(self, dynamodb=None):
+        self.dynamodb = dynamodb or AsyncDynamoDB()
+        # Build this thread's resource now so bad credentials or region fail at startup
+        aws_clients.dynamodb_resource()
+
+    async def get_user(self, username):
+        try:
+            response = await self.dynamodb.Table('Users').get_item(Key={'username': username})
+        except ClientError as e:
+            raise _client_error(e) from e
+        return response.get('Item')
+
+    async def add_user(self, user):
+        try:
+            await self.dynamodb.Table('Users').put_item(Item=user, ConditionExpression='attribute_not_exists(username)')
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise _client_error(e) from e
+        return True
+
+    async def put_user(self, user):
+        try:
+            await self.dynamodb.Table('Users').put_item(Item=user)
+        except ClientError as e:
+            raise _client_error(e) from e
+
+    async def query_events(self, username, lower=None, upper=None):
+        table = self.dynamodb.Table('Events')
+        user = Key('user_id').eq(username)
+        try:
+            if lower is None:
+                query = {'KeyConditionExpression': user}
+                if upper is not None:
+                    query = {'IndexName': EVENTS_START_INDEX, 'KeyConditionExpression': user & Key('start').lte(upper)}
+                async for page in table.query_pages(**query):
+                    yield page
+                return
+
+            # An event of at most LONG_EVENT_DAYS days that reaches lower starts no earlier than that before it
+            first_start = (datetime.strptime(lower[:10], '%Y-%m-%d') - timedelta(days=LONG_EVENT_DAYS)).strftime('%Y-%m-%d')
+            starts = Key('start').gte(first_start) if upper is None else Key('start').between(first_start, upper)
+            async for page in table.query_pages(IndexName=EVENTS_START_INDEX, KeyConditionExpression=user & starts):
+                yield [item for item in page if 'long_end' not in item and event_overlaps(item, lower, upper)]
+            # Longer events may start any time before, so they are looked up by their end
+            async for page in table.query_pages(IndexName=EVENTS_END_INDEX,
+                                                KeyConditionExpression=user & Key('long_end').gte(lower)):
+                yield [item for item in page if event_overlaps(item, lower, upper)]
+        except ClientError as e:
+            raise _client_error(e) from e
+
+    async def _update_summaries(self, username, changes):
+        table = self.dynamodb.Table(event_summary.SUMMARY_TABLE)
+
+        async def apply(update):
+            try:
+                await table.update_item(**update)
+            except ClientError as e:
+                logger.error(f"Summary update error: {e}")
+
+        # One ADD per day touched; the days are independent, so send them together
+        await asyncio.gather(*(apply(update) for update in event_summary.batch_summary_updates(username, changes)))
+
+    async def put_event(self, username, event):
+        item = _event_item(username, event)
+        try:
+            # ALL_OLD returns the event this one replaces when an existing event is edited
+            response = await self.dynamodb.Table('Events').put_item(Item=item, ReturnValues='ALL_OLD')
+        except ClientError as e:
+            raise _client_error(e) from e
+        old_event = response.get('Attributes')
+        await self._update_summaries(username, [(old_event, item)])
+        return old_event
+
+    async def put_events(self, username, events):
+        table = self.dynamodb.Table('Events')
+        items = [_event_item(username, event) for event in events]
+        try:
+            # Batch writes cannot return ALL_OLD, so read the events being replaced first
+            existing = await table.batch_get([{'user_id': username, 'id': item['id']} for item in items])
+            failed = await table.batch_put(items, key_attributes=('user_id', 'id'))
+        except ClientError as e:
+            raise _client_error(e) from e
+        except RuntimeError as e:
+            raise StorageError(str(e)) from e
+        by_id = {item['id']: item for item in existing}
+        old_events = [by_id.get(item['id']) for item in items]
+        await self._update_summaries(username, [(old_events[index], item) for index, item in enumerate(items)
+                                                if index not in failed])
+        return old_events, failed
+
+    async def delete_event(self, username, event_id):
+        try:
+            response = await self.dynamodb.Table('Events').delete_item(
+                Key={'user_id': username, 'id': event_id}, ReturnValues='ALL_OLD')
+        except ClientError as e:
+            raise _client_error(e) from e
+        old_event = response.get('Attributes')
+        await self._update_summaries(username, [(old_event, None)])
+        return old_event
+
+    async def summary_items(self, username, first_day, last_day):
+        table = self.dynamodb.Table(event_summary.SUMMARY_TABLE)
+        items = []
+        try:
+            async for page in table.query_pages(
+                KeyConditionExpression=Key('user_id').eq(username) & Key('day').between(first_day, last_day)
+            ):
+                items.extend(page)
+        except ClientError as e:
+            raise _client_error(e) from e
+        return items
+
+    async def table_names(self):
+        try:
+            return await self.dynamodb.table_names()
+        except ClientError as e:
+            raise _client_error(e) from e
+
+    def close(self):
+        self.dynamodb.shutdown()
+
+
+async def _computed_summary_items(storage, username, first_day, last_day):
+    """Summary items built from the events themselves, for backends without an aggregate table."""
+    events = []
+    # '~' sorts after every time, so the whole last day is included
+    async for page in storage.query_events(username, first_day, last_day + '~'):
+        # Summaries count an event on its start day, so leave out those only running into the range
+        events.extend(event for event in page if event['start'] >= first_day)
+    return event_summary.summary_items(username, events)
+
+
+class SQLiteStorage:
+    """SQLiteStore (one file, WAL mode) with its calls moved off the event loop."""
+
+    def __init__(self, store=None):
+        self.store = store or SQLiteStore()
+
+    async def _call(self, method, *args):
+        try:
+            return await run_in_threadpool(getattr(self.store, method), *args)
+        except sqlite3.Error as e:
+            raise StorageError(str(e), type(e).__name__) from e
+
+    async def get_user(self, username):
+        return await self._call('get_user', username)
+
+    async def add_user(self, user):
+        return await self._call('add_user', user)
+
+    async def put_user(self, user):
+        await self._call('put_user', user)
+
+    async def query_events(self, username, lower=None, upper=None):
+        yield await self._call('query_events', username, lower, upper)
+
+    async def put_event(self, username, event):
+        return await self._call('put_event', username, event)
+
+    async def put_events(self, username, events):
+        return await self._call('put_events', username, events), {}
+
+    async def delete_event(self, username, event_id):
+        return await self._call('delete_event', username, event_id)
+
+    async def summary_items(self, username, first_day, last_day):
+        return await _computed_summary_items(self, username, first_day, last_day)
+
+    async def table_names(self):
+        return await self._call('table_names')
+
+    def close(self):
+        self.store.close()
+
+
+class MemoryStorage:
+    """Dicts in this process; for tests and load tests that should not touch a database."""
+
+    def __init__(self):
+        self.users = {}
+        self.events = defaultdict(dict)
+
+    async def get_user(self, username):
+        return self.users.get(username)
+
+    async def add_user(self, user):
+        if user['username'] in self.users:
+            return False
+        self.users[user['username']] = dict(user)
+        return True
+
+    async def put_user(self, user):
+        self.users[user['username']] = dict(user)
+
+    async def query_events(self, username, lower=None, upper=None):
+        events = self.events.get(username, {}).values()
+        if lower is None and upper is None:
+            yield list(events)
+            return
+        yield sorted((event for event in events if event_overlaps(event, lower, upper)), key=lambda event: event['start'])
+
+    async def put_event(self, username, event):
+        old_event = self.events[username].get(event['id'])
+        self.events[username][event['id']] = {**event, 'user_id': username}
+        return old_event
+
+    async def put_events(self, username, events):
+        return [await self.put_event(username, event) for event in events], {}
+
+    async def delete_event(self, username, event_id):
+        return self.events.get(username, {}).pop(event_id, None)
+
+    async def summary_items(self, username, first_day, last_day):
+        return await _computed_summary_items(self, username, first_day, last_day)
+
+    async def table_names(self):
+        return ['users', 'events']
+
+    def close(self):
+        pass
+
+
+class CachingStorage:
+    """Read-through cache in front of another Storage.
+
+    Users, event queries and summaries are kept for `ttl` seconds in an LRU
+    of at most `max_entries`. Writes through this object drop the writer's
+    entries at once; writes made by other processes show up once the TTL
+    runs out, so keep it short when several workers share a backend.
+    """
+
+    def __init__(self, backend, ttl=STORAGE_CACHE_TTL, max_entries=STORAGE_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_user = defaultdict(set)
+        # username -> [backend reads in flight, invalidations since they began], dropped when none are
+        self._reads = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._keys_by_user[key[1]].add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._keys_by_user[old_key[1]].discard(old_key)
+
+    def invalidate_user(self, username):
+        """Drop everything cached for `username`."""
+        with self._lock:
+            for key in self._keys_by_user.pop(username, ()):
+                self._entries.pop(key, None)
+            reads = self._reads.get(username)
+            if reads is not None:
+                reads[1] += 1
+
+    def _start_read(self, username):
+        """Note a backend read for `username`; returns the generation to hand to _finish_read."""
+        with self._lock:
+            reads = self._reads.setdefault(username, [0, 0])
+            reads[0] += 1
+            return reads[1]
+
+    def _finish_read(self, username, generation, key, value):
+        """End a backend read, caching `value` unless it is None or a write invalidated `username` meanwhile.
+
+        A read that began before a write may return what the write replaced;
+        caching it after the write's invalidation would serve it for the whole TTL.
+        """
+        with self._lock:
+            reads = self._reads[username]
+            current = reads[1] == generation
+            reads[0] -= 1
+            if not reads[0]:
+                del self._reads[username]
+        if current and value is not None:
+            self._put(key, value)
+
+    async def get_user(self, username):
+        key = ('user', username)
+        user = self._get(key)
+        if user is None:
+            generation = self._start_read(username)
+            try:
+                user = await self.backend.get_user(username)
+            finally:
+                # Unknown users are not cached, so a new registration is seen at once
+                self._finish_read(username, generation, key, user)
+        return user
+
+    async def add_user(self, user):
+        self.invalidate_user(user['username'])
+        return await self.backend.add_user(user)
+
+    async def put_user(self, user):
+        try:
+            await self.backend.put_user(user)
+        finally:
+            self.invalidate_user(user['username'])
+
+    async def query_events(self, username, lower=None, upper=None):
+        key = ('events', username, lower, upper)
+        pages = self._get(key)
+        if pages is None:
+            pages = []
+            complete = False
+            generation = self._start_read(username)
+            try:
+                async for page in self.backend.query_events(username, lower, upper):
+                    pages.append(page)
+                    yield page
+                complete = True
+            finally:
+                # A read abandoned part way, or cut short by an error, is not cached
+                self._finish_read(username, generation, key, pages if complete else None)
+            return
+        for page in pages:
+            yield page
+
+    async def put_event(self, username, event):
+        try:
+            return await self.backend.put_event(username, event)
+        finally:
+            self.invalidate_user(username)
+
+    async def put_events(self, username, events):
+        try:
+            return await self.backend.put_events(username, events)
+        finally:
+            self.invalidate_user(username)
+
+    async def delete_event(self, username, event_id):
+        try:
+            return await self.backend.delete_event(username, event_id)
+        finally:
+            self.invalidate_user(username)
+
+    async def summary_items(self, username, first_day, last_day):
+        key = ('summary', username, first_day, last_day)
+        items = self._get(key)
+        if items is None:
+            generation = self._start_read(username)
+            try:
+                items = await self.backend.summary_items(username, first_day, last_day)
+            finally:
+                self._finish_read(username, generation, key, items)
+        return items
+
+    async def table_names(self):
+        return await self.backend.table_names()
+
+    def close(self):
+        self.backend.close()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'ttl': self.ttl,
+            }
+
+
+def storage_from_env(default_backend='dynamodb'):
+    """Build the Storage selected by STORAGE_BACKEND, behind CachingStorage when STORAGE_CACHE_TTL > 0."""
+    backends = {
+        'dynamodb': DynamoDBStorage,
+        'sqlite': SQLiteStorage,
+        'memory': MemoryStorage,
+    }
+    backend = STORAGE_BACKEND or default_backend
+    if backend not in backends:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    storage = backends[backend]()
+    if STORAGE_CACHE_TTL > 0:
+        storage = CachingStorage(storage)
+    return storage
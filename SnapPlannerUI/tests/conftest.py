@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# The app modules live one directory up and are imported by name, as FastAPI.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# api.py refuses to import without a signing key
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret')
+# boto3 insists on credentials even when talking to a local stand-in
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+
+from fake_dynamodb import FakeDynamoDB  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def dynamodb_server():
+    # One server for the whole run: aws_clients keeps its clients (and per-thread
+    # resources) for the life of the process, pointed at whichever endpoint came first
+    with FakeDynamoDB() as fake:
+        os.environ['DYNAMODB_ENDPOINT_URL'] = fake.url
+        yield fake
+
+
+@pytest.fixture
+def fake_dynamodb(dynamodb_server):
+    """The FakeDynamoDB the AWS clients talk to, with every table empty."""
+    for items in dynamodb_server.items.values():
+        items.clear()
+    return dynamodb_server
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    """TestClient factory for create_app(storage), with fresh per-process auth state.
+
+    This Starlette's TestClient runs the app on the current event loop, which
+    asyncio.run() in other tests leaves unset, so each test gets its own.
+    """
+    import api
+    from fastapi.testclient import TestClient
+    from password_hashing import LoginRateLimiter
+    from principal_cache import PrincipalCache
+
+    monkeypatch.setattr(api, 'principal_cache', PrincipalCache())
+    monkeypatch.setattr(api, 'login_limiter', LoginRateLimiter())
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    clients = []
+
+    def make(storage):
+        client = TestClient(api.create_app(storage))
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.__exit__(None, None, None)
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def auth_header(username):
+    import api
+    return {'Authorization': f"Bearer {api.create_access_token({'sub': username})}"}
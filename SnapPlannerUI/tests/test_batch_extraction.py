@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """FastAPI's batch extraction with extract_events replaced by work that tracks its concurrency."""
+    import FastAPI
+    state = {'lock': threading.Lock(), 'running': 0, 'peak': 0}
+
+    def extract_events(file_path, kind, digest):
+        with state['lock']:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with state['lock']:
+            state['running'] -= 1
+        if file_path == 'broken':
+            raise ValueError('Lambda failed')
+        return [{'eventTitle': file_path, 'startDate': '2025-03-10'}]
+
+    monkeypatch.setattr(FastAPI, 'extract_events', extract_events)
+    return FastAPI, state
+
+
+def upload(name, events=None):
+    return {'filename': name, 'file_path': name, 'kind': 'image', 'digest': name, 'events': events}
+
+
+def test_batch_stays_within_its_fan_out(batch):
+    FastAPI, state = batch
+    reports = []
+    uploads = [upload(f'page{i}') for i in range(6)]
+    events = FastAPI.extract_batch(reports.append, uploads, 2)
+    assert state['peak'] == 2
+    assert [event['eventTitle'] for event in events] == [f'page{i}' for i in range(6)]
+    assert sorted(report['file'] for report in reports) == [f'page{i}' for i in range(6)]
+
+
+def test_cached_and_failed_files_are_reported(batch):
+    FastAPI, state = batch
+    reports = []
+    cached = [{'eventTitle': 'cached', 'startDate': '2025-03-11'}]
+    uploads = [upload('cached', cached), upload('broken'), upload('page')]
+    events = FastAPI.extract_batch(reports.append, uploads, 1)
+    assert state['peak'] == 1
+    assert reports[0] == {'file': 'cached', 'events': cached, 'cached': True}
+    assert {'file': 'broken', 'error': 'Lambda failed'} in reports
+    assert [event['eventTitle'] for event in events] == ['cached', 'page']
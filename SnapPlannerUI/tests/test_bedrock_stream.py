@@ -0,0 +1,194 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError, NoCredentialsError
+
+import bedrock_stream
+from bedrock_stream import EventArrayParser, EventMerger
+
+EVENTS = [
+    {'eventTitle': 'Midterm', 'startDate': '2025-03-10T09:00:00-0500', 'tags': ['exam']},
+    {'eventTitle': 'Essay {draft} "due"', 'startDate': '2025-03-12T23:59:00-0500', 'tags': ['writing', 'x]y']},
+    {'eventTitle': 'Office hours', 'startDate': '2025-03-13T14:00:00-0500', 'tags': [], 'nested': {'a': [1, {'b': 2}]}},
+]
+ANSWER = 'Here are the events:\n' + json.dumps(EVENTS, indent=2) + '\nLet me know if you need more.'
+
+
+def feed_all(pieces):
+    parser = EventArrayParser()
+    objects = []
+    for piece in pieces:
+        objects.extend(parser.feed(piece))
+    return objects
+
+
+def test_parser_whole_answer():
+    assert feed_all([ANSWER]) == EVENTS
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 50])
+def test_parser_split_answer(size):
+    assert feed_all([ANSWER[i:i + size] for i in range(0, len(ANSWER), size)]) == EVENTS
+
+
+def test_parser_every_split_point():
+    for i in range(len(ANSWER)):
+        assert feed_all([ANSWER[:i], ANSWER[i:]]) == EVENTS, i
+
+
+def test_parser_returns_each_event_once_it_closes():
+    parser = EventArrayParser()
+    first = json.dumps(EVENTS[0])
+    assert parser.feed('[' + first[:-1]) == []
+    assert parser.feed(first[-1:] + ', {"eventTitle"') == [EVENTS[0]]
+    assert parser.feed(': "x"}') == [{'eventTitle': 'x'}]
+
+
+def test_parser_cut_off_answer_keeps_complete_events():
+    text = json.dumps(EVENTS)
+    cut = text.index('Office') - 5
+    assert feed_all([text[:cut]]) == EVENTS[:2]
+
+
+def test_parser_ignores_text_after_the_array():
+    assert feed_all(['[{"a": 1}] and [{"b": 2}]']) == [{'a': 1}]
+
+
+def test_parser_skips_invalid_and_non_object_items():
+    assert feed_all(['[{"a": 1,}, [1, 2], {"b": 2}]']) == [{'b': 2}]
+
+
+def test_merger_drops_repeats_and_unions_tags():
+    merger = EventMerger()
+    assert merger.add({'eventTitle': 'Midterm', 'startDate': 'd', 'tags': ['exam']})
+    assert not merger.add({'eventTitle': ' midterm ', 'startDate': 'd', 'tags': ['exam', 'school']})
+    assert merger.add({'eventTitle': 'Midterm', 'startDate': 'e'})
+    assert merger.events() == [
+        {'eventTitle': 'Midterm', 'startDate': 'd', 'tags': ['exam', 'school']},
+        {'eventTitle': 'Midterm', 'startDate': 'e'},
+    ]
+
+
+class FakeStreamingBedrock:
+    """Answers invoke_model_with_response_stream with `text` a few characters per message."""
+
+    def __init__(self, text, stop_reason='end_turn'):
+        self.text = text
+        self.stop_reason = stop_reason
+        self.prompts = []
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        self.prompts.append(json.loads(body)['messages'][0]['content'])
+        messages = [{'type': 'content_block_delta', 'delta': {'text': self.text[i:i + 5]}}
+                    for i in range(0, len(self.text), 5)]
+        messages.append({'type': 'message_delta', 'delta': {'stop_reason': self.stop_reason}})
+        return {'body': [{'chunk': {'bytes': json.dumps(message).encode()}} for message in messages]}
+
+
+def test_stream_events(monkeypatch):
+    bedrock = FakeStreamingBedrock(ANSWER)
+    monkeypatch.setattr(bedrock_stream.aws_clients, 'bedrock_client', lambda: bedrock)
+    seen = []
+    events = bedrock_stream.stream_events('system', 'header:', ['one', 'two'], on_event=seen.append)
+    # Both chunks gave the same answer, so each event is reported once
+    assert sorted(bedrock.prompts) == ['header:one', 'header:two']
+    assert events == EVENTS
+    assert sorted(event['eventTitle'] for event in seen) == sorted(event['eventTitle'] for event in EVENTS)
+
+
+PROMPTS = {'system': 'system', 'header': 'header:', 'chunks': ['one']}
+
+
+@pytest.fixture
+def extraction(monkeypatch):
+    """FastAPI's extraction with the Lambda replaced; returns the calls it made to it."""
+    import FastAPI
+    calls = []
+
+    def pdf_to_prompts(file_path):
+        calls.append('prompts')
+        return PROMPTS
+
+    def pdf_to_events(file_path):
+        calls.append('events')
+        return {'events': EVENTS}
+
+    def invoke_prompts(prompts):
+        calls.append(('run prompts', prompts))
+        return {'statusCode': 200, 'body': json.dumps(EVENTS)}
+
+    monkeypatch.setattr(FastAPI.pdf_processor, 'pdfToPrompts', pdf_to_prompts)
+    monkeypatch.setattr(FastAPI.pdf_processor, 'pdfToEvents', pdf_to_events)
+    monkeypatch.setattr(FastAPI, 'invoke_prompts', invoke_prompts)
+    monkeypatch.setattr(FastAPI, 'extraction_cache', None)
+    return FastAPI, calls
+
+
+@pytest.mark.parametrize('error', [
+    ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'no'}}, 'InvokeModelWithResponseStream'),
+    NoCredentialsError(),
+    EndpointConnectionError(endpoint_url='https://bedrock-runtime.us-east-1.amazonaws.com'),
+])
+def test_streaming_falls_back_to_lambda_with_the_same_prompts(extraction, monkeypatch, tmp_path, error):
+    FastAPI, calls = extraction
+
+    def unreachable(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(FastAPI.bedrock_stream, 'stream_events', unreachable)
+    monkeypatch.setattr(FastAPI, 'EXTRACTION_STREAMING', True)
+    assert FastAPI.extract_events(str(tmp_path / 'upload.pdf'), 'pdf', 'digest') == EVENTS
+    # The document went through the Lambda once; only Bedrock ran again
+    assert calls == ['prompts', ('run prompts', PROMPTS)]
+
+
+def test_streaming_failure_after_events_is_not_retried(extraction, monkeypatch, tmp_path):
+    FastAPI, calls = extraction
+
+    def fails_midway(system, header, chunks, on_event=None):
+        on_event(EVENTS[0])
+        raise NoCredentialsError()
+
+    monkeypatch.setattr(FastAPI.bedrock_stream, 'stream_events', fails_midway)
+    monkeypatch.setattr(FastAPI, 'EXTRACTION_STREAMING', True)
+    seen = []
+    with pytest.raises(NoCredentialsError):
+        FastAPI.extract_events(str(tmp_path / 'upload.pdf'), 'pdf', 'digest', on_event=seen.append)
+    assert seen == [EVENTS[0]]
+    assert calls == ['prompts']
+
+
+def test_streaming_off_uses_the_lambda(extraction, monkeypatch, tmp_path):
+    FastAPI, calls = extraction
+    monkeypatch.setattr(FastAPI, 'EXTRACTION_STREAMING', False)
+    assert FastAPI.extract_events(str(tmp_path / 'upload.pdf'), 'pdf', 'digest') == EVENTS
+    assert calls == ['events']
+
+
+@pytest.mark.parametrize('result, cached', [
+    ({'events': EVENTS}, True),
+    ({'events': []}, False),
+    ({'events': None}, False),
+    ({'events': EVENTS[:1], 'truncated': True}, False),
+])
+def test_only_successful_extractions_are_cached(extraction, monkeypatch, tmp_path, result, cached):
+    from extraction_cache import ExtractionCache, MemoryCacheBackend
+    FastAPI, calls = extraction
+    cache = ExtractionCache(MemoryCacheBackend())
+    monkeypatch.setattr(FastAPI, 'extraction_cache', cache)
+    monkeypatch.setattr(FastAPI, 'EXTRACTION_STREAMING', False)
+    monkeypatch.setattr(FastAPI.pdf_processor, 'pdfToEvents', lambda file_path: result)
+    assert FastAPI.extract_events(str(tmp_path / 'upload.pdf'), 'pdf', 'digest') == result['events']
+    assert cache.get('digest', 'pdf') == (result['events'] if cached else None)
+
+
+def test_batch_dedupe_matches_the_stream_merger():
+    import FastAPI
+    first = [{'eventTitle': 'Midterm', 'startDate': 'd', 'tags': ['exam']}, {'eventTitle': 'Quiz', 'startDate': 'e'}]
+    second = [{'eventTitle': 'MIDTERM', 'startDate': 'd', 'tags': ['school']}]
+    assert FastAPI.dedupe_events([first, None, second]) == [
+        {'eventTitle': 'Midterm', 'startDate': 'd', 'tags': ['exam', 'school']},
+        {'eventTitle': 'Quiz', 'startDate': 'e'},
+    ]
+    # Merging never changes the extracted lists themselves
+    assert first[0]['tags'] == ['exam']
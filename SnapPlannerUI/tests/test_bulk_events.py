@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+import api
+from conftest import auth_header
+from storage import MemoryStorage
+
+
+class FlakyStorage(MemoryStorage):
+    """MemoryStorage whose batched writes leave events with a given title unwritten."""
+
+    async def put_events(self, username, events):
+        old_events, failed = [], {}
+        for position, event in enumerate(events):
+            if event['title'] == 'Unlucky':
+                old_events.append(None)
+                failed[position] = 'ProvisionedThroughputExceededException'
+            else:
+                old_events.append(await self.put_event(username, event))
+        return old_events, failed
+
+
+def run(coro):
+    # On make_client's loop: asyncio.run() would leave the TestClient without one
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def event(event_id, **fields):
+    return {'id': event_id, 'title': 'Lecture', 'start': '2025-03-10T09:00', 'end': '2025-03-10T10:00', **fields}
+
+
+@pytest.fixture
+def storage(make_client):
+    storage = MemoryStorage()
+    run(storage.add_user({'username': 'alice', 'password': 'x'}))
+    return storage
+
+
+def stored(storage):
+    async def collect():
+        return [event async for page in storage.query_events('alice') for event in page]
+    return {event['id']: event for event in run(collect())}
+
+
+def test_statuses_per_entry(make_client, storage):
+    run(storage.put_event('alice', event('old', title='Before')))
+    client = make_client(storage)
+    response = client.post('/events/bulk', headers=auth_header('alice'), json=[
+        event('new'),
+        event('old', title='After'),
+        {'id': 'bad', 'start': '2025-03-10T09:00'},
+        event('new', title='Again'),
+        event('late', start=None),
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['written'], body['failed']) == (2, 3)
+    results = body['results']
+    assert results[0] == {'id': 'new', 'status': 'created'}
+    assert results[1] == {'id': 'old', 'status': 'updated'}
+    assert results[2]['status'] == 'invalid' and 'title' in results[2]['error']
+    assert results[3] == {'id': 'new', 'status': 'invalid', 'error': 'Duplicate id in this request'}
+    assert results[4]['status'] == 'invalid'
+    events = stored(storage)
+    assert sorted(events) == ['new', 'old']
+    # The first of the duplicates is the one written
+    assert events['new']['title'] == 'Lecture'
+    assert events['old']['title'] == 'After'
+
+
+def test_failed_writes_are_reported(make_client):
+    storage = FlakyStorage()
+    run(storage.add_user({'username': 'alice', 'password': 'x'}))
+    client = make_client(storage)
+    response = client.post('/events/bulk', headers=auth_header('alice'), json=[
+        event('a'), event('b', title='Unlucky'), {'id': 'c'}, event('d'),
+    ])
+    body = response.json()
+    assert (body['written'], body['failed']) == (2, 2)
+    assert [result['status'] for result in body['results']] == ['created', 'failed', 'invalid', 'created']
+    assert body['results'][1] == {'id': 'b', 'status': 'failed', 'error': 'ProvisionedThroughputExceededException'}
+    assert sorted(stored(storage)) == ['a', 'd']
+
+
+def test_too_many_events(make_client, storage, monkeypatch):
+    monkeypatch.setattr(api, 'BULK_EVENTS_MAX', 3)
+    client = make_client(storage)
+    response = client.post('/events/bulk', headers=auth_header('alice'),
+                           json=[event(str(number)) for number in range(4)])
+    assert response.status_code == 413
+    assert stored(storage) == {}
+    assert client.post('/events/bulk', headers=auth_header('alice'),
+                       json=[event(str(number)) for number in range(3)]).json()['written'] == 3
+
+
+def test_requires_a_user(make_client, storage):
+    client = make_client(storage)
+    assert client.post('/events/bulk', json=[event('a')]).status_code == 401
+    assert client.post('/events/bulk', headers=auth_header('mallory'), json=[event('a')]).status_code == 401
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+import api
+import storage as storage_module
+from sqlite_store import SQLiteStore
+from conftest import auth_header
+from storage import DynamoDBStorage, MemoryStorage, SQLiteStorage, StorageError, long_event_end
+
+EVENTS = [
+    {'id': 'inside', 'title': 'Lecture', 'start': '2025-03-11T10:00', 'end': '2025-03-11T11:00'},
+    {'id': 'no-end', 'title': 'Deadline', 'start': '2025-03-12T23:59'},
+    {'id': 'running-in', 'title': 'Trip', 'start': '2025-03-07T08:00', 'end': '2025-03-10T18:00'},
+    {'id': 'semester', 'title': 'Semester', 'start': '2025-01-13', 'end': '2025-05-09'},
+    {'id': 'long-ended', 'title': 'Winter break', 'start': '2024-12-20', 'end': '2025-01-10'},
+    {'id': 'ended-before', 'title': 'Quiz', 'start': '2025-03-08T09:00', 'end': '2025-03-08T10:00'},
+    {'id': 'starts-on-end-day', 'title': 'All day', 'start': '2025-03-16'},
+    {'id': 'after', 'title': 'Later', 'start': '2025-03-16T09:00', 'end': '2025-03-16T10:00'},
+    {'id': 'odd-dates', 'title': 'Someday', 'start': 'soon', 'end': 'later'},
+]
+WEEK = ('2025-03-09', '2025-03-16')
+IN_WEEK = {'inside', 'no-end', 'running-in', 'semester', 'starts-on-end-day'}
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'dynamodb'])
+def storage(request, tmp_path):
+    if request.param == 'memory':
+        backend = MemoryStorage()
+    elif request.param == 'sqlite':
+        backend = SQLiteStorage(SQLiteStore(str(tmp_path / 'events.db')))
+    else:
+        request.getfixturevalue('fake_dynamodb')
+        backend = DynamoDBStorage()
+    asyncio.run(backend.put_events('alice', [dict(event, end=event.get('end')) for event in EVENTS]))
+    yield backend
+    backend.close()
+
+
+def query(storage, lower=None, upper=None):
+    async def collect():
+        events = []
+        async for page in storage.query_events('alice', lower, upper):
+            events.extend(page)
+        return events
+
+    events = asyncio.run(collect())
+    ids = [event['id'] for event in events]
+    assert len(ids) == len(set(ids)), ids
+    return set(ids)
+
+
+def test_range_returns_every_overlapping_event(storage):
+    assert query(storage, *WEEK) == IN_WEEK
+
+
+def test_open_ranges(storage):
+    assert query(storage) == {event['id'] for event in EVENTS}
+    assert query(storage, upper='2025-01-01') == {'long-ended'}
+    assert query(storage, lower='2025-03-16') == {'semester', 'starts-on-end-day', 'after', 'odd-dates'}
+
+
+def test_event_moved_out_of_range(storage):
+    asyncio.run(storage.put_event('alice', {'id': 'semester', 'title': 'Semester', 'start': '2025-01-13',
+                                            'end': '2025-02-01'}))
+    assert query(storage, *WEEK) == IN_WEEK - {'semester'}
+
+
+def test_long_event_end():
+    assert long_event_end({'start': '2025-03-01T09:00', 'end': '2025-03-08T09:00'}) is None
+    assert long_event_end({'start': '2025-03-01T09:00', 'end': '2025-03-09T09:00'}) == '2025-03-09T09:00'
+    assert long_event_end({'start': '2025-03-01', 'end': None}) is None
+    assert long_event_end({'start': 'soon', 'end': 'later'}) == 'later'
+
+
+def test_dynamodb_reads_only_nearby_and_long_events(fake_dynamodb, monkeypatch):
+    storage = DynamoDBStorage()
+    asyncio.run(storage.put_events('alice', EVENTS))
+    queries = []
+    original = fake_dynamodb._op_Query
+
+    def counting_query(body):
+        result = original(body)
+        queries.append((body['IndexName'], result['Count']))
+        return result
+
+    monkeypatch.setattr(fake_dynamodb, '_op_Query', counting_query)
+    assert query(storage, *WEEK) == IN_WEEK
+    storage.close()
+    # Short events from LONG_EVENT_DAYS before the week on, then the long ones still running
+    assert queries == [(storage_module.EVENTS_START_INDEX, 5), (storage_module.EVENTS_END_INDEX, 2)]
+
+
+def test_summaries_count_events_on_their_start_day():
+    storage = MemoryStorage()
+    asyncio.run(storage.put_events('alice', EVENTS))
+    items = asyncio.run(storage.summary_items('alice', '2025-03-09', '2025-03-15'))
+    assert sorted(item['day'] for item in items) == ['2025-03-11']
+
+
+class PagedStorage(MemoryStorage):
+    """MemoryStorage that returns one event per page and fails after `fail_after` pages."""
+
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.fail_after = fail_after
+
+    async def query_events(self, username, lower=None, upper=None):
+        async for page in super().query_events(username, lower, upper):
+            for number, event in enumerate(page):
+                if number == self.fail_after:
+                    raise StorageError('throttled', 'ProvisionedThroughputExceededException')
+                yield [event]
+
+
+def events_route(make_client, fail_after):
+    storage = PagedStorage(fail_after)
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(storage.add_user({'username': 'alice', 'password': 'x'}))
+    loop.run_until_complete(storage.put_events('alice', EVENTS[:3]))
+    client = make_client(storage)
+    return client.get('/events/', headers=auth_header('alice'))
+
+
+def test_route_streams_every_page(make_client):
+    response = events_route(make_client, None)
+    assert response.status_code == 200
+    assert [event['id'] for event in response.json()] == ['inside', 'no-end', 'running-in']
+
+
+def test_route_failing_on_the_first_page_is_a_500(make_client):
+    assert events_route(make_client, 0).status_code == 500
+
+
+def test_route_failing_part_way_ends_with_the_marker(make_client):
+    response = events_route(make_client, 2)
+    assert response.status_code == 200
+    # Still valid JSON, with what was sent and then the marker
+    events = response.json()
+    assert [event['id'] for event in events[:-1]] == ['inside', 'no-end']
+    assert events[-1] == api.EVENTS_INCOMPLETE_MARKER
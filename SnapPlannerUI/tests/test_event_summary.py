@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from event_summary import batch_summary_updates, summarize, summary_items
+
+
+def client_summary(events, start, end, granularity):
+    """The calendar's old updateSummary (static/script.js), on the events it had loaded."""
+    tag_hours = {}
+    scheduled = 0
+    for event in events:
+        event_start = datetime.fromisoformat(event['start'])
+        if not start <= event_start <= end:
+            continue
+        event_end = datetime.fromisoformat(event['end']) if event.get('end') else None
+        # FullCalendar drops an end that is not after the start
+        duration = (event_end - event_start) / timedelta(hours=1) if event_end and event_end > event_start else 0
+        scheduled += duration
+        if event.get('tags') and duration > 0:
+            for tag in (tag.strip() for tag in event['tags'].split(',')):
+                if tag:
+                    tag_hours[tag] = tag_hours.get(tag, 0) + duration
+    if granularity == 'month':
+        available = -(-(end - start) // timedelta(days=1)) * 24
+    else:
+        available = {'day': 24, 'week': 7 * 24}[granularity]
+    return {'tagHours': tag_hours, 'scheduledHours': scheduled, 'unscheduledHours': available - scheduled}
+
+
+def random_events(rng, count, first_day):
+    events = []
+    for number in range(count):
+        start = first_day + timedelta(days=rng.randrange(50), minutes=rng.randrange(24 * 4) * 15)
+        if rng.random() < 0.2:
+            start = start.replace(hour=0, minute=0)
+        event = {'id': str(number), 'title': 'Event', 'start': start.isoformat(timespec='minutes'),
+                 'tags': rng.choice([None, '', 'school', 'school, work', ' work ,  ,athletics', 'a,a'])}
+        roll = rng.random()
+        if roll < 0.1:
+            event['end'] = None
+        elif roll < 0.15:
+            # Not after the start
+            event['end'] = (start - timedelta(minutes=rng.choice([0, 30]))).isoformat(timespec='minutes')
+        else:
+            event['end'] = (start + timedelta(minutes=rng.randrange(1, 48 * 4) * 15)).isoformat(timespec='minutes')
+        events.append(event)
+    return events
+
+
+def views(first_day):
+    """(granularity, activeStart, activeEnd) for every day, week and month view over the events."""
+    for offset in range(50):
+        day = first_day + timedelta(days=offset)
+        yield 'day', day, day + timedelta(days=1)
+        yield 'week', day, day + timedelta(days=7)
+    for offset in (0, 7, 14):
+        # A month grid shows whole weeks around the month
+        yield 'month', first_day + timedelta(days=offset), first_day + timedelta(days=offset + 35)
+        yield 'month', first_day + timedelta(days=offset), first_day + timedelta(days=offset + 42)
+
+
+def server_summary(items, start, end, granularity):
+    # The /summary route reads the items of the days from start's to end's
+    in_range = [item for item in items if start.strftime('%Y-%m-%d') <= item['day'] <= end.strftime('%Y-%m-%d')]
+    return summarize(in_range, start, end, granularity)
+
+
+def assert_same(server, client):
+    assert server['scheduledHours'] == pytest.approx(client['scheduledHours'])
+    assert server['unscheduledHours'] == pytest.approx(client['unscheduledHours'])
+    assert server['tagHours'].keys() == client['tagHours'].keys()
+    for tag, hours in client['tagHours'].items():
+        assert server['tagHours'][tag] == pytest.approx(hours), tag
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_client_side_math(seed):
+    rng = random.Random(seed)
+    first_day = datetime(2025, 2, 23)
+    events = random_events(rng, 150, first_day)
+    items = summary_items('alice', events)
+    for granularity, start, end in views(first_day):
+        assert_same(server_summary(items, start, end, granularity), client_summary(events, start, end, granularity))
+
+
+def apply(items, updates):
+    """Apply update_item ADDs the way DynamoDB would."""
+    for update in updates:
+        item = items.setdefault(update['Key']['day'], dict(update['Key']))
+        names = update['ExpressionAttributeNames']
+        for placeholder, value in update['ExpressionAttributeValues'].items():
+            attribute = names['#a' + placeholder[2:]]
+            item[attribute] = item.get(attribute, 0) + value
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_incremental_updates_match_recomputing(seed):
+    rng = random.Random(seed)
+    first_day = datetime(2025, 2, 23)
+    events = {event['id']: event for event in random_events(rng, 80, first_day)}
+    items = {}
+    apply(items, batch_summary_updates('alice', [(None, event) for event in events.values()]))
+    # Edits, moves, deletes and batches of them, as the routes send them
+    replacements = random_events(rng, 120, first_day)
+    for batch in range(30):
+        changes = []
+        for _ in range(rng.randrange(1, 5)):
+            event_id = rng.choice(list(events))
+            old_event = events[event_id]
+            if rng.random() < 0.3:
+                del events[event_id]
+                changes.append((old_event, None))
+            else:
+                new_event = {**replacements.pop(), 'id': event_id}
+                if rng.random() < 0.3:
+                    # A title-only edit changes no summary
+                    new_event = {**old_event, 'title': 'Renamed'}
+                events[event_id] = new_event
+                changes.append((old_event, new_event))
+        apply(items, batch_summary_updates('alice', changes))
+
+    expected = {item['day']: item for item in summary_items('alice', events.values())}
+    for day, item in items.items():
+        nonzero = {key: value for key, value in item.items() if key not in ('user_id', 'day') and value}
+        assert nonzero == {key: value for key, value in expected.get(day, {}).items()
+                           if key not in ('user_id', 'day')}, day
+    for granularity, start, end in views(first_day):
+        assert_same(server_summary(list(items.values()), start, end, granularity),
+                    client_summary(list(events.values()), start, end, granularity))
+
+
+def test_title_only_edit_writes_nothing():
+    event = {'id': '1', 'start': '2025-03-10T09:00', 'end': '2025-03-10T10:00', 'tags': 'school'}
+    assert batch_summary_updates('alice', [(event, {**event, 'title': 'Renamed'})]) == []
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+import extraction_cache
+from extraction_cache import DiskCacheBackend, DynamoDBCacheBackend, ExtractionCache, MemoryCacheBackend
+
+EVENTS = [{'eventTitle': 'Midterm', 'startDate': '2025-03-10T09:00:00-05:00', 'tags': ['exam']}]
+
+
+@pytest.fixture(params=['memory', 'disk', 'dynamodb'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCacheBackend()
+    if request.param == 'disk':
+        return DiskCacheBackend(directory=str(tmp_path))
+    request.getfixturevalue('fake_dynamodb')
+    return DynamoDBCacheBackend()
+
+
+def test_hit_and_miss(backend):
+    cache = ExtractionCache(backend)
+    assert cache.get('abc', 'pdf') is None
+    cache.set('abc', 'pdf', EVENTS)
+    assert cache.get('abc', 'pdf') == EVENTS
+    # Same bytes uploaded as the other kind, or under another prompt version, are different entries
+    assert cache.get('abc', 'image') is None
+    assert ExtractionCache(backend, version='other').get('abc', 'pdf') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+    assert cache.stats()['hit_rate'] == 1 / 3
+
+
+def test_keys_follow_the_extraction_day(monkeypatch):
+    cache = ExtractionCache(MemoryCacheBackend())
+    key = cache.key('abc', 'pdf')
+    # 26 hours apart, so never the same day: the Lambda would resolve "tomorrow" differently
+    monkeypatch.setattr(extraction_cache, 'EXTRACTION_UTC_OFFSET_HOURS', 14)
+    east = cache.key('abc', 'pdf')
+    monkeypatch.setattr(extraction_cache, 'EXTRACTION_UTC_OFFSET_HOURS', -12)
+    assert cache.key('abc', 'pdf') != east
+    monkeypatch.setattr(extraction_cache, 'EXTRACTION_UTC_OFFSET_HOURS', -5)
+    assert cache.key('abc', 'pdf') == key
+
+
+def test_expired_entries_miss(backend):
+    backend.set('key', EVENTS, -10)
+    assert backend.get('key') is None
+
+
+def test_memory_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set('a', 1, 60)
+    backend.set('b', 2, 60)
+    assert backend.get('a') == 1
+    backend.set('c', 3, 60)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    assert backend.get('c') == 3
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+    backend = DiskCacheBackend(directory=str(tmp_path), max_bytes=10 ** 6)
+    backend.set('a', 'x' * 100, 60)
+    # Room for two entries; their expiry times may differ in length by a few bytes
+    backend.max_bytes = backend._size * 2 + 20
+    past = time.time() - 100
+    os.utime(backend._path('a'), (past, past))
+    backend.set('b', 'x' * 100, 60)
+    os.utime(backend._path('b'), (past + 1, past + 1))
+    # Reading a makes b the least recently used
+    assert backend.get('a') == 'x' * 100
+    backend.set('c', 'x' * 100, 60)
+    assert backend.get('b') is None
+    assert backend.get('a') == 'x' * 100
+    assert backend.get('c') == 'x' * 100
+    assert backend._size == sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+
+
+def test_disk_keeps_size_across_restarts(tmp_path):
+    backend = DiskCacheBackend(directory=str(tmp_path))
+    backend.set('a', EVENTS, 60)
+    assert DiskCacheBackend(directory=str(tmp_path))._size == backend._size
+
+
+def test_disk_hit_survives_concurrent_eviction(tmp_path, monkeypatch):
+    backend = DiskCacheBackend(directory=str(tmp_path))
+    backend.set('a', EVENTS, 60)
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    # As if another thread's _evict removed the file between the read and the touch
+    monkeypatch.setattr(os, 'utime', evicted)
+    assert backend.get('a') == EVENTS
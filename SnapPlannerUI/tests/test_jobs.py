@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import time
+
+from jobs import JobQueue, QueueFullError
+
+
+def tracked_work(state, release):
+    """Work that records how many copies run at once and blocks until `release` is set."""
+    def work():
+        with state['lock']:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        release.wait(5)
+        with state['lock']:
+            state['running'] -= 1
+        return 'ok'
+    return work
+
+
+def new_state():
+    return {'lock': threading.Lock(), 'running': 0, 'peak': 0}
+
+
+async def wait_done(jobs):
+    while not all(job.done for job in jobs):
+        await asyncio.sleep(0.01)
+
+
+def run_jobs(queue, owners, settle=0.2):
+    """Submit one blocking job per owner; return the peak concurrency and the finished jobs."""
+    state = new_state()
+    release = threading.Event()
+
+    async def main():
+        jobs = [queue.submit(owner, tracked_work(state, release)) for owner in owners]
+        await asyncio.sleep(settle)
+        release.set()
+        await wait_done(jobs)
+        return jobs
+
+    try:
+        jobs = asyncio.run(main())
+        return state['peak'], jobs
+    finally:
+        queue.shutdown()
+
+
+def test_global_limit():
+    peak, jobs = run_jobs(JobQueue(max_workers=3, max_per_user=10), [f'user{i}' for i in range(8)])
+    assert peak == 3
+    assert [job.status for job in jobs] == ['done'] * 8
+    assert [job.result for job in jobs] == ['ok'] * 8
+
+
+def test_per_user_limit():
+    peak, jobs = run_jobs(JobQueue(max_workers=8, max_per_user=2), ['alice'] * 6)
+    assert peak == 2
+    assert all(job.status == 'done' for job in jobs)
+
+
+def test_busy_user_does_not_hold_global_slots():
+    queue = JobQueue(max_workers=3, max_per_user=2)
+    state = new_state()
+    release = threading.Event()
+
+    async def main():
+        busy = [queue.submit('alice', tracked_work(state, release)) for _ in range(5)]
+        await asyncio.sleep(0.1)
+        # alice has 2 running and 3 waiting; bob still gets the free global slot
+        bob = queue.submit('bob', lambda: 'bob')
+        await asyncio.wait_for(wait_done([bob]), 2)
+        assert bob.result == 'bob'
+        assert state['running'] == 2
+        release.set()
+        await wait_done(busy)
+
+    try:
+        asyncio.run(main())
+    finally:
+        queue.shutdown()
+
+
+def test_user_slots_dropped_when_idle():
+    queue = JobQueue(max_workers=2, max_per_user=1)
+    _, jobs = run_jobs(queue, ['alice', 'alice', 'bob'])
+    assert all(job.done for job in jobs)
+    assert queue._user_slots == {}
+
+
+def test_anonymous_jobs_share_one_limit():
+    peak, jobs = run_jobs(JobQueue(max_workers=8, max_per_user=1, max_anonymous=3), [None] * 6)
+    assert peak == 3
+    assert all(job.status == 'done' for job in jobs)
+
+
+def test_anonymous_jobs_do_not_starve_users():
+    queue = JobQueue(max_workers=3, max_per_user=2, max_anonymous=2)
+    state = new_state()
+    release = threading.Event()
+
+    async def main():
+        anonymous = [queue.submit(None, tracked_work(state, release)) for _ in range(6)]
+        await asyncio.sleep(0.1)
+        assert state['running'] == 2
+        alice = queue.submit('alice', lambda: 'alice')
+        await asyncio.wait_for(wait_done([alice]), 2)
+        assert alice.result == 'alice'
+        release.set()
+        await wait_done(anonymous)
+
+    try:
+        asyncio.run(main())
+    finally:
+        queue.shutdown()
+    assert queue._user_slots == {}
+
+
+def test_failed_job():
+    queue = JobQueue(max_workers=1)
+
+    def broken():
+        raise ValueError('bad upload')
+
+    async def main():
+        job = queue.submit('alice', broken)
+        await wait_done([job])
+        return job
+
+    try:
+        job = asyncio.run(main())
+    finally:
+        queue.shutdown()
+    assert job.status == 'failed'
+    assert job.error == 'bad upload'
+    assert queue.metrics()['failed'] == 1
+
+
+def test_queue_full():
+    queue = JobQueue(max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def main():
+        jobs = [queue.submit('alice', release.wait) for _ in range(2)]
+        try:
+            queue.submit('bob', lambda: None)
+            raise AssertionError('third job was accepted')
+        except QueueFullError:
+            pass
+        release.set()
+        await wait_done(jobs)
+
+    try:
+        asyncio.run(main())
+    finally:
+        queue.shutdown()
+
+
+def test_progress_reports():
+    queue = JobQueue(max_workers=1)
+
+    def work(report, count):
+        for i in range(count):
+            report({'event': i})
+        return count
+
+    async def main():
+        job = queue.submit_with_progress('alice', work, 3)
+        await wait_done([job])
+        # call_soon_threadsafe callbacks land before the result's own callback
+        await asyncio.sleep(0)
+        return job
+
+    try:
+        job = asyncio.run(main())
+    finally:
+        queue.shutdown()
+    assert job.result == 3
+    assert job.partial == [{'event': 0}, {'event': 1}, {'event': 2}]
+
+
+def test_finished_jobs_expire():
+    queue = JobQueue(max_workers=1, ttl=0)
+
+    async def main():
+        job = queue.submit('alice', lambda: 1)
+        await wait_done([job])
+        return job
+
+    try:
+        job = asyncio.run(main())
+    finally:
+        queue.shutdown()
+    time.sleep(0.01)
+    assert queue.get(job.id) is None
@@ -0,0 +1,107 @@
+import base64
+import io
+import json
+
+import pytest
+
+import aws_clients
+import lambda_payload
+from fake_s3 import FakeS3
+from lambda_payload import build_payload, invoke_extraction, staged_payload
+
+PNG = bytes(range(256)) * 40 + b'tail'
+
+
+class StubLambda:
+    """Records invoke payloads and answers like SnapPlannerFunction would."""
+
+    def __init__(self, s3=None, error=None):
+        self.s3 = s3
+        self.error = error
+        self.payloads = []
+        self.staged = []
+
+    def invoke(self, FunctionName, Payload):
+        assert FunctionName == 'SnapPlannerFunction'
+        payload = json.loads(Payload if isinstance(Payload, bytes) else Payload.read())
+        self.payloads.append(payload)
+        if self.s3 is not None:
+            # What the Lambda would find in the bucket while it runs
+            self.staged.append(dict(self.s3.objects))
+        if self.error is not None:
+            raise self.error
+        return {'Payload': io.BytesIO(json.dumps({'statusCode': 200, 'body': '[]'}).encode())}
+
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    with FakeS3() as fake:
+        monkeypatch.setenv('S3_ENDPOINT_URL', fake.url)
+        # A client built for another endpoint (or none) must not be reused
+        monkeypatch.delitem(aws_clients._clients, 's3', raising=False)
+        yield fake
+    aws_clients._clients.pop('s3', None)
+
+
+@pytest.fixture
+def stub_lambda(monkeypatch):
+    def install(stub):
+        monkeypatch.setitem(aws_clients._clients, 'lambda', stub)
+        return stub
+    return install
+
+
+@pytest.mark.parametrize('size', [0, 1, 2, 3, lambda_payload.ENCODE_CHUNK_SIZE + 1, len(PNG)])
+def test_build_payload_round_trips(size, monkeypatch):
+    # Small chunks and spool size, so the chunking and the spill to disk both happen
+    monkeypatch.setattr(lambda_payload, 'ENCODE_CHUNK_SIZE', 3 * 5)
+    monkeypatch.setattr(lambda_payload, 'SPOOL_MAX_MEMORY', 100)
+    data = (PNG * 2)[:size]
+    with build_payload(io.BytesIO(data), 'image', {'prompts_only': True, 'timezone': 'America/New_York'}) as payload:
+        body = json.loads(payload.read())['body']
+    assert base64.b64decode(body.pop('image')) == data
+    assert body == {'prompts_only': True, 'timezone': 'America/New_York'}
+
+
+def test_build_payload_without_options():
+    with build_payload(io.BytesIO(b'%PDF-1.4'), 'pdf') as payload:
+        assert json.loads(payload.read()) == {'body': {'pdf': base64.b64encode(b'%PDF-1.4').decode()}}
+
+
+def test_without_a_bucket_the_file_goes_in_the_payload(stub_lambda):
+    stub = stub_lambda(StubLambda())
+    response = invoke_extraction(io.BytesIO(PNG), 'image', {'prompts_only': True}, bucket=None)
+    assert response == {'statusCode': 200, 'body': '[]'}
+    body = stub.payloads[0]['body']
+    assert base64.b64decode(body['image']) == PNG
+    assert body['prompts_only'] and 's3' not in body
+
+
+def test_with_a_bucket_the_file_is_staged(fake_s3, stub_lambda):
+    stub = stub_lambda(StubLambda(s3=fake_s3))
+    response = invoke_extraction(io.BytesIO(PNG), 'image', {'prompts_only': True}, bucket='uploads')
+    assert response == {'statusCode': 200, 'body': '[]'}
+    body = stub.payloads[0]['body']
+    key = body['s3']['key']
+    assert key.startswith(lambda_payload.UPLOAD_STAGING_PREFIX)
+    assert stub.payloads[0] == json.loads(staged_payload('uploads', key, 'image', {'prompts_only': True}))
+    # The Lambda gets the raw file from the bucket, not base64 in the payload
+    assert 'image' not in body
+    assert stub.staged[0] == {('uploads', key): PNG}
+    # and the object is gone once it returns
+    assert fake_s3.objects == {}
+
+
+def test_staged_object_is_deleted_when_the_invoke_fails(fake_s3, stub_lambda):
+    stub = stub_lambda(StubLambda(s3=fake_s3, error=RuntimeError('Lambda timed out')))
+    with pytest.raises(RuntimeError):
+        invoke_extraction(io.BytesIO(PNG), 'pdf', bucket='uploads')
+    assert len(stub.staged[0]) == 1
+    assert fake_s3.objects == {}
+
+
+def test_invoke_prompts(stub_lambda):
+    stub = stub_lambda(StubLambda())
+    prompts = {'system': 'Extract events', 'header': 'Today is', 'chunks': ['a', 'b']}
+    assert lambda_payload.invoke_prompts(prompts) == {'statusCode': 200, 'body': '[]'}
+    assert stub.payloads == [{'body': {'prompts': prompts}}]
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import threading
+import time
+
+import pytest
+
+import api
+from password_hashing import HasherBusyError, LoginRateLimiter, PasswordHasher, password_context
+from storage import MemoryStorage
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    # The cheapest bcrypt cost, so the tests do not spend seconds hashing
+    hasher = PasswordHasher(password_context(rounds=4), workers=2)
+    monkeypatch.setattr(api, 'password_hasher', hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+def run(coro):
+    # On make_client's loop: asyncio.run() would leave the TestClient without one
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def legacy_hash(password):
+    """What FastAPI.py used to store: an unsalted SHA-256 hex digest."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def test_bcrypt_hashes_verify_without_an_update(hasher):
+    async def main():
+        hashed = await hasher.hash('hunter2')
+        assert hashed.startswith('$2b$04$')
+        assert await hasher.verify_and_update('hunter2', hashed) == (True, None)
+        assert await hasher.verify_and_update('hunter3', hashed) == (False, None)
+
+    asyncio.run(main())
+
+
+def test_legacy_hashes_verify_and_are_upgraded(hasher):
+    async def main():
+        verified, new_hash = await hasher.verify_and_update('hunter2', legacy_hash('hunter2'))
+        assert verified and new_hash.startswith('$2b$04$')
+        assert await hasher.verify_and_update('hunter2', new_hash) == (True, None)
+        assert await hasher.verify_and_update('hunter3', legacy_hash('hunter2')) == (False, None)
+        # A higher cost later on makes the older bcrypt hashes due for an update too
+        assert password_context(rounds=5).verify_and_update('hunter2', new_hash)[1].startswith('$2b$05$')
+
+    asyncio.run(main())
+
+
+class BlockingContext:
+    """A CryptContext stand-in whose hash() waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password):
+        self.release.wait(5)
+        return 'hashed'
+
+
+def test_full_queue_is_turned_away():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, workers=1, queue_size=2)
+
+    async def main():
+        waiting = [asyncio.ensure_future(hasher.hash('a')), asyncio.ensure_future(hasher.hash('b'))]
+        await asyncio.sleep(0)
+        with pytest.raises(HasherBusyError):
+            await hasher.hash('c')
+        assert hasher.stats() == {'pending': 2, 'rejected': 1, 'queue_size': 2}
+        context.release.set()
+        assert await asyncio.gather(*waiting) == ['hashed', 'hashed']
+        # Room again once those are done
+        assert await hasher.hash('d') == 'hashed'
+
+    try:
+        asyncio.run(main())
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()['pending'] == 0
+
+
+def test_rate_limiter_window():
+    limiter = LoginRateLimiter(max_failures=3, window=0.2)
+    for _ in range(2):
+        limiter.failed('user:alice', 'address:1')
+    assert limiter.retry_after('user:alice') == 0
+    limiter.failed('user:alice', 'address:1')
+    assert 0 < limiter.retry_after('user:alice') <= 0.2
+    assert limiter.retry_after('user:bob', 'address:1') > 0
+    assert limiter.retry_after('user:bob', 'address:2') == 0
+    time.sleep(0.25)
+    assert limiter.retry_after('user:alice', 'address:1') == 0
+
+
+def test_rate_limiter_success_clears_the_account_only():
+    limiter = LoginRateLimiter(max_failures=2, window=60)
+    limiter.failed('user:alice', 'address:1')
+    limiter.failed('user:alice', 'address:1')
+    limiter.succeeded('user:alice')
+    assert limiter.retry_after('user:alice') == 0
+    assert limiter.retry_after('address:1') > 0
+
+
+def test_rate_limiter_forgets_the_oldest_keys():
+    limiter = LoginRateLimiter(max_failures=1, window=60, max_keys=2)
+    for key in ('a', 'b', 'c'):
+        limiter.failed(key)
+    assert limiter.retry_after('a') == 0
+    assert limiter.retry_after('b') > 0 and limiter.retry_after('c') > 0
+
+
+def login(client, username, password):
+    return client.post('/auth/token', data={'username': username, 'password': password})
+
+
+def test_login_upgrades_a_legacy_hash(make_client, hasher):
+    storage = MemoryStorage()
+    run(storage.add_user({'username': 'alice', 'password': legacy_hash('hunter2'), 'email': None}))
+    client = make_client(storage)
+    response = login(client, 'alice', 'hunter2')
+    assert response.status_code == 200 and response.json()['token_type'] == 'bearer'
+    stored = storage.users['alice']['password']
+    assert stored.startswith('$2b$04$')
+    assert storage.users['alice']['email'] is None
+    assert login(client, 'alice', 'hunter2').status_code == 200
+    assert storage.users['alice']['password'] == stored
+    assert login(client, 'alice', 'hunter3').status_code == 401
+
+
+def test_login_is_rate_limited(make_client, hasher, monkeypatch):
+    monkeypatch.setattr(api, 'login_limiter', LoginRateLimiter(max_failures=3, window=60))
+    storage = MemoryStorage()
+    client = make_client(storage)
+    assert client.post('/auth/register', json={'username': 'alice', 'password': 'hunter2'}).status_code == 200
+    for _ in range(3):
+        assert login(client, 'alice', 'wrong').status_code == 401
+    response = login(client, 'alice', 'hunter2')
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 61
+    # The address is limited too, whichever username it tries next
+    assert login(client, 'nobody', 'x').status_code == 429
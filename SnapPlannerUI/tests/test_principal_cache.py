@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import api
+from conftest import auth_header
+from principal_cache import PrincipalCache
+from storage import MemoryStorage
+
+ALICE = {'username': 'alice', 'password': 'x'}
+BOB = {'username': 'bob', 'password': 'x'}
+
+
+def test_entries_expire_with_the_ttl():
+    cache = PrincipalCache(ttl=0.05)
+    cache.put('token', ALICE, time.time() + 900)
+    assert cache.get('token') == ALICE
+    time.sleep(0.06)
+    assert cache.get('token') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_entries_expire_with_the_token():
+    cache = PrincipalCache(ttl=300)
+    cache.put('expired', ALICE, time.time() - 1)
+    cache.put('expiring', ALICE, time.time() + 0.05)
+    assert cache.get('expired') is None
+    assert cache.get('expiring') == ALICE
+    time.sleep(0.06)
+    assert cache.get('expiring') is None
+    assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 2, 'ttl': 300}
+
+
+def test_zero_ttl_disables_the_cache():
+    cache = PrincipalCache(ttl=0)
+    cache.put('token', ALICE, time.time() + 900)
+    assert cache.get('token') is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PrincipalCache(max_entries=2)
+    expires = time.time() + 900
+    cache.put('a', ALICE, expires)
+    cache.put('b', BOB, expires)
+    cache.get('a')
+    cache.put('c', BOB, expires)
+    assert cache.get('b') is None
+    assert cache.get('a') == ALICE and cache.get('c') == BOB
+
+
+def test_invalidate_user_drops_every_token_of_that_user():
+    cache = PrincipalCache()
+    expires = time.time() + 900
+    cache.put('phone', ALICE, expires)
+    cache.put('laptop', ALICE, expires)
+    cache.put('bob', BOB, expires)
+    # After a password change or account deletion
+    cache.invalidate_user('alice')
+    assert cache.get('phone') is None and cache.get('laptop') is None
+    assert cache.get('bob') == BOB
+    cache.invalidate_user('carol')
+    assert cache.stats()['entries'] == 1
+
+
+class CountingStorage(MemoryStorage):
+    """MemoryStorage that counts Users reads."""
+
+    def __init__(self):
+        super().__init__()
+        self.user_reads = 0
+
+    async def get_user(self, username):
+        self.user_reads += 1
+        return await super().get_user(username)
+
+
+def test_cached_principal_skips_the_users_read(make_client):
+    storage = CountingStorage()
+    asyncio.get_event_loop().run_until_complete(storage.add_user(ALICE))
+    client = make_client(storage)
+    headers = auth_header('alice')
+    for _ in range(3):
+        assert client.get('/events/', headers=headers).status_code == 200
+    assert storage.user_reads == 1
+    assert api.principal_cache.stats()['hits'] == 2
+
+
+def test_register_invalidates_tokens_for_the_name(make_client):
+    storage = MemoryStorage()
+    asyncio.get_event_loop().run_until_complete(storage.add_user(ALICE))
+    client = make_client(storage)
+    headers = auth_header('alice')
+    assert client.get('/events/', headers=headers).status_code == 200
+    # The account goes away; its cached token is still trusted until invalidated
+    del storage.users['alice']
+    assert client.get('/events/', headers=headers).status_code == 200
+    response = client.post('/auth/register', json={'username': 'alice', 'password': 'new password'})
+    assert response.status_code == 200
+    # Registering dropped the cached token, so it is checked against the Users table again
+    del storage.users['alice']
+    assert client.get('/events/', headers=headers).status_code == 401
@@ -0,0 +1,292 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from sqlite_store import SQLiteStore
+from storage import CachingStorage, DynamoDBStorage, MemoryStorage, SQLiteStorage
+
+LECTURE = {'id': 'e1', 'title': 'Lecture', 'start': '2025-03-10T09:00', 'end': '2025-03-10T10:30',
+           'description': None, 'tags': 'productivity, school'}
+GYM = {'id': 'e2', 'title': 'Gym', 'start': '2025-03-10T00:00', 'end': '2025-03-10T01:00',
+       'description': 'Legs', 'tags': 'athletics'}
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'dynamodb'])
+def storage(request, tmp_path):
+    if request.param == 'memory':
+        backend = MemoryStorage()
+    elif request.param == 'sqlite':
+        backend = SQLiteStorage(SQLiteStore(str(tmp_path / 'snapplanner.db')))
+    else:
+        request.getfixturevalue('fake_dynamodb')
+        backend = DynamoDBStorage()
+    yield backend
+    backend.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def all_events(storage, username, lower=None, upper=None):
+    events = []
+    async for page in storage.query_events(username, lower, upper):
+        events.extend(page)
+    return sorted(events, key=lambda event: event['id'])
+
+
+def strip(event):
+    return {key: value for key, value in event.items() if key not in ('user_id', 'long_end')}
+
+
+def test_users(storage):
+    alice = {'username': 'alice', 'password': 'hash', 'email': 'a@example.com'}
+    assert run(storage.get_user('alice')) is None
+    assert run(storage.add_user(alice))
+    assert not run(storage.add_user({**alice, 'password': 'other'}))
+    assert run(storage.get_user('alice')) == alice
+    run(storage.put_user({**alice, 'password': 'rehashed'}))
+    assert run(storage.get_user('alice'))['password'] == 'rehashed'
+
+
+def test_event_writes_return_what_they_replace(storage):
+    assert run(storage.put_event('alice', LECTURE)) is None
+    moved = {**LECTURE, 'start': '2025-03-11T09:00', 'end': '2025-03-11T10:30'}
+    assert strip(run(storage.put_event('alice', moved))) == LECTURE
+    old_events, failed = run(storage.put_events('alice', [LECTURE, GYM]))
+    assert failed == {}
+    assert [strip(event) if event else None for event in old_events] == [moved, None]
+    assert [strip(event) for event in run(all_events(storage, 'alice'))] == [LECTURE, GYM]
+    assert strip(run(storage.delete_event('alice', 'e1'))) == LECTURE
+    assert run(storage.delete_event('alice', 'e1')) is None
+    assert [strip(event) for event in run(all_events(storage, 'alice'))] == [GYM]
+
+
+def test_events_are_per_user(storage):
+    run(storage.put_event('alice', LECTURE))
+    run(storage.put_event('bob', GYM))
+    assert [event['id'] for event in run(all_events(storage, 'alice'))] == ['e1']
+    assert [event['user_id'] for event in run(all_events(storage, 'bob'))] == ['bob']
+    assert run(storage.delete_event('bob', 'e1')) is None
+
+
+def test_summary_items_follow_event_writes(storage):
+    run(storage.put_events('alice', [LECTURE, GYM]))
+    run(storage.put_event('alice', {**GYM, 'end': '2025-03-10T02:00'}))
+    run(storage.put_event('alice', {**LECTURE, 'id': 'e3', 'start': '2025-03-12T09:00', 'end': '2025-03-12T10:00'}))
+    run(storage.delete_event('alice', 'e3'))
+    items = {item['day']: item for item in run(storage.summary_items('alice', '2025-03-09', '2025-03-15'))}
+    hour = 60 * 60 * 1000
+    day = items['2025-03-10']
+    assert int(day['ms']) == 3.5 * hour
+    assert int(day['tag:productivity']) == int(day['tag:school']) == 1.5 * hour
+    assert int(day['tag:athletics']) == 2 * hour
+    assert int(day['midnight_ms']) == int(day['midnight_tag:athletics']) == 2 * hour
+    # e3's day adds up to nothing once it is deleted again
+    assert not any(int(value) for key, value in items.get('2025-03-12', {}).items() if key not in ('user_id', 'day'))
+    assert run(storage.summary_items('bob', '2025-03-09', '2025-03-15')) == []
+
+
+class CountingStorage(MemoryStorage):
+    """MemoryStorage that counts the reads reaching it."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_user(self, username):
+        self.reads += 1
+        return await super().get_user(username)
+
+    async def query_events(self, username, lower=None, upper=None):
+        self.reads += 1
+        async for page in super().query_events(username, lower, upper):
+            yield page
+
+    async def summary_items(self, username, first_day, last_day):
+        self.reads += 1
+        return await super().summary_items(username, first_day, last_day)
+
+
+def cached(ttl=60, max_entries=100):
+    backend = CountingStorage()
+    run(backend.add_user({'username': 'alice', 'password': 'x'}))
+    run(backend.put_event('alice', LECTURE))
+    return backend, CachingStorage(backend, ttl=ttl, max_entries=max_entries)
+
+
+def test_cache_serves_repeat_reads():
+    backend, storage = cached()
+    for _ in range(3):
+        assert run(storage.get_user('alice'))['username'] == 'alice'
+        assert [event['id'] for event in run(all_events(storage, 'alice', '2025-03-01', '2025-03-31'))] == ['e1']
+        assert len(run(storage.summary_items('alice', '2025-03-09', '2025-03-15'))) == 1
+    # summary_items reads the events once itself when it misses
+    assert backend.reads == 4
+    assert storage.stats()['hits'] == 6
+
+
+def test_cache_skips_unknown_users():
+    backend, storage = cached()
+    assert run(storage.get_user('bob')) is None
+    run(backend.add_user({'username': 'bob', 'password': 'x'}))
+    assert run(storage.get_user('bob'))['username'] == 'bob'
+
+
+@pytest.mark.parametrize('write', [
+    lambda storage: storage.put_event('alice', GYM),
+    lambda storage: storage.put_events('alice', [GYM]),
+    lambda storage: storage.delete_event('alice', 'e1'),
+])
+def test_event_writes_invalidate_the_writer(write):
+    backend, storage = cached()
+    run(storage.put_event('bob', GYM))
+    before = run(all_events(storage, 'alice'))
+    run(all_events(storage, 'bob'))
+    run(storage.summary_items('alice', '2025-03-09', '2025-03-15'))
+    run(write(storage))
+    reads = backend.reads
+    assert run(all_events(storage, 'alice')) != before
+    run(storage.summary_items('alice', '2025-03-09', '2025-03-15'))
+    assert backend.reads > reads + 1
+    reads = backend.reads
+    # bob's entries were left alone
+    run(all_events(storage, 'bob'))
+    assert backend.reads == reads
+
+
+def test_user_writes_invalidate_the_user():
+    backend, storage = cached()
+    run(storage.get_user('alice'))
+    run(storage.put_user({'username': 'alice', 'password': 'rehashed'}))
+    assert run(storage.get_user('alice'))['password'] == 'rehashed'
+
+
+def test_cache_entries_expire():
+    backend, storage = cached(ttl=0.05)
+    run(storage.get_user('alice'))
+    time.sleep(0.06)
+    run(storage.get_user('alice'))
+    assert backend.reads == 2
+
+
+def test_cache_evicts_least_recently_used():
+    backend, storage = cached(max_entries=2)
+    for username in ('alice', 'bob', 'carol'):
+        run(backend.add_user({'username': username, 'password': 'x'}))
+        run(storage.get_user(username))
+    assert storage.stats()['entries'] == 2
+    reads = backend.reads
+    run(storage.get_user('alice'))
+    assert backend.reads == reads + 1
+    # Invalidating an evicted user's entries is harmless
+    storage.invalidate_user('bob')
+    storage.invalidate_user('alice')
+    assert storage.stats()['entries'] == 1
+
+
+class PausingStorage(MemoryStorage):
+    """MemoryStorage whose reads, once `pause` is set, take their result and then wait for `resume`."""
+
+    def __init__(self):
+        super().__init__()
+        self.pause = False
+        self.paused = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def _wait(self):
+        if self.pause:
+            self.pause = False
+            self.paused.set()
+            await self.resume.wait()
+
+    async def get_user(self, username):
+        user = await super().get_user(username)
+        await self._wait()
+        return user
+
+    async def query_events(self, username, lower=None, upper=None):
+        async for page in super().query_events(username, lower, upper):
+            await self._wait()
+            yield page
+
+    async def summary_items(self, username, first_day, last_day):
+        items = await super().summary_items(username, first_day, last_day)
+        await self._wait()
+        return items
+
+
+READS = {
+    'get_user': (lambda storage: storage.get_user('alice'),
+                 lambda storage: storage.put_user({'username': 'alice', 'password': 'rehashed'})),
+    'query_events': (lambda storage: all_events(storage, 'alice'),
+                     lambda storage: storage.put_event('alice', GYM)),
+    'summary_items': (lambda storage: storage.summary_items('alice', '2025-03-09', '2025-03-15'),
+                      lambda storage: storage.put_event('alice', GYM)),
+}
+
+
+@pytest.mark.parametrize('read', sorted(READS))
+def test_reads_overtaken_by_a_write_are_not_cached(read):
+    read, write = READS[read]
+
+    async def main():
+        backend = PausingStorage()
+        await backend.add_user({'username': 'alice', 'password': 'x'})
+        await backend.put_event('alice', LECTURE)
+        storage = CachingStorage(backend, ttl=60)
+        backend.pause = True
+        stale = asyncio.ensure_future(read(storage))
+        await backend.paused.wait()
+        await write(storage)
+        backend.resume.set()
+        before = await stale
+        after = await read(storage)
+        assert after != before
+        # and the fresh result is cached as usual
+        assert await read(storage) == after
+        assert storage.stats()['hits'] == 1
+        assert storage._reads == {}
+
+    run(main())
+
+
+def test_abandoned_reads_are_not_cached():
+    backend, storage = cached()
+    run(backend.put_event('alice', GYM))
+
+    async def first_page():
+        pages = storage.query_events('alice')
+        page = await pages.__anext__()
+        await pages.aclose()
+        return page
+
+    run(first_page())
+    assert storage.stats()['entries'] == 0
+    assert storage._reads == {}
+
+
+def test_sqlite_close_reaches_every_thread(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'snapplanner.db'))
+    opened = []
+
+    def read():
+        store.get_user('alice')
+        opened.append(store._local.connection)
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(opened)) == 3
+    store.close()
+    for connection in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute('SELECT 1')
+    # The store still works afterwards, on a fresh connection
+    assert store.add_user({'username': 'alice', 'password': 'x'})
+    store.close()
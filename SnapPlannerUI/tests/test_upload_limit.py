@@ -0,0 +1,114 @@
+import asyncio
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from upload_limit import UploadSizeLimitMiddleware
+
+LIMIT = 1000
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.post("/uploadfile/")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/events/")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=LIMIT)
+    return app
+
+
+def client():
+    # This Starlette's TestClient needs a current event loop
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    return TestClient(make_app())
+
+
+def chunks(size, chunk_size=100):
+    """A multipart body of about `size` bytes, sent without a Content-Length."""
+    yield b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n\r\n'
+    for start in range(0, size, chunk_size):
+        yield b'x' * min(chunk_size, size - start)
+    yield b'\r\n--boundary--\r\n'
+
+
+def test_small_uploads_pass():
+    response = client().post('/uploadfile/', files={'file': ('a.png', b'x' * 100)})
+    assert response.status_code == 200
+    assert response.json() == {'size': 100}
+
+
+def test_oversize_content_length_is_rejected():
+    response = client().post('/uploadfile/', files={'file': ('a.png', b'x' * LIMIT)})
+    assert response.status_code == 413
+    assert response.json() == {'detail': 'File too large'}
+
+
+def test_small_chunked_body_passes():
+    response = client().post('/uploadfile/', data=chunks(100),
+                             headers={'Content-Type': 'multipart/form-data; boundary=boundary'})
+    assert response.status_code == 200
+    assert response.json() == {'size': 100}
+
+
+def test_oversize_chunked_body_is_rejected():
+    response = client().post('/uploadfile/', data=chunks(3 * LIMIT),
+                             headers={'Content-Type': 'multipart/form-data; boundary=boundary'})
+    assert response.status_code == 413
+    assert response.json() == {'detail': 'File too large'}
+
+
+def test_other_paths_are_not_limited():
+    response = client().post('/events/', data=b'x' * (3 * LIMIT))
+    assert response.status_code == 200
+    assert response.json() == {'size': 3 * LIMIT}
+
+
+def run_middleware(messages, headers=()):
+    """Send `messages` through the middleware around an app that reads the whole body."""
+    received = []
+    sent = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message)
+            if not message.get('more_body'):
+                break
+        await send({'type': 'http.response.start', 'status': 400, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'parse error'})
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/uploadfile/', 'headers': list(headers)}
+    asyncio.run(UploadSizeLimitMiddleware(app, max_bytes=LIMIT)(scope, receive, send))
+    return received, sent
+
+
+def test_chunked_body_is_cut_off_at_the_limit():
+    messages = [{'type': 'http.request', 'body': b'x' * 400, 'more_body': True} for _ in range(10)]
+    received, sent = run_middleware(messages)
+    # The app never sees the chunk that crosses the limit, nor any after it
+    assert len(received) == 2
+    assert len(messages) == 7
+    # and whatever it would have answered is replaced by the 413
+    assert sent[0]['status'] == 413
+    assert b'parse error' not in b''.join(message.get('body', b'') for message in sent)
+
+
+def test_body_at_the_limit_passes():
+    messages = [{'type': 'http.request', 'body': b'x' * 500, 'more_body': True},
+                {'type': 'http.request', 'body': b'x' * 500, 'more_body': False}]
+    received, sent = run_middleware(messages, headers=[(b'content-length', str(LIMIT).encode())])
+    assert len(received) == 2
+    assert sent[0]['status'] == 400
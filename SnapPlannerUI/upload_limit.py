@@ -0,0 +1,63 @@
+from starlette.responses import JSONResponse
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies over `max_bytes` while they are still streaming in.
+
+    Form parsing spools the whole multipart body before a route runs, so a
+    size check inside the route only happens after the damage is done. This
+    ASGI middleware refuses oversized Content-Length headers up front and
+    counts the bytes of chunked uploads as they arrive, cutting the body off
+    with a 413 as soon as the limit is crossed.
+    """
+
+    def __init__(self, app, max_bytes, path_prefixes=('/uploadfile',)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        too_large = JSONResponse({"detail": "File too large"}, status_code=413)
+        headers = dict(scope['headers'])
+        content_length = headers.get(b'content-length')
+        if content_length is not None and int(content_length) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Whatever the app answers after a body parse error, the client gets the 413
+            if exceeded and not response_started:
+                return
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded and not response_started:
+            await too_large(scope, receive, send)